@@ -2,16 +2,51 @@
 Lily unit test package
 """
 
+from lily_unit_test.attachments import AttachmentStore
 from lily_unit_test.classification import Classification
+from lily_unit_test.clock import Clock, VirtualClock
+from lily_unit_test.code_coverage import CodeCoverage
+from lily_unit_test.event_stream import EventStream
+from lily_unit_test.fd_capture import FdCapture
+from lily_unit_test.load_test import LatencyHistogram, LoadGenerator, load_scenario
+from lily_unit_test.log_archive import LogArchive
 from lily_unit_test.logger import Logger
+from lily_unit_test.measurements import Measurements
+from lily_unit_test.parametrize import CsvParameters, parametrize
+from lily_unit_test.plugins import Plugin
+from lily_unit_test.resource_sampler import ResourceSampler
+from lily_unit_test.resources import ResourceProvider
+from lily_unit_test.selection import TestSelector, tags
+from lily_unit_test.soak_statistics import SoakStatistics
 from lily_unit_test.test_settings import TestSettings
 from lily_unit_test.test_runner import TestRunner
 from lily_unit_test.test_suite import TestSuite
+from lily_unit_test.trend_report import TrendReport
 
 # pylint: disable=self-assigning-variable
 # For easy import:
+AttachmentStore = AttachmentStore
 Classification = Classification
+Clock = Clock
+CodeCoverage = CodeCoverage
+EventStream = EventStream
+FdCapture = FdCapture
+CsvParameters = CsvParameters
+LatencyHistogram = LatencyHistogram
+LoadGenerator = LoadGenerator
+LogArchive = LogArchive
 Logger = Logger
+Measurements = Measurements
+Plugin = Plugin
+ResourceProvider = ResourceProvider
+ResourceSampler = ResourceSampler
+SoakStatistics = SoakStatistics
+TestSelector = TestSelector
 TestSettings = TestSettings
 TestRunner = TestRunner
 TestSuite = TestSuite
+TrendReport = TrendReport
+VirtualClock = VirtualClock
+load_scenario = load_scenario
+parametrize = parametrize
+tags = tags
@@ -0,0 +1,151 @@
+"""
+Content-addressed storage for the files that the test suites attach to the report.
+"""
+
+import hashlib
+import json
+import mmap
+import os
+import shutil
+import threading
+
+from lily_unit_test.test_settings import TestSettings
+
+
+class AttachmentStore:
+    """
+    Stores attachments by the SHA-256 hash of their content, so identical files are stored once,
+    also when they are attached by different test suites and in different test runs. The test
+    suite uses this class, see :code:`TestSuite.attach()`.
+
+    :param folder: the folder for the attachments, by default 'attachments' in the report folder.
+
+    A file is stored as :code:`<folder>/<first two characters of the hash>/<hash>`. The source is
+    hashed first. If the hash is already stored, nothing is copied. New content is written to a
+    temporary file, which is hashed again and then renamed. If the source changed while it was
+    copied, the hash of the temporary file is used, so the hash is always of the stored bytes.
+    Test suites in parallel threads or processes can attach the same content at the same time.
+    Large files are copied by the operating system and hashed through a memory map, so their
+    content is not read into Python objects.
+    """
+
+    def __init__(self, folder):
+        self._folder = folder
+
+    ###########
+    # Private #
+    ###########
+
+    @staticmethod
+    def _hash_file(filename):
+        digest = hashlib.sha256()
+        with open(filename, "rb") as fp:
+            size = os.fstat(fp.fileno()).st_size
+            try:
+                if size > 0:
+                    with mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                        digest.update(data)
+                return digest.hexdigest(), size
+            except (OSError, ValueError):
+                # Files that cannot be mapped, like pipes, are read in blocks
+                pass
+            buffer = bytearray(TestSettings.ATTACHMENT_BUFFER_SIZE)
+            view = memoryview(buffer)
+            size = 0
+            while True:
+                n_bytes = fp.readinto(buffer)
+                if n_bytes == 0:
+                    break
+                digest.update(view[:n_bytes])
+                size += n_bytes
+        return digest.hexdigest(), size
+
+    ##########
+    # Public #
+    ##########
+
+    def get_folder(self):
+        """
+        :return: the folder for the attachments.
+        """
+        return self._folder
+
+    def add(self, path_or_buffer):
+        """
+        Store a file or a buffer, if the content is not already stored.
+
+        :param path_or_buffer: the filename of a file, or an object with the bytes, like bytes,
+            bytearray or memoryview.
+        :return: tuple with the hash, the size in bytes and the path of the stored attachment,
+            relative to the folder, with forward slashes.
+        """
+        is_file = isinstance(path_or_buffer, (str, os.PathLike))
+        if is_file:
+            digest, size = self._hash_file(path_or_buffer)
+        else:
+            data = memoryview(path_or_buffer).cast("B")
+            digest, size = hashlib.sha256(data).hexdigest(), data.nbytes
+        if os.path.isfile(os.path.join(self._folder, digest[:2], digest)):
+            return digest, size, f"{digest[:2]}/{digest}"
+
+        os.makedirs(self._folder, exist_ok=True)
+        temp_filename = os.path.join(self._folder,
+                                     f"{os.getpid()}_{threading.get_ident()}.tmp")
+        try:
+            if is_file:
+                # Uses the zero-copy functions of the operating system, when available
+                shutil.copyfile(path_or_buffer, temp_filename)
+            else:
+                with open(temp_filename, "wb") as fp:
+                    fp.write(data)
+            # The source can change between hashing and copying, the stored bytes are leading
+            digest, size = self._hash_file(temp_filename)
+            filename = os.path.join(self._folder, digest[:2], digest)
+            if not os.path.isfile(filename):
+                os.makedirs(os.path.dirname(filename), exist_ok=True)
+                os.replace(temp_filename, filename)
+        finally:
+            if os.path.isfile(temp_filename):
+                os.remove(temp_filename)
+        return digest, size, f"{digest[:2]}/{digest}"
+
+
+def write_attachments(filename, attachments):
+    """
+    Write the attachments of a test suite to a JSON file.
+
+    :param filename: the name of the file.
+    :param attachments: list with a dictionary for each attachment, with the test case, name,
+        hash, size and path.
+    """
+    os.makedirs(os.path.dirname(filename), exist_ok=True)
+    with open(filename, "w", encoding="utf-8") as fp:
+        json.dump({"attachments": attachments}, fp, indent=2)
+
+
+def read_attachments(filename):
+    """
+    Read the attachments of a test suite from a JSON file that is written by write_attachments.
+
+    :param filename: the name of the file.
+    :return: list with a dictionary for each attachment.
+    """
+    with open(filename, "r", encoding="utf-8") as fp:
+        return json.load(fp)["attachments"]
+
+
+if __name__ == "__main__":
+
+    import tempfile
+    import time
+
+    with tempfile.TemporaryDirectory() as _temp_folder:
+        _filename = os.path.join(_temp_folder, "firmware.bin")
+        with open(_filename, "wb") as _fp:
+            _fp.write(os.urandom(256 * 1024 * 1024))
+        _store = AttachmentStore(os.path.join(_temp_folder, "attachments"))
+        for _i in range(2):
+            _start = time.perf_counter()
+            _digest, _size, _path = _store.add(_filename)
+            print(f"Attached {_size / 1024 / 1024:.0f} MB in {time.perf_counter() - _start:.2f} s: "
+                  f"{_path}")
@@ -0,0 +1,207 @@
+"""
+Clocks for the test suites: the real time and a virtual time that fast-forwards sleeping.
+"""
+
+import heapq
+import itertools
+import threading
+import time
+
+
+class Clock:
+    """
+    Clock with the real time. The test suite has a clock in its :code:`clock` attribute.
+    Use the clock instead of the :code:`time` module, so the test suite can run with virtual
+    time (see VirtualClock).
+    """
+
+    # Thread identifier: the virtual clock of the thread
+    _thread_clocks = {}
+    _threads_lock = threading.Lock()
+
+    def time(self):
+        """
+        :return: the time in seconds since the epoch, like :code:`time.time()`.
+        """
+        return time.time()
+
+    def monotonic(self):
+        """
+        :return: the value of a monotonic clock in seconds, like :code:`time.monotonic()`.
+        """
+        return time.monotonic()
+
+    def sleep(self, seconds):
+        """
+        Sleep for the given time, like :code:`time.sleep()`.
+
+        :param seconds: time to sleep in seconds (can be fractional).
+        """
+        time.sleep(seconds)
+
+    def add_thread(self):
+        """
+        Add a thread that uses the clock, before the thread is started.
+        The thread must call :code:`enter_thread()` first and :code:`exit_thread()` last.
+        """
+
+    def enter_thread(self):
+        """
+        Use this clock for sleeping in the current thread.
+        """
+
+    def exit_thread(self):
+        """
+        The current thread stops using this clock.
+        """
+
+    @classmethod
+    def get_thread_clock(cls):
+        """
+        :return: the clock of the current thread, a clock with the real time if the thread has
+            no virtual clock.
+        """
+        with cls._threads_lock:
+            clock = cls._thread_clocks.get(threading.get_ident())
+        return _REAL_CLOCK if clock is None else clock
+
+
+_REAL_CLOCK = Clock()
+
+
+class VirtualClock(Clock):  # pylint: disable=too-many-instance-attributes
+    """
+    Clock with a virtual time. The virtual time only changes when a thread wakes up from
+    :code:`sleep()`. When all threads that use the clock are sleeping, the time jumps ahead to the
+    first thread that wakes up. The threads wake up in the order of their wake-up time, like with
+    the real time. Timeouts of minutes are tested in milliseconds.
+
+    The threads that use the clock are the thread that runs the test suite and the threads that
+    are started with :code:`start_thread()` of the test suite. A thread that is running, or that
+    waits for something else than the clock, like a socket or :code:`join()`, is busy. While a
+    thread is busy, the time is frozen. A sleeping thread still wakes up after its sleep time has
+    passed in real time, then the time jumps to its wake-up time. So the time never runs faster
+    than the real time while a thread is busy, but it does not run smoothly either.
+
+    Do not busy-wait on the clock, like :code:`while clock.time() < deadline: pass`. The time does
+    not change while the thread is busy, so this loop hangs if no other thread sleeps. Sleep
+    until the deadline instead.
+
+    :param start_time: the time in seconds since the epoch to start with, default the real time.
+    """
+
+    def __init__(self, start_time=None):
+        self._start_time = time.time() if start_time is None else start_time
+        self._start_monotonic = time.monotonic()
+        self._elapsed = 0.0
+        self._condition = threading.Condition()
+        # Timers: [wake-up time, sequence number, woken], sequence keeps the order for equal times
+        self._timers = []
+        self._sequence = itertools.count()
+        self._n_threads = 0
+        self._n_sleeping = 0
+        self._closed = False
+
+    ###########
+    # Private #
+    ###########
+
+    def _wake_up(self, fast_forward):
+        # Wakes the timers that are due. When fast forwarding, the time jumps to the first timer.
+        while len(self._timers) > 0 and (fast_forward or self._timers[0][0] <= self._elapsed):
+            timer = heapq.heappop(self._timers)
+            self._elapsed = max(self._elapsed, timer[0])
+            timer[2] = True
+            self._n_sleeping -= 1
+            # Only the first timer, the time must not jump past timers of the woken thread
+            fast_forward = False
+            self._condition.notify_all()
+
+    def _check_all_sleeping(self):
+        if self._n_sleeping >= self._n_threads:
+            self._wake_up(True)
+
+    ##########
+    # Public #
+    ##########
+
+    def time(self):
+        with self._condition:
+            return self._start_time + self._elapsed
+
+    def monotonic(self):
+        with self._condition:
+            return self._start_monotonic + self._elapsed
+
+    def sleep(self, seconds):
+        with self._condition:
+            if self._closed:
+                timer = None
+            else:
+                timer = [self._elapsed + max(0.0, seconds), next(self._sequence), False]
+                heapq.heappush(self._timers, timer)
+                self._n_sleeping += 1
+                self._wake_up(False)
+                self._check_all_sleeping()
+            while timer is not None and not timer[2]:
+                # If not all threads are sleeping, the time is not slower than the real time
+                if not self._condition.wait(self._timers[0][0] - self._elapsed):
+                    self._wake_up(True)
+        if timer is None:
+            time.sleep(seconds)
+
+    def add_thread(self):
+        with self._condition:
+            self._n_threads += 1
+
+    def enter_thread(self):
+        with self._threads_lock:
+            self._thread_clocks[threading.get_ident()] = self
+
+    def exit_thread(self):
+        with self._threads_lock:
+            if self._thread_clocks.get(threading.get_ident()) is self:
+                del self._thread_clocks[threading.get_ident()]
+        with self._condition:
+            self._n_threads -= 1
+            self._check_all_sleeping()
+
+    def close(self):
+        """
+        Stop the virtual time. Sleeping threads wake up and threads that keep running sleep in
+        real time, so threads that are left running do not fast-forward forever.
+        """
+        with self._condition:
+            self._closed = True
+            self._wake_up(False)
+            for timer in self._timers:
+                timer[2] = True
+            self._timers = []
+            self._n_sleeping = 0
+            self._condition.notify_all()
+
+
+if __name__ == "__main__":
+
+    def _timeout_thread(clock, name, timeout, events):
+        clock.enter_thread()
+        clock.sleep(timeout)
+        events.append((clock.monotonic() - start_monotonic, name))
+        clock.exit_thread()
+
+    virtual_clock = VirtualClock()
+    start_monotonic = virtual_clock.monotonic()
+    _events = []
+    real_start = time.perf_counter()
+    virtual_clock.add_thread()
+    virtual_clock.enter_thread()
+    for _name, _timeout in (("retry", 30), ("keep alive", 10), ("session", 300)):
+        virtual_clock.add_thread()
+        threading.Thread(target=_timeout_thread,
+                         args=(virtual_clock, _name, _timeout, _events)).start()
+    virtual_clock.sleep(600)
+    virtual_clock.exit_thread()
+    virtual_clock.close()
+    for _time, _name in _events:
+        print(f"{_time:6.1f} s: {_name}")
+    print(f"600 seconds of virtual time in {1000 * (time.perf_counter() - real_start):.1f} ms")
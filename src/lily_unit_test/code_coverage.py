@@ -0,0 +1,348 @@
+"""
+Measures which lines of the source code are executed by each test suite.
+"""
+
+import dis
+import html
+import json
+import os
+import sys
+import threading
+import types
+
+from collections import defaultdict
+from string import Template
+
+from lily_unit_test.plugins import Plugin
+
+# Python 3.12 and newer
+_MONITORING = getattr(sys, "monitoring", None)
+
+
+class CodeCoverage(Plugin):  # pylint: disable=too-many-instance-attributes
+    """
+    Plugin that records the executed lines of the source code, for each test suite and for the
+    whole test run. The test runner uses this plugin with the :code:`coverage` option.
+
+    :param source_paths: list with the folders and files of the source code to measure. Other
+        code, like the standard library and installed packages, is not measured.
+
+    On Python 3.12 and newer, :code:`sys.monitoring` is used. Each line is reported once and then
+    disabled, so code that runs in a loop has no overhead. When a test suite starts, the lines are
+    enabled again, to see which lines the test suite executes. On older versions of Python, a trace
+    function (:code:`sys.settrace`) is used, that only traces the functions of the source code.
+
+    The lines that are executed while no test suite is running, like when importing the modules,
+    are only in the coverage of the whole test run. When test suites run in parallel, the lines
+    are recorded for all running test suites, because the code is shared by the process. Code that
+    runs in other processes is not measured.
+
+    .. code-block:: python
+
+        coverage = CodeCoverage(["/path/to/my_package"])
+        coverage.start()
+        coverage.suite_started("MyTestSuite")
+        my_package.do_something()
+        coverage.suite_finished("MyTestSuite", True, 0.1, False, [])
+        coverage.stop()
+        print(coverage.get_summary_text())
+    """
+
+    def __init__(self, source_paths):
+        self._source_paths = [os.path.abspath(x) for x in source_paths]
+        self._prefixes = tuple(x if os.path.isfile(x) else os.path.join(x, "")
+                               for x in self._source_paths)
+        self._in_scope = {}
+        self._run_lines = defaultdict(set)
+        self._test_suite_lines = {}
+        # The lines are added to the lines of the test run and of the running test suites
+        self._running_lines = [self._run_lines]
+        self._lock = threading.Lock()
+        self._use_monitoring = _MONITORING is not None
+        self._tool_id = None
+        self._previous_trace = None
+        self._is_started = False
+        self._executable_lines = None
+
+    ###########
+    # Private #
+    ###########
+
+    def _is_in_scope(self, filename):
+        in_scope = self._in_scope.get(filename)
+        if in_scope is None:
+            in_scope = os.path.abspath(filename).startswith(self._prefixes)
+            self._in_scope[filename] = in_scope
+        return in_scope
+
+    def _on_line(self, code, line):
+        # Called by sys.monitoring, the line is not reported again until the events are restarted
+        filename = code.co_filename
+        if self._is_in_scope(filename):
+            for lines in self._running_lines:
+                lines[filename].add(line)
+        return _MONITORING.DISABLE
+
+    def _trace_call(self, frame, event, _arg):
+        # The lines of functions outside the source code are not traced
+        if event == "call" and self._is_started and self._is_in_scope(frame.f_code.co_filename):
+            return self._trace_line
+        return None
+
+    def _trace_line(self, frame, event, _arg):
+        if event == "line":
+            filename = frame.f_code.co_filename
+            for lines in self._running_lines:
+                lines[filename].add(frame.f_lineno)
+        return self._trace_line
+
+    def _start_monitoring(self):
+        try:
+            _MONITORING.use_tool_id(_MONITORING.COVERAGE_ID, "lily_unit_test")
+        except ValueError:
+            # Another coverage tool is active, use the trace function
+            self._use_monitoring = False
+            return
+        self._tool_id = _MONITORING.COVERAGE_ID
+        _MONITORING.register_callback(self._tool_id, _MONITORING.events.LINE, self._on_line)
+        _MONITORING.set_events(self._tool_id, _MONITORING.events.LINE)
+
+    def _stop_monitoring(self):
+        _MONITORING.set_events(self._tool_id, 0)
+        _MONITORING.register_callback(self._tool_id, _MONITORING.events.LINE, None)
+        _MONITORING.free_tool_id(self._tool_id)
+        self._tool_id = None
+
+    def _find_source_files(self):
+        filenames = set()
+        for path in self._source_paths:
+            if os.path.isfile(path):
+                filenames.add(path)
+            for folder, _, folder_filenames in os.walk(path):
+                filenames.update(os.path.join(folder, x) for x in folder_filenames
+                                 if x.endswith(".py"))
+        return filenames
+
+    @staticmethod
+    def _get_executable_lines(filename):
+        try:
+            with open(filename, "rb") as fp:
+                code = compile(fp.read(), filename, "exec", dont_inherit=True)
+        except (OSError, SyntaxError, ValueError):
+            return set()
+        lines = set()
+        code_objects = [code]
+        while len(code_objects) > 0:
+            code = code_objects.pop()
+            lines.update(line for _, line in dis.findlinestarts(code)
+                         if line is not None and line > 0)
+            code_objects.extend(x for x in code.co_consts if isinstance(x, types.CodeType))
+        return lines
+
+    def _get_display_name(self, filename):
+        for path in self._source_paths:
+            if filename == path:
+                return os.path.basename(filename)
+            if filename.startswith(os.path.join(path, "")):
+                return os.path.relpath(filename, path)
+        return filename
+
+    ##########
+    # Events #
+    ##########
+
+    def run_started(self, test_suites_path, test_suites):
+        self.start()
+
+    def suite_started(self, test_suite):
+        with self._lock:
+            self._test_suite_lines[test_suite] = defaultdict(set)
+            self._running_lines = self._running_lines + [self._test_suite_lines[test_suite]]
+            if self._tool_id is not None:
+                # Report the lines again that are already executed by other test suites
+                _MONITORING.restart_events()
+
+    def suite_finished(self, test_suite, result, duration, skipped, log_messages):
+        with self._lock:
+            lines = self._test_suite_lines.get(test_suite)
+            self._running_lines = [x for x in self._running_lines if x is not lines]
+
+    def close(self):
+        self.stop()
+
+    ##########
+    # Public #
+    ##########
+
+    def start(self):
+        """
+        Start recording the executed lines.
+        """
+        if self._is_started:
+            return
+        self._is_started = True
+        if self._use_monitoring:
+            self._start_monitoring()
+        if not self._use_monitoring:
+            self._previous_trace = sys.gettrace()
+            threading.settrace(self._trace_call)
+            sys.settrace(self._trace_call)
+
+    def stop(self):
+        """
+        Stop recording the executed lines.
+        """
+        if not self._is_started:
+            return
+        self._is_started = False
+        if self._tool_id is not None:
+            self._stop_monitoring()
+        else:
+            threading.settrace(None)
+            sys.settrace(self._previous_trace)
+
+    def get_method(self):
+        """
+        :return: the method that is used for recording the lines: "sys.monitoring" or "settrace".
+        """
+        return "sys.monitoring" if self._use_monitoring else "settrace"
+
+    def get_test_suites(self):
+        """
+        :return: list with the names of the test suites that have coverage data.
+        """
+        return list(self._test_suite_lines)
+
+    def get_covered_lines(self, test_suite=None):
+        """
+        Get the executed lines of the source code.
+
+        :param test_suite: the name of the test suite, None for the whole test run.
+        :return: dictionary with the filenames and a sorted list with the executed lines.
+        """
+        lines = self._run_lines if test_suite is None else self._test_suite_lines[test_suite]
+        return {filename: sorted(lines[filename]) for filename in sorted(lines)}
+
+    def get_executable_lines(self):
+        """
+        Get the lines that have code, of all Python files in the source paths and the files with
+        executed lines. The files are compiled once, after recording is stopped.
+
+        :return: dictionary with the filenames and a sorted list with the lines that have code.
+        """
+        if self._executable_lines is None or self._is_started:
+            filenames = self._find_source_files().union(self._run_lines)
+            self._executable_lines = {filename: sorted(self._get_executable_lines(filename))
+                                      for filename in sorted(filenames)}
+        return self._executable_lines
+
+    def get_summary(self, test_suite=None):
+        """
+        Get the number of covered lines.
+
+        :param test_suite: the name of the test suite, None for the whole test run.
+        :return: dictionary with the number of lines with code, the number of covered lines, the
+            coverage in percent and the number of files.
+        """
+        executable_lines = self.get_executable_lines()
+        covered_lines = self.get_covered_lines(test_suite)
+        n_lines = sum(map(len, executable_lines.values()))
+        n_covered = sum(len(set(lines).intersection(covered_lines.get(filename, [])))
+                        for filename, lines in executable_lines.items())
+        return {"lines": n_lines, "covered": n_covered,
+                "coverage": 100 * n_covered / max(1, n_lines), "files": len(executable_lines)}
+
+    def get_summary_text(self, test_suite=None):
+        """
+        :param test_suite: the name of the test suite, None for the whole test run.
+        :return: the summary as a line of text for the log.
+        """
+        summary = self.get_summary(test_suite)
+        return (f"{summary['covered']} of {summary['lines']} lines covered "
+                f"({summary['coverage']:.1f}%) in {summary['files']} files, "
+                f"measured with {self.get_method()}")
+
+    def write(self, filename, time_stamp):
+        """
+        Write the coverage data to a JSON file, with the executable lines and covered lines of
+        each file for the whole test run and the covered lines of each test suite.
+
+        :param filename: the name of the file.
+        :param time_stamp: the time stamp of the test run.
+        """
+        executable_lines = self.get_executable_lines()
+        covered_lines = self.get_covered_lines()
+        os.makedirs(os.path.dirname(filename), exist_ok=True)
+        with open(filename, "w", encoding="utf-8") as fp:
+            json.dump({
+                "time_stamp": time_stamp,
+                "method": self.get_method(),
+                "source_paths": self._source_paths,
+                "summary": self.get_summary(),
+                "files": {x: {"executable": lines, "covered": covered_lines.get(x, [])}
+                          for x, lines in executable_lines.items()},
+                "test_suites": {x: self.get_covered_lines(x) for x in self.get_test_suites()}
+            }, fp, separators=(",", ":"))
+
+    def generate_html_report(self, time_stamp):
+        """
+        Generate an HTML report with the coverage of each file and each test suite.
+
+        :param time_stamp: the time stamp of the test run.
+        :return: the HTML report as string.
+        """
+        executable_lines = self.get_executable_lines()
+        covered_lines = self.get_covered_lines()
+        file_rows = ""
+        for filename, lines in executable_lines.items():
+            n_covered = len(set(lines).intersection(covered_lines.get(filename, [])))
+            file_rows += (f"<tr><td>{html.escape(self._get_display_name(filename))}</td>"
+                          f'<td class="number">{len(lines)}</td><td class="number">{n_covered}</td>'
+                          f'<td class="number">{100 * n_covered / max(1, len(lines)):.1f}%</td>'
+                          "</tr>\n")
+        test_suite_rows = ""
+        for test_suite in self.get_test_suites():
+            summary = self.get_summary(test_suite)
+            test_suite_rows += (f"<tr><td>{html.escape(test_suite)}</td>"
+                                f'<td class="number">{summary["covered"]}</td>'
+                                f'<td class="number">{summary["coverage"]:.1f}%</td></tr>\n')
+        template_filename = os.path.join(os.path.dirname(__file__), "artifacts",
+                                         "coverage_report_template.html")
+        with open(template_filename, "r", encoding="utf-8") as fp:
+            template = fp.read()
+        return Template(template).substitute({
+            "time_stamp": time_stamp,
+            "summary": html.escape(self.get_summary_text()),
+            "file_rows": file_rows,
+            "test_suite_rows": test_suite_rows
+        })
+
+    def write_html_report(self, filename, time_stamp):
+        """
+        Write the HTML report to a file.
+
+        :param filename: the name of the file.
+        :param time_stamp: the time stamp of the test run.
+        """
+        os.makedirs(os.path.dirname(filename), exist_ok=True)
+        with open(filename, "w", encoding="utf-8") as fp:
+            fp.write(self.generate_html_report(time_stamp))
+
+
+if __name__ == "__main__":
+
+    import time
+
+    from lily_unit_test import compare
+
+    _coverage = CodeCoverage([compare.__file__])
+    _coverage.start()
+    _coverage.suite_started("TestCompareText")
+    _start = time.perf_counter()
+    for _i in range(1000):
+        compare.compare("first line\nsecond line", "first line\nsecond lime")
+    _coverage.suite_finished("TestCompareText", True, 0, False, [])
+    _coverage.stop()
+    print(f"Compared 1000 times in {time.perf_counter() - _start:.3f} s")
+    print(_coverage.get_summary_text())
+    print(_coverage.get_summary_text("TestCompareText"))
@@ -0,0 +1,255 @@
+"""
+Comparison of large data with a summary of the differences, at a bounded cost.
+"""
+
+import difflib
+import itertools
+import re
+import reprlib
+
+from collections.abc import Mapping, Sequence
+
+from lily_unit_test.test_settings import TestSettings
+
+
+_SMALL_CHUNK = 64
+_MAX_CHUNK = 1024 * 1024
+_HUNK_HEADER = re.compile(r"^@@ -(\d+)(,\d+)? \+(\d+)(,\d+)? @@")
+
+_repr = reprlib.Repr()
+_repr.maxstring = 80
+_repr.maxother = 80
+_repr.maxlist = _repr.maxtuple = _repr.maxdict = _repr.maxset = 10
+
+
+def _find_mismatches(actual, expected, end, max_count):
+    # Compares chunks at C speed, only the chunks that differ are checked item by item
+    mismatches = []
+    i = 0
+    size = _SMALL_CHUNK
+    while i < end and len(mismatches) < max_count:
+        j = min(i + size, end)
+        if actual[i:j] == expected[i:j]:
+            i = j
+            size = min(size * 2, _MAX_CHUNK)
+        elif j - i <= _SMALL_CHUNK:
+            for k in range(i, j):
+                # Same as the comparison of lists: identical items are equal
+                if not (actual[k] is expected[k] or actual[k] == expected[k]):
+                    mismatches.append(k)
+                    if len(mismatches) == max_count:
+                        break
+            i = j
+        else:
+            size = max(_SMALL_CHUNK, (j - i) // 16)
+    return mismatches
+
+
+def _group_mismatches(mismatches, context):
+    # Mismatches that are close to each other are shown together
+    regions = []
+    for index in mismatches:
+        if len(regions) > 0 and index - regions[-1][1] <= 2 * context + 1:
+            regions[-1][1] = index
+        else:
+            regions.append([index, index])
+    return regions
+
+
+def _get_length_difference(actual, expected):
+    if len(actual) == len(expected):
+        return []
+    lines = [f"Length: actual {len(actual)}, expected {len(expected)}"]
+    shortest = min(len(actual), len(expected))
+    if len(actual) > len(expected):
+        lines.append(f"Actual has more items from index {shortest}: "
+                     f"{_repr.repr(actual[shortest:shortest + 10])}")
+    else:
+        lines.append(f"Actual misses items from index {shortest}: "
+                     f"{_repr.repr(expected[shortest:shortest + 10])}")
+    return lines
+
+
+def _compare_bytes(actual, expected, max_differences, context):
+    actual = memoryview(actual).cast("B")
+    expected = memoryview(expected).cast("B")
+    shortest = min(len(actual), len(expected))
+    lines = []
+    mismatches = _find_mismatches(actual, expected, shortest, max_differences)
+    for first, last in _group_mismatches(mismatches, context):
+        start = max(0, first - context)
+        end = min(shortest, last + context + 1)
+        lines.append(f"Offset 0x{first:X}: actual {actual[start:end].hex(' ')}, "
+                     f"expected {expected[start:end].hex(' ')} (from offset 0x{start:X})")
+    if len(actual) != len(expected):
+        lines.append(f"Length: actual {len(actual)}, expected {len(expected)}")
+    if len(mismatches) == max_differences:
+        lines.append(f"Only the first {max_differences} differences are shown")
+    return lines
+
+
+def _add_hunks(lines, diff, start, max_differences):
+    # Returns False when not all hunks are added
+    removed = {x[1:].rstrip("\r\n"): x[1:] for x in diff if x.startswith("-")}
+    added = {x[1:].rstrip("\r\n"): x[1:] for x in diff if x.startswith("+")}
+    # Lines that only differ in their line ending are shown with repr, to see the difference
+    endings = {text for text in removed.keys() & added.keys() if removed[text] != added[text]}
+    n_hunks = 0
+    for line in diff:
+        if line[:1] in ("-", "+") and line[1:].rstrip("\r\n") in endings:
+            line = f"{line[0]}{line[1:]!r}"
+        match = _HUNK_HEADER.match(line)
+        if match is not None:
+            n_hunks += 1
+            if n_hunks > max_differences:
+                lines.append(f"Only the first {max_differences} differences are shown")
+                return False
+            # The line numbers of the window are relative to its start
+            line = (f"@@ -{int(match[1]) + start}{match[2] or ''} "
+                    f"+{int(match[3]) + start}{match[4] or ''} @@")
+        lines.append(line.rstrip("\r\n"))
+    return True
+
+
+def _compare_text(actual, expected, max_differences, context):
+    if "\n" not in actual and "\n" not in expected:
+        return _compare_sequences(actual, expected, max_differences, context)
+    actual_lines = actual.splitlines(True)
+    expected_lines = expected.splitlines(True)
+    shortest = min(len(actual_lines), len(expected_lines))
+    mismatches = _find_mismatches(actual_lines, expected_lines, shortest, 1)
+    first = mismatches[0] if len(mismatches) > 0 else shortest
+    # Only a window of lines from the first difference is compared, to bound the cost of difflib
+    start = max(0, first - context)
+    end = first + TestSettings.COMPARE_TEXT_WINDOW
+    diff = difflib.unified_diff(actual_lines[start:end], expected_lines[start:end], "actual",
+                                "expected", n=context)
+    lines = [f"First difference at line {first + 1}"]
+    if _add_hunks(lines, list(diff)[2:], start, max_differences) and end < max(
+            len(actual_lines), len(expected_lines)):
+        lines.append(f"Only the {TestSettings.COMPARE_TEXT_WINDOW} lines from the first "
+                     f"difference are compared")
+    return lines
+
+
+def _compare_sequences(actual, expected, max_differences, context):
+    shortest = min(len(actual), len(expected))
+    lines = []
+    mismatches = _find_mismatches(actual, expected, shortest, max_differences)
+    if isinstance(actual, str) and isinstance(expected, str):
+        for first, last in _group_mismatches(mismatches, context):
+            start = max(0, first - context)
+            end = min(shortest, last + context + 1)
+            lines.append(f"Index {first}: actual {actual[start:end]!r}, "
+                         f"expected {expected[start:end]!r} (from index {start})")
+    else:
+        for index in mismatches:
+            lines.append(f"Index {index}: actual {_repr.repr(actual[index])}, "
+                         f"expected {_repr.repr(expected[index])}")
+    lines.extend(_get_length_difference(actual, expected))
+    if len(mismatches) == max_differences:
+        lines.append(f"Only the first {max_differences} differences are shown")
+    return lines
+
+
+def _get_type_name(value):
+    if isinstance(value, memoryview):
+        return f"memoryview with format {value.format!r}"
+    return type(value).__name__
+
+
+def _compare_mappings(actual, expected, max_differences, _context):
+    lines = []
+    missing = expected.keys() - actual.keys()
+    extra = actual.keys() - expected.keys()
+    for name, keys in (("Missing", missing), ("Extra", extra)):
+        if len(keys) > 0:
+            shown = sorted(itertools.islice(keys, max_differences), key=repr)
+            lines.append(f"{name} keys ({len(keys)}): {', '.join(map(_repr.repr, shown))}"
+                         f"{', ...' if len(keys) > len(shown) else ''}")
+    n_differences = 0
+    for key in actual:
+        if key in expected and not (actual[key] is expected[key] or actual[key] == expected[key]):
+            lines.append(f"Key {_repr.repr(key)}: actual {_repr.repr(actual[key])}, "
+                         f"expected {_repr.repr(expected[key])}")
+            n_differences += 1
+            if n_differences == max_differences:
+                lines.append(f"Only the first {max_differences} differences are shown")
+                break
+    return lines
+
+
+def compare(actual, expected, max_differences=TestSettings.COMPARE_MAX_DIFFERENCES,
+            context=TestSettings.COMPARE_CONTEXT):
+    """
+    Compare two values. When the values are equal, this costs the same as :code:`==`.
+    When they differ, only the first differences are searched, so the cost is bounded for
+    large data.
+
+    :param actual: the actual value.
+    :param expected: the expected value.
+    :param max_differences: maximum number of differences in the summary.
+    :param context: number of items, bytes or lines around a difference in the summary.
+    :return: None if the values are equal, else a text with a summary of the differences.
+
+    Bytes are shown as hexadecimal values with offsets, text with multiple lines as a unified
+    diff of the lines after the first difference, sequences by index and mappings by key.
+    When the items are equal, the types of the values are shown. Lines that only differ in their
+    line ending are shown with :code:`repr()` in the diff.
+    """
+    if actual == expected:
+        return None
+    if isinstance(actual, (bytes, bytearray, memoryview)) and isinstance(
+            expected, (bytes, bytearray, memoryview)):
+        lines = _compare_bytes(actual, expected, max_differences, context)
+    elif isinstance(actual, str) and isinstance(expected, str):
+        lines = _compare_text(actual, expected, max_differences, context)
+    elif isinstance(actual, Sequence) and isinstance(expected, Sequence):
+        lines = _compare_sequences(actual, expected, max_differences, context)
+    elif isinstance(actual, Mapping) and isinstance(expected, Mapping):
+        lines = _compare_mappings(actual, expected, max_differences, context)
+    else:
+        lines = [f"Actual {_repr.repr(actual)}, expected {_repr.repr(expected)}"]
+    if len(lines) == 0:
+        # No differences in the items, the values differ in type only
+        lines.append(f"Type: actual {_get_type_name(actual)}, "
+                     f"expected {_get_type_name(expected)}")
+    return "\n".join(["Values are not equal:"] + lines)
+
+
+if __name__ == "__main__":
+
+    import os
+    import time
+
+    data = os.urandom(10 * 1024 * 1024)
+    other = bytearray(data)
+
+    def _measure(function):
+        start = time.perf_counter()
+        result = function()
+        return result, 1000 * (time.perf_counter() - start)
+
+    _, duration = _measure(lambda: data == other)
+    print(f"== on 10 MB equal bytes         : {duration:.2f} ms")
+    _, duration = _measure(lambda: compare(data, other))
+    print(f"compare on 10 MB equal bytes    : {duration:.2f} ms")
+    for offset in (100, 5 * 1024 * 1024, 5 * 1024 * 1024 + 3, len(other) - 1):
+        other[offset] ^= 0xFF
+    summary, duration = _measure(lambda: compare(data, other))
+    print(f"compare on 10 MB different bytes: {duration:.2f} ms")
+    print(summary)
+
+    numbers = list(range(1000000))
+    changed = list(numbers)
+    changed[500000] = -1
+    summary, duration = _measure(lambda: compare(changed, numbers))
+    print(f"compare on 1M items list        : {duration:.2f} ms")
+    print(summary)
+
+    text = "".join(f"line {i}\n" for i in range(100000))
+    summary, duration = _measure(lambda: compare(text.replace("line 50000\n", "line 5000O\n"),
+                                                 text))
+    print(f"compare on 100000 lines text    : {duration:.2f} ms")
+    print(summary)
+    print(compare({"a": 1, "b": [1, 2], "c": 3}, {"a": 1, "b": [1, 3], "d": 4}))
@@ -0,0 +1,223 @@
+"""
+Live stream with the events of a test run.
+"""
+
+import json
+import os
+import queue
+import socket
+import threading
+import time
+import uuid
+
+from lily_unit_test.plugins import Plugin
+from lily_unit_test.test_settings import TestSettings
+
+
+class EventStream(Plugin):  # pylint: disable=too-many-instance-attributes
+    """
+    Plugin that publishes the events of a test run as JSON lines, for example for a live dashboard.
+
+    :param target: where the events are written to:
+
+        | :code:`"<filename>"`: the events are appended to a file.
+        | :code:`"fifo:<path>"`: the events are written to a named pipe, the pipe is created
+          if it does not exist. Events are dropped while no consumer has the pipe opened.
+        | :code:`"unix:<path>"`: the events are sent to a Unix domain socket, the consumer
+          listens on the socket. Events are dropped while no consumer is listening.
+
+    :param queue_size: the maximum number of events waiting to be written.
+
+    The events are written in a background thread. Publishing an event never waits for the
+    consumer. If the consumer is too slow and the queue is full, the event is dropped.
+    Each event has the ID of the test run and a sequence number, so a consumer can detect dropped
+    events. The sequence number starts at 0 in each test run. Test runs append their events to the
+    same file, so a consumer resumes reading after the last run ID and sequence number it received.
+    Each line looks like this:
+
+    .. code-block:: json
+
+        {"run": "5f0c4d1e9a2b4c7e8d3f6a1b2c3d4e5f", "seq": 12, "time": 1700000000.123,
+         "event": "case_finished", "test_suite": "MyTestSuite",
+         "test_case": "MyTestSuite.test_something", "result": true, "duration": 0.012}
+
+    The events are:
+
+    ================ ===========================================================================
+    Event            Data
+    ================ ===========================================================================
+    | run_started    | test_suites_path, test_suites (list with names)
+    | suite_started  | test_suite
+    | case_started   | test_suite, test_case
+    | log            | test_suite, type, message (the log message as written in the log file)
+    | case_finished  | test_suite, test_case, result, duration
+    | suite_finished | test_suite, result, duration, skipped
+    | run_finished   | result
+    | stream_closed  | dropped (number of events that were not delivered)
+    ================ ===========================================================================
+    """
+
+    FIFO_PREFIX = "fifo:"
+    UNIX_PREFIX = "unix:"
+    RETRY_INTERVAL = 1.0
+
+    def __init__(self, target, queue_size=TestSettings.EVENT_STREAM_QUEUE_SIZE):
+        if target.startswith(self.FIFO_PREFIX):
+            assert hasattr(os, "mkfifo"), "Named pipes are not supported on this platform"
+        if target.startswith(self.UNIX_PREFIX):
+            assert hasattr(socket, "AF_UNIX"), "Unix sockets are not supported on this platform"
+        self._target = target
+        self._run_id = uuid.uuid4().hex
+        self._queue = queue.Queue(queue_size)
+        self._lock = threading.Lock()
+        self._sequence = 0
+        self._n_dropped = 0
+        self._stream = None
+        self._retry_time = 0
+        self._thread = threading.Thread(target=self._process_queue, daemon=True)
+        self._thread.start()
+
+    def _open(self):
+        if self._target.startswith(self.UNIX_PREFIX):
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)  # pylint: disable=no-member
+            try:
+                sock.connect(self._target[len(self.UNIX_PREFIX):])
+                return sock.makefile("w", encoding="utf-8")
+            finally:
+                # The socket is closed when the file object is closed
+                sock.close()
+        if self._target.startswith(self.FIFO_PREFIX):
+            path = self._target[len(self.FIFO_PREFIX):]
+            if not os.path.exists(path):
+                os.mkfifo(path)  # pylint: disable=no-member
+            # Opening without a consumer fails immediately, instead of waiting for a consumer
+            fd = os.open(path, os.O_WRONLY | os.O_NONBLOCK)  # pylint: disable=no-member
+            os.set_blocking(fd, True)
+            return os.fdopen(fd, "w", encoding="utf-8")
+        folder = os.path.dirname(self._target)
+        if folder != "":
+            os.makedirs(folder, exist_ok=True)
+        return open(self._target, "a", encoding="utf-8")  # pylint: disable=consider-using-with
+
+    def _close_stream(self):
+        if self._stream is not None:
+            try:
+                self._stream.close()
+            except OSError:
+                pass
+            self._stream = None
+
+    def _drop(self):
+        with self._lock:
+            self._n_dropped += 1
+
+    def _write(self, sequence, time_stamp, event, data):
+        if self._stream is None and time.monotonic() >= self._retry_time:
+            try:
+                self._stream = self._open()
+            except OSError:
+                self._retry_time = time.monotonic() + self.RETRY_INTERVAL
+        if self._stream is None:
+            self._drop()
+            return
+        line = json.dumps({"run": self._run_id, "seq": sequence, "time": time_stamp,
+                           "event": event, **data}, default=str)
+        try:
+            self._stream.write(f"{line}\n")
+            self._stream.flush()
+        except OSError:
+            # The consumer is gone, try again later
+            self._close_stream()
+            self._retry_time = time.monotonic() + self.RETRY_INTERVAL
+            self._drop()
+
+    def _process_queue(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            self._write(*item)
+        self._close_stream()
+
+    def publish(self, event, **data):
+        """
+        Publish an event. This never blocks, if the queue is full the event is dropped.
+
+        :param event: the name of the event.
+        :param data: the data of the event, the values must be serializable to JSON.
+        """
+        with self._lock:
+            try:
+                self._queue.put_nowait((self._sequence, time.time(), event, data))
+            except queue.Full:
+                self._n_dropped += 1
+            self._sequence += 1
+
+    def run_started(self, test_suites_path, test_suites):
+        self.publish("run_started", test_suites_path=test_suites_path, test_suites=test_suites)
+
+    def suite_started(self, test_suite):
+        self.publish("suite_started", test_suite=test_suite)
+
+    def case_started(self, test_suite, test_case):
+        self.publish("case_started", test_suite=test_suite, test_case=test_case)
+
+    def log_message(self, test_suite, message_type, message):
+        self.publish("log", test_suite=test_suite, type=message_type, message=message)
+
+    def case_finished(self, test_suite, test_case, result, duration):
+        self.publish("case_finished", test_suite=test_suite, test_case=test_case, result=result,
+                     duration=duration)
+
+    def suite_finished(self, test_suite, result, duration, skipped, log_messages):
+        self.publish("suite_finished", test_suite=test_suite, result=result, duration=duration,
+                     skipped=skipped)
+
+    def run_finished(self, result, report_data):
+        self.publish("run_finished", result=result)
+
+    def get_run_id(self):
+        """
+        :return: the ID of the test run in the events, unique for each event stream object.
+        """
+        return self._run_id
+
+    def get_dropped(self):
+        """
+        :return: the number of events that were dropped or could not be delivered.
+        """
+        with self._lock:
+            return self._n_dropped
+
+    def close(self, timeout=TestSettings.EVENT_STREAM_CLOSE_TIMEOUT):
+        """
+        Publish the stream closed event and wait until all events are written.
+
+        :param timeout: maximum time in seconds to wait for the consumer.
+        """
+        if not self._thread.is_alive():
+            return
+        end_time = time.monotonic() + timeout
+        with self._lock:
+            item = (self._sequence, time.time(), "stream_closed", {"dropped": self._n_dropped})
+            self._sequence += 1
+        try:
+            self._queue.put(item, timeout=timeout)
+            self._queue.put(None, timeout=max(0, end_time - time.monotonic()))
+        except queue.Full:
+            return
+        self._thread.join(max(0, end_time - time.monotonic()))
+
+
+if __name__ == "__main__":
+
+    import tempfile
+
+    with tempfile.TemporaryDirectory() as temp_folder:
+        filename = os.path.join(temp_folder, "events.jsonl")
+        stream = EventStream(filename)
+        stream.run_started(temp_folder, [])
+        stream.run_finished(True, {})
+        stream.close()
+        with open(filename, "r", encoding="utf-8") as fp_in:
+            print(fp_in.read())
@@ -0,0 +1,163 @@
+"""
+Captures the output on the file descriptors of stdout and stderr, like from C extensions and
+subprocesses.
+"""
+
+import codecs
+import ctypes
+import os
+import sys
+import threading
+
+from lily_unit_test.logger import Logger
+from lily_unit_test.test_settings import TestSettings
+
+
+class FdCapture:
+    """
+    Captures everything that is written to file descriptors 1 (stdout) and 2 (stderr) to a logger.
+    The logger only redirects the Python :code:`sys.stdout` and :code:`sys.stderr`. Output of C
+    extensions and subprocesses is written directly to the file descriptors and is only logged
+    while the file descriptors are captured.
+
+    :param logger: the logger that gets the output as stdout and stderr messages.
+
+    The file descriptors are redirected to pipes. For each pipe a thread reads all available
+    output at once and passes it to the logger in one call, so writing many lines does not wait
+    for the logger for each line. Log messages that the loggers write to the console go to the
+    original stdout.
+
+    Only one capture can be active at the same time, because the file descriptors are shared by
+    all threads of the process. To capture the output of test suites that run in parallel, use
+    the :code:`process_isolation` option of the test runner.
+
+    .. code-block:: python
+
+        capture = FdCapture(self.log)
+        capture.start()
+        subprocess.run(["flash_tool", "--verify", "firmware.hex"])
+        capture.stop()
+    """
+
+    _active = None
+    _active_lock = threading.Lock()
+
+    def __init__(self, logger):
+        self._logger = logger
+        self._saved_fds = {}
+        self._threads = []
+
+    ###########
+    # Private #
+    ###########
+
+    @staticmethod
+    def _flush_streams():
+        # pylint: disable=protected-access
+        # Output that is buffered by Python or the C library, goes to where it was written to
+        for stream in (sys.__stdout__, sys.__stderr__):
+            if stream is not None:
+                stream.flush()
+        if Logger._console is not None:
+            Logger._console.flush()
+        try:
+            ctypes.CDLL(None).fflush(None)
+        except (OSError, TypeError, AttributeError):
+            # No C library to flush, for example on Windows
+            pass
+
+    def _read_pipe(self, fd, message_type):
+        decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        # Only complete lines go to the logger, so stdout and stderr are not mixed in one line
+        incomplete_line = ""
+        while True:
+            # Returns all output that is available, up to the buffer size
+            data = os.read(fd, TestSettings.FD_CAPTURE_BUFFER_SIZE)
+            text = incomplete_line + decoder.decode(data, len(data) == 0)
+            if len(data) == 0:
+                break
+            index = text.rfind("\n") + 1
+            if index > 0:
+                self._logger.handle_message(message_type, text[:index])
+            incomplete_line = text[index:]
+        os.close(fd)
+        if text != "":
+            self._logger.handle_message(message_type, f"{text}\n")
+
+    ##########
+    # Public #
+    ##########
+
+    def start(self):
+        # pylint: disable=protected-access
+        """
+        Start capturing the output on the file descriptors. If starting fails, for example
+        because there are no free file descriptors, the file descriptors are restored.
+        """
+        with self._active_lock:
+            assert FdCapture._active is None, "The file descriptors are already captured"
+            FdCapture._active = self
+        try:
+            self._flush_streams()
+            # The console is only reachable by a copy of the original stdout
+            Logger._console = os.fdopen(os.dup(1), "w", encoding="utf-8", errors="replace",
+                                        buffering=1)
+            for fd, message_type in ((1, Logger.TYPE_STDOUT), (2, Logger.TYPE_STDERR)):
+                self._saved_fds[fd] = os.dup(fd)
+                read_fd, write_fd = os.pipe()
+                # The thread ends when the writing end is closed, also when dup2 fails
+                thread = threading.Thread(target=self._read_pipe, args=(read_fd, message_type),
+                                          daemon=True)
+                thread.start()
+                self._threads.append(thread)
+                try:
+                    os.dup2(write_fd, fd)
+                finally:
+                    os.close(write_fd)
+        except BaseException:
+            self.stop()
+            raise
+
+    def stop(self):
+        # pylint: disable=protected-access
+        """
+        Stop capturing and restore the file descriptors. The output that is written before
+        stopping is logged. Subprocesses that are still running, keep writing to the pipes until
+        they end. Then their output is not logged.
+        """
+        if FdCapture._active is not self:
+            return
+        self._flush_streams()
+        for fd, saved_fd in self._saved_fds.items():
+            # Closes the writing end of the pipe, the thread reads the rest of the output
+            os.dup2(saved_fd, fd)
+            os.close(saved_fd)
+        for thread in self._threads:
+            thread.join(TestSettings.FD_CAPTURE_STOP_TIMEOUT)
+        self._saved_fds = {}
+        self._threads = []
+        if Logger._console is not None:
+            Logger._console.close()
+            Logger._console = None
+        with self._active_lock:
+            FdCapture._active = None
+
+
+if __name__ == "__main__":
+
+    import subprocess
+    import time
+
+    _logger = Logger(False, False)
+    _capture = FdCapture(_logger)
+    _capture.start()
+    _start = time.perf_counter()
+    os.write(1, b"Written to file descriptor 1\n")
+    os.write(2, b"Written to file descriptor 2\n")
+    subprocess.run([sys.executable, "-c", "for i in range(100000): print(f'Line {i}')"],
+                   check=True)
+    _capture.stop()
+    print(f"{len(_logger.get_log_messages())} lines captured in "
+          f"{time.perf_counter() - _start:.2f} s")
+    for _message in _logger.get_log_messages()[:3] + _logger.get_log_messages()[-1:]:
+        print(_message)
@@ -2,7 +2,11 @@
 Generate HTML report.
 """
 
+import base64
+import gzip
 import html
+import json
+import math
 import os
 
 from datetime import datetime
@@ -10,7 +14,7 @@ from string import Template
 from lily_unit_test.logger import Logger
 
 
-def generate_html_report(report_data):
+def _get_test_run_values(report_data):
     time_format = Logger.TIME_STAMP_FORMAT.split(".", maxsplit=1)[0]
 
     template_values = {
@@ -37,41 +41,116 @@ def generate_html_report(report_data):
 
             # Last message for end time and result
             template_values["end_date"] = report_data[key][-1].split("|")[0].split(".")[0]
-            if "PASSED" in report_data[key][-1]:
-                template_values["result"] = "PASSED"
-            else:
-                template_values["result"] = "FAILED"
-
-        else:
-            # Test suite results
-            template_values["test_suites_results"] += _generate_test_suite_results(key,
-                                                                                   report_data[key])
+            template_values["result"] = Logger.get_result(report_data[key][-1])
 
     start = datetime.strptime(template_values["start_date"], time_format)
     end = datetime.strptime(template_values["end_date"], time_format)
     template_values["duration"] = end - start
+    template_values["result_class"] = template_values["result"].lower()
+
+    return template_values
 
-    template_filename = os.path.join(os.path.dirname(__file__), "artifacts",
-                                     "html_report_template.html")
+
+def _fill_template(template_name, template_values):
+    template_filename = os.path.join(os.path.dirname(__file__), "artifacts", template_name)
     with open(template_filename, "r", encoding="utf-8") as fp:
         template = fp.read()
 
-    template_values["result_class"] = template_values["result"].lower()
+    return Template(template).substitute(template_values)
+
+
+def generate_html_report(report_data, test_suite_info=None, measurements=None, attachments=None):
+    template_values = _get_test_run_values(report_data)
+    for key in report_data.keys():
+        if "1_TestRunner" not in key:
+            # Test suite results
+            template_values["test_suites_results"] += _generate_test_suite_results(
+                key, report_data[key], _generate_test_suite_info(key, test_suite_info),
+                _generate_measurements_table(key, measurements) +
+                _generate_attachments_table(key, attachments))
+
+    return _fill_template("html_report_template.html", template_values)
+
+
+def generate_lazy_html_report(report_data, test_suite_info=None, measurements=None,
+                              attachments=None):
+    """
+    Generate an HTML report for large logs. The log messages of each test suite are embedded as
+    a compressed JSON chunk. The browser decodes a chunk when the test suite is expanded and
+    only creates elements for the log messages that are visible.
+    """
+    template_values = _get_test_run_values(report_data)
+    for key in report_data.keys():
+        if "1_TestRunner" not in key:
+            template_values["test_suites_results"] += _generate_lazy_test_suite_results(
+                key, report_data[key], _generate_test_suite_info(key, test_suite_info),
+                _generate_measurements_table(key, measurements) +
+                _generate_attachments_table(key, attachments))
+
+    return _fill_template("html_report_lazy_template.html", template_values)
+
+
+def _generate_sparkline(values, width=120, height=16):
+    # Small line chart of values between 0 and the maximum, or 1 if all values are lower
+    if len(values) < 2:
+        return ""
+    maximum = max(1, *values)
+    points = " ".join(f"{width * i / (len(values) - 1):.1f},"
+                      f"{height - height * value / maximum:.1f}"
+                      for i, value in enumerate(values))
+    return (f' <svg class="sparkline" width="{width}" height="{height}">'
+            f'<polyline points="{points}" fill="none" stroke="currentColor"/></svg>')
 
-    output = Template(template).substitute(template_values)
+
+def _generate_test_suite_info(test_suite_key, test_suite_info):
+    # Extra information in the header of the test suite: text and an optional sparkline
+    if test_suite_info is None or test_suite_key not in test_suite_info:
+        return ""
+    text, values = test_suite_info[test_suite_key]
+    return f" - {html.escape(text)}{_generate_sparkline(values)}"
+
+
+def _generate_measurements_table(test_suite_key, measurements):
+    # Table with the summary of each measurement of the test suite
+    if measurements is None or test_suite_key not in measurements:
+        return ""
+    output = '<table class="measurements"><tr><th>Measurement</th><th>Unit</th><th>Count</th>'
+    output += "<th>Failed</th><th>Min</th><th>Mean</th><th>Max</th><th>Low</th><th>High</th></tr>\n"
+    for item in measurements[test_suite_key]:
+        limits = ["" if math.isnan(item[x]) else f"{item[x]:g}" for x in ("low", "high")]
+        output += f'<tr class="{"failed" if item["failed"] > 0 else "passed"}">'
+        output += f"<td>{html.escape(item['name'])}</td><td>{html.escape(item['unit'])}</td>"
+        output += f"<td>{item['count']}</td><td>{item['failed']}</td><td>{item['min']:g}</td>"
+        output += f"<td>{item['mean']:g}</td><td>{item['max']:g}</td>"
+        output += f"<td>{limits[0]}</td><td>{limits[1]}</td></tr>\n"
+    output += "</table>\n"
     return output
 
 
-def _generate_test_suite_results(test_suite_key, log_messages):
+def _generate_attachments_table(test_suite_key, attachments):
+    # Table with the attachments of the test suite, with links relative to the report folder.
+    # The attachments are the records of the test suite, not the log messages, so output that
+    # looks like an attachment is not linked.
+    if attachments is None or len(attachments.get(test_suite_key, [])) == 0:
+        return ""
+    output = '<table class="attachments"><tr><th>Test case</th><th>Attachment</th><th>Size</th>'
+    output += "</tr>\n"
+    for item in attachments[test_suite_key]:
+        name = html.escape(item["name"])
+        output += f"<tr><td>{html.escape(item['test_case'] or '')}</td>"
+        output += f'<td><a href="{html.escape(item["path"])}" download="{name}">{name}</a></td>'
+        output += f"<td>{item['size']:,} bytes</td></tr>\n"
+    output += "</table>\n"
+    return output
+
+
+def _generate_test_suite_header(test_suite_key, log_messages, extra_info=""):
     time_format = Logger.TIME_STAMP_FORMAT.split(".", maxsplit=1)[0]
 
     test_name = test_suite_key.split("_")[-1]
     test_start = log_messages[0].split("|")[0].split(".")[0]
     test_end = log_messages[-1].split("|")[0].split(".")[0]
-    if "PASSED" in log_messages[-1]:
-        test_result = "PASSED"
-    else:
-        test_result = "FAILED"
+    test_result = Logger.get_result(log_messages[-1])
 
     start = datetime.strptime(test_start, time_format)
     end = datetime.strptime(test_end, time_format)
@@ -81,7 +160,14 @@ def _generate_test_suite_results(test_suite_key, log_messages):
     output += '<span class="expand" title="Show/hide log messages" '
     output += f'id="button_{test_suite_key}" '
     output += f'onclick="show_log(\'{test_suite_key}\')">&plus;</span> '
-    output += f"{test_name}: {test_result} ({duration})</div>\n"
+    output += f"{test_name}: {test_result} ({duration}){extra_info}</div>\n"
+    return output
+
+
+def _generate_test_suite_results(test_suite_key, log_messages, extra_info="",
+                                 measurements_table=""):
+    output = _generate_test_suite_header(test_suite_key, log_messages, extra_info)
+    output += measurements_table
     output += f'<div class="log-messages" style="display:none" id="log_{test_suite_key}">\n'
     for log_message in log_messages:
         level = "debug"
@@ -98,6 +184,22 @@ def _generate_test_suite_results(test_suite_key, log_messages):
     return output.strip()
 
 
+def _generate_lazy_test_suite_results(test_suite_key, log_messages, extra_info="",
+                                      measurements_table=""):
+    output = _generate_test_suite_header(test_suite_key, log_messages,
+                                         f" - {len(log_messages)} log messages{extra_info}")
+    output += measurements_table
+    output += f'<div class="log-messages" style="display:none" id="log_{test_suite_key}"></div>\n'
+    # Base64 only contains characters that are safe in HTML, the data is not parsed on loading
+    data = gzip.compress(json.dumps(log_messages, separators=(",", ":")).encode("utf-8"),
+                         compresslevel=6)
+    output += f'<script type="application/octet-stream" id="data_{test_suite_key}">'
+    output += base64.b64encode(data).decode("ascii")
+    output += "</script>\n"
+
+    return output.strip()
+
+
 if __name__ == "__main__":
 
     import time
@@ -123,6 +225,8 @@ if __name__ == "__main__":
                       'These must be escaped properly.')
     test_logger.handle_message(test_logger.TYPE_STDOUT, "This is a stdout message\n")
     test_logger.handle_message(test_logger.TYPE_STDERR, "This is a stderr message\n")
+    test_logger.info('Attachment "scope_capture.png": attachments/9f/'
+                     '9f86d081884c7d659a2feaa0c55ad015a3bf4f1b2b0b822cd15d6c15b0f00a08 (4 bytes)')
     test_logger.info("Test case TestCreateHtmlReport.test_01_log_message_types: PASSED")
     time.sleep(1.2)
     test_logger.info("Test suite TestPublishHtmlReport: 1 of 1 test cases passed (100.0%)")
@@ -153,5 +257,23 @@ if __name__ == "__main__":
     tr_logger.shutdown()
     dummy_report_data["1_TestRunner"] = tr_logger.get_log_messages()
 
+    dummy_test_suite_info = {
+        "2_TestCreateHtmlReport": ("CPU 1.10 s (92% of 1.20 s)", [0.8, 1.0, 0.9, 1.0, 0.4])
+    }
+    dummy_measurements = {
+        "2_TestCreateHtmlReport": [{"name": "Output voltage", "unit": "V", "count": 1000,
+                                    "failed": 2, "min": 4.87, "mean": 5.01, "max": 5.08,
+                                    "low": 4.9, "high": 5.1}]
+    }
+    dummy_attachments = {
+        "2_TestCreateHtmlReport": [{"test_case": "TestCreateHtmlReport.test_01_log_message_types",
+                                    "name": "scope_capture.png", "size": 4,
+                                    "path": "attachments/9f/9f86d081884c7d659a2feaa0c55ad015"
+                                            "a3bf4f1b2b0b822cd15d6c15b0f00a08"}]
+    }
     with open("test_report.html", "w", encoding="utf-8") as fp_out:
-        fp_out.write(generate_html_report(dummy_report_data))
+        fp_out.write(generate_html_report(dummy_report_data, dummy_test_suite_info,
+                                          dummy_measurements, dummy_attachments))
+
+    with open("test_report_lazy.html", "w", encoding="utf-8") as fp_out:
+        fp_out.write(generate_lazy_html_report(dummy_report_data))
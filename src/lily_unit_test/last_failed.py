@@ -0,0 +1,56 @@
+"""
+The failed test suites and test cases of the previous test runs, to run them again.
+"""
+
+import json
+import os
+
+from lily_unit_test.test_settings import TestSettings
+
+
+def read_last_failed(report_folder):
+    """
+    Read the failed test suites and test cases of the previous test runs.
+
+    :param report_folder: the report folder of the test runs.
+    :return: dictionary with the failed test suite names and lists with their failed test case
+        names.
+    """
+    filename = os.path.join(report_folder, TestSettings.LAST_FAILED_FILENAME)
+    if not os.path.isfile(filename):
+        return {}
+    with open(filename, "r", encoding="utf-8") as fp:
+        return json.load(fp)["test_suites"]
+
+
+def write_last_failed(report_folder, results, time_stamp):
+    """
+    Write the failed test suites and test cases. Test suites that did not run in this test run
+    keep their failures from earlier test runs.
+
+    :param report_folder: the report folder of the test runs.
+    :param results: dictionary with the names of the test suites that ran and None if the test
+        suite passed, else a list with the names of the failed test cases.
+    :param time_stamp: the time stamp of the test run.
+    """
+    last_failed = read_last_failed(report_folder)
+    for test_suite, failed_test_cases in results.items():
+        last_failed.pop(test_suite, None)
+        if failed_test_cases is not None:
+            last_failed[test_suite] = list(failed_test_cases)
+    os.makedirs(report_folder, exist_ok=True)
+    with open(os.path.join(report_folder, TestSettings.LAST_FAILED_FILENAME), "w",
+              encoding="utf-8") as fp:
+        json.dump({"time_stamp": time_stamp, "test_suites": last_failed}, fp, indent=2)
+
+
+if __name__ == "__main__":
+
+    import tempfile
+
+    with tempfile.TemporaryDirectory() as temp_folder:
+        write_last_failed(temp_folder, {"TestPower": ["TestPower.test_ripple"], "TestBoot": None},
+                          "20240101_120000")
+        write_last_failed(temp_folder, {"TestBoot": ["TestBoot.test_timeout"]}, "20240101_130000")
+        # The failures of TestPower are kept, because it did not run in the last test run
+        print(read_last_failed(temp_folder))
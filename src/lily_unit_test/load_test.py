@@ -0,0 +1,359 @@
+"""
+Load tests: run a test method concurrently and measure the throughput and latency.
+"""
+
+import asyncio
+import inspect
+import itertools
+import math
+import multiprocessing
+import threading
+import time
+
+from array import array
+
+
+class LatencyHistogram:
+    """
+    Histogram of latencies with a fixed relative precision, like an HDR histogram. Values are
+    counted in buckets instead of stored, so the memory does not grow with the number of values.
+
+    :param significant_digits: the number of significant decimal digits of the values.
+
+    The buckets are linear up to a power of two and then double in width, so each value is
+    counted with the given relative precision (0.1% for 3 digits), from nanoseconds to hours.
+    Histograms of different threads or processes are combined with :code:`merge()`.
+    """
+
+    def __init__(self, significant_digits=3):
+        # Smallest power of two that has the precision, half of the buckets are for each doubling
+        self._bits = math.ceil(math.log2(2 * 10 ** significant_digits))
+        self._half_count = 1 << (self._bits - 1)
+        self._counts = array("Q")
+        self._count = 0
+        self._total = 0
+        self._min = 0
+        self._max = 0
+
+    ###########
+    # Private #
+    ###########
+
+    def _get_index(self, value):
+        shift = max(0, value.bit_length() - self._bits)
+        return shift * self._half_count + (value >> shift)
+
+    def _get_highest_value(self, index):
+        # The highest value that is counted in the bucket
+        if index < 2 * self._half_count:
+            return index
+        shift = index // self._half_count - 1
+        return ((index - shift * self._half_count + 1) << shift) - 1
+
+    ##########
+    # Public #
+    ##########
+
+    def add(self, nanoseconds):
+        """
+        Count a latency.
+
+        :param nanoseconds: the latency in nanoseconds, as integer.
+        """
+        index = self._get_index(nanoseconds)
+        if index >= len(self._counts):
+            self._counts.extend(itertools.repeat(0, index + 1 - len(self._counts)))
+        self._counts[index] += 1
+        if self._count == 0 or nanoseconds < self._min:
+            self._min = nanoseconds
+        self._max = max(self._max, nanoseconds)
+        self._count += 1
+        self._total += nanoseconds
+
+    def merge(self, other):
+        # pylint: disable=protected-access
+        """
+        Add the counts of another histogram with the same number of significant digits.
+
+        :param other: the other LatencyHistogram object.
+        """
+        assert other._bits == self._bits, "The histograms have a different precision"
+        if len(other._counts) > len(self._counts):
+            self._counts.extend(itertools.repeat(0, len(other._counts) - len(self._counts)))
+        for index, count in enumerate(other._counts):
+            self._counts[index] += count
+        if other._count > 0:
+            self._min = other._min if self._count == 0 else min(self._min, other._min)
+            self._max = max(self._max, other._max)
+        self._count += other._count
+        self._total += other._total
+
+    def get_count(self):
+        """
+        :return: the number of latencies.
+        """
+        return self._count
+
+    def get_percentile(self, percentile):
+        """
+        :param percentile: the percentile, e.g. 99.9.
+        :return: the latency in seconds that this percentage of the latencies does not exceed,
+            0.0 if there are no latencies.
+        """
+        if self._count == 0:
+            return 0.0
+        rank = max(1, math.ceil(percentile / 100 * self._count))
+        n_values = 0
+        for index, count in enumerate(self._counts):
+            n_values += count
+            if n_values >= rank:
+                return min(self._get_highest_value(index), self._max) / 1e9
+        return self._max / 1e9
+
+    def get_summary(self):
+        """
+        :return: dictionary with the count and the minimum, mean, 50th, 90th, 99th and 99.9th
+            percentile and maximum latency in seconds.
+        """
+        summary = {"count": self._count, "min": self._min / 1e9,
+                   "mean": self._total / max(1, self._count) / 1e9}
+        for name, percentile in (("p50", 50), ("p90", 90), ("p99", 99), ("p99.9", 99.9)):
+            summary[name] = self.get_percentile(percentile)
+        summary["max"] = self._max / 1e9
+        return summary
+
+
+def load_scenario(concurrency=1, duration=None, iterations=None, mode=None, max_p99=None,
+                  min_throughput=None, max_error_rate=0):
+    # pylint: disable=too-many-arguments,too-many-positional-arguments
+    """
+    Decorator for running a test method as a load scenario. The test method is one call to the
+    system under test and is called over and over by concurrent workers.
+
+    :param concurrency: the number of workers that call the test method at the same time.
+    :param duration: the duration of the load in seconds.
+    :param iterations: the total number of calls, the load stops at the duration or the number of
+        calls, whichever comes first.
+    :param mode: "threads", "asyncio" or "processes", by default "asyncio" for coroutine
+        functions (async def) and else "threads".
+    :param max_p99: the maximum 99th percentile of the latency in seconds.
+    :param min_throughput: the minimum number of calls per second.
+    :param max_error_rate: the maximum percentage of failed calls, by default 0, so any failed
+        call fails the test case. None for no maximum.
+
+    A call fails when the test method raises an exception or returns False. The first error is
+    logged as an error, the failed calls are counted. Using a fail method in the test method logs
+    each failure and fails the test case.
+
+    The throughput, error rate and latency percentiles are logged and recorded as measurements,
+    with the thresholds as limits. A measurement out of its limits fails the test case. In the
+    "processes" mode, the workers are forked processes and their log messages are not kept. This
+    mode needs a platform with fork.
+
+    .. code-block:: python
+
+        import lily_unit_test
+
+        class MyLoadTestSuite(lily_unit_test.TestSuite):
+
+            @lily_unit_test.load_scenario(concurrency=20, duration=60, max_p99=0.25,
+                                          min_throughput=500)
+            def test_get_status(self):
+                return requests.get("http://device-server/status").status_code == 200
+    """
+    def _decorator(test_method):
+        assert duration is not None or iterations is not None, \
+            "A load scenario needs a duration or a number of iterations"
+        assert mode in (None, "threads", "asyncio", "processes"), f"Unknown mode: {mode}"
+        test_method.load_scenario = {
+            "concurrency": concurrency, "duration": duration, "iterations": iterations,
+            "mode": mode, "max_p99": max_p99, "min_throughput": min_throughput,
+            "max_error_rate": max_error_rate
+        }
+        return test_method
+
+    return _decorator
+
+
+class LoadGenerator:
+    """
+    Calls a function from concurrent workers and measures the latency of each call. The test
+    suite uses this class for test methods with the :code:`load_scenario` decorator.
+
+    :param function: the function to call, without arguments. A coroutine function is awaited.
+    :param concurrency: the number of workers.
+    :param duration: the duration of the load in seconds, or None.
+    :param iterations: the total number of calls, or None.
+    :param mode: "threads", "asyncio" or "processes", by default "asyncio" for coroutine
+        functions and else "threads".
+    """
+
+    def __init__(self, function, concurrency=1, duration=None, iterations=None, mode=None):
+        assert duration is not None or iterations is not None, \
+            "Set a duration or a number of iterations"
+        self._function = function
+        self._concurrency = concurrency
+        self._duration = duration
+        self._iterations = iterations
+        if mode is None:
+            mode = "asyncio" if inspect.iscoroutinefunction(function) else "threads"
+        self._mode = mode
+
+    ###########
+    # Private #
+    ###########
+
+    def _create_claim(self, iterations):
+        # Returns True as long as there are calls to make, the counter is thread safe
+        end_time = None if self._duration is None else time.perf_counter() + self._duration
+        counter = itertools.count()
+
+        def _claim():
+            return ((end_time is None or time.perf_counter() < end_time) and
+                    (iterations is None or next(counter) < iterations))
+
+        return _claim
+
+    def _run_calls(self, claim, result):
+        histogram = LatencyHistogram()
+        function = self._function
+        while claim():
+            start = time.perf_counter_ns()
+            try:
+                passed = function() is not False
+                error = "Returned False"
+            except Exception as e:
+                passed = False
+                error = f"{e.__class__.__name__}: {e}"
+            histogram.add(time.perf_counter_ns() - start)
+            if not passed:
+                result["errors"] += 1
+                if result["first_error"] is None:
+                    result["first_error"] = error
+        result["histogram"] = histogram
+        return result
+
+    async def _run_async_calls(self, claim, result, histogram):
+        while claim():
+            start = time.perf_counter_ns()
+            try:
+                passed = await self._function() is not False
+                error = "Returned False"
+            except Exception as e:
+                passed = False
+                error = f"{e.__class__.__name__}: {e}"
+            histogram.add(time.perf_counter_ns() - start)
+            if not passed:
+                result["errors"] += 1
+                if result["first_error"] is None:
+                    result["first_error"] = error
+
+    async def _run_tasks(self, result):
+        claim = self._create_claim(self._iterations)
+        await asyncio.gather(*(self._run_async_calls(claim, result, result["histogram"])
+                               for _ in range(self._concurrency)))
+
+    def _run_threads(self):
+        claim = self._create_claim(self._iterations)
+        results = [{"errors": 0, "first_error": None} for _ in range(self._concurrency)]
+        threads = [threading.Thread(target=self._run_calls, args=(claim, x), daemon=True)
+                   for x in results]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return results
+
+    def _run_process(self, writer, iterations):
+        result = self._run_calls(self._create_claim(iterations),
+                                 {"errors": 0, "first_error": None})
+        writer.send(result)
+        writer.close()
+
+    def _run_processes(self):
+        assert "fork" in multiprocessing.get_all_start_methods(), \
+            "The processes mode needs a platform with fork"
+        context = multiprocessing.get_context("fork")
+        workers = []
+        for i in range(self._concurrency):
+            iterations = None
+            if self._iterations is not None:
+                iterations = (self._iterations // self._concurrency +
+                              int(i < self._iterations % self._concurrency))
+            reader, writer = context.Pipe(duplex=False)
+            process = context.Process(target=self._run_process, args=(writer, iterations),
+                                      daemon=True)
+            process.start()
+            writer.close()
+            workers.append((process, reader))
+        results = []
+        for process, reader in workers:
+            try:
+                results.append(reader.recv())
+            except EOFError:
+                # The process ended without a result, it counts as one failed call
+                results.append({"errors": 1, "histogram": LatencyHistogram(),
+                                "first_error": "Worker process ended unexpectedly"})
+            process.join()
+        return results
+
+    ##########
+    # Public #
+    ##########
+
+    def get_mode(self):
+        """
+        :return: the mode of the workers: "threads", "asyncio" or "processes".
+        """
+        return self._mode
+
+    def run(self):
+        """
+        Run the load until the duration or the number of iterations.
+
+        :return: dictionary with the number of calls and errors, the error rate in percent, the
+            duration in seconds, the throughput in calls per second, the first error message or
+            None and the LatencyHistogram with the latencies of all calls.
+        """
+        start = time.perf_counter()
+        if self._mode == "asyncio":
+            results = [{"errors": 0, "first_error": None, "histogram": LatencyHistogram()}]
+            asyncio.run(self._run_tasks(results[0]))
+        elif self._mode == "processes":
+            results = self._run_processes()
+        else:
+            results = self._run_threads()
+        duration = time.perf_counter() - start
+        histogram = LatencyHistogram()
+        for result in results:
+            histogram.merge(result["histogram"])
+        errors = sum(x["errors"] for x in results)
+        n_calls = histogram.get_count()
+        return {
+            "calls": n_calls,
+            "errors": errors,
+            "error_rate": 100 * errors / max(1, n_calls),
+            "duration": duration,
+            "throughput": n_calls / duration if duration > 0 else 0.0,
+            "first_error": next((x["first_error"] for x in results
+                                 if x["first_error"] is not None), None),
+            "histogram": histogram
+        }
+
+
+if __name__ == "__main__":
+
+    import random
+
+    def _call():
+        time.sleep(random.expovariate(1000))
+        return random.random() > 0.01
+
+    async def _async_call():
+        await asyncio.sleep(random.expovariate(1000))
+
+    for _function, _mode in ((_call, "threads"), (_async_call, None), (_call, "processes")):
+        _result = LoadGenerator(_function, 10, duration=1, mode=_mode).run()
+        print(f"{_mode or 'asyncio'}: {_result['calls']} calls, {_result['throughput']:.0f} "
+              f"calls/s, {_result['error_rate']:.1f}% errors, "
+              f"{_result['histogram'].get_summary()}")
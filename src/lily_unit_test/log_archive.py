@@ -0,0 +1,298 @@
+"""
+Indexed archive with the log messages of all test suites of a test run.
+"""
+
+import argparse
+import json
+import mmap
+import os
+import re
+import struct
+import sys
+import zlib
+
+from lily_unit_test.logger import Logger
+
+
+class LogArchiveWriter:
+    """
+    Writes the log messages of test suites to a single archive file.
+
+    :param filename: the filename of the archive.
+
+    The log messages of each test case are stored as a separate compressed chunk.
+    After the chunks, an index is written with the test suites, test cases, error messages and
+    the byte offsets of the chunks. This makes it possible to read a single test case without
+    decompressing the whole archive.
+    """
+
+    MAGIC = b"LILYLOGA"
+    VERSION = 1
+    # Trailer: index offset, index length, magic
+    TRAILER_FORMAT = "<QQ8s"
+    ERROR_TYPES = ("ERROR", "STDERR")
+
+    _RUN_TEST_CASE = "Run test case: "
+    _TEST_SUITE_SUMMARY = re.compile(r"Test suite .+: \d+ of \d+ test cases passed")
+
+    def __init__(self, filename):
+        # The file stays open until the index is written
+        self._fp = open(filename, "wb")  # pylint: disable=consider-using-with
+        self._fp.write(struct.pack("<8sH", self.MAGIC, self.VERSION))
+        self._test_suites = []
+
+    @staticmethod
+    def _get_message_type(log_message):
+        parts = log_message.split("|", maxsplit=2)
+        return parts[1].strip() if len(parts) == 3 else ""
+
+    def _write_chunk(self, name, log_messages, first_line):
+        offset = self._fp.tell()
+        data = zlib.compress("\n".join(log_messages).encode("utf-8"))
+        self._fp.write(data)
+        return {
+            "name": name,
+            "offset": offset,
+            "length": len(data),
+            "first_line": first_line,
+            "n_lines": len(log_messages)
+        }
+
+    def _split_test_cases(self, log_messages):
+        # Yields the name of the test case (None if not in a test case) and the line numbers
+        name = None
+        start = 0
+        for i, log_message in enumerate(log_messages):
+            message = log_message.split("|", maxsplit=2)[-1].strip()
+            is_test_case = message.startswith(self._RUN_TEST_CASE)
+            if is_test_case or (name is not None and self._TEST_SUITE_SUMMARY.match(message)):
+                if i > start:
+                    yield name, start, i
+                name = message[len(self._RUN_TEST_CASE):] if is_test_case else None
+                start = i
+        if len(log_messages) > start:
+            yield name, start, len(log_messages)
+
+    def add_test_suite(self, name, log_messages):
+        """
+        Add the log messages of a test suite to the archive.
+
+        :param name: the name of the test suite, usually the report ID (e.g. 02_MyTestSuite).
+        :param log_messages: the list of log messages of the test suite.
+        """
+        chunks = []
+        for test_case, start, end in self._split_test_cases(log_messages):
+            chunks.append(self._write_chunk(test_case, log_messages[start:end], start))
+
+        errors = []
+        for i, log_message in enumerate(log_messages):
+            if self._get_message_type(log_message) in self.ERROR_TYPES:
+                errors.append([i, log_message])
+
+        result = ""
+        if len(log_messages) > 0:
+            result = Logger.get_result(log_messages[-1])
+
+        self._test_suites.append({
+            "name": name,
+            "result": result,
+            "n_lines": len(log_messages),
+            "chunks": chunks,
+            "errors": errors
+        })
+
+    def close(self):
+        """
+        Write the index and close the archive. The archive is synced to disk before it is closed.
+        """
+        if self._fp.closed:
+            return
+        index = {
+            "version": self.VERSION,
+            "test_suites": self._test_suites
+        }
+        offset = self._fp.tell()
+        data = zlib.compress(json.dumps(index, separators=(",", ":")).encode("utf-8"))
+        self._fp.write(data)
+        self._fp.write(struct.pack(self.TRAILER_FORMAT, offset, len(data), self.MAGIC))
+        self._fp.flush()
+        os.fsync(self._fp.fileno())
+        self._fp.close()
+
+
+class LogArchive:
+    """
+    Reads log messages from a log archive.
+
+    :param filename: the filename of the archive.
+
+    The archive is memory mapped, only the index and the requested chunks are decompressed.
+
+    .. code-block:: python
+
+        from lily_unit_test import LogArchive
+
+        with LogArchive("20240101_120000_TestRunner.lla") as archive:
+            for test_suite in archive.get_test_suites():
+                print(test_suite, archive.get_test_suite_result(test_suite))
+
+            # Log messages of a single test case
+            for log_message in archive.get_log_messages("02_MyTestSuite",
+                                                        "MyTestSuite.test_something"):
+                print(log_message)
+
+    The archive can also be used from the command line:
+
+    .. code-block:: console
+
+        python -m lily_unit_test.log_archive list 20240101_120000_TestRunner.lla
+        python -m lily_unit_test.log_archive extract 20240101_120000_TestRunner.lla 02_MyTestSuite
+        python -m lily_unit_test.log_archive errors 20240101_120000_TestRunner.lla
+        python -m lily_unit_test.log_archive grep 20240101_120000_TestRunner.lla "timeout"
+    """
+
+    def __init__(self, filename):
+        with open(filename, "rb") as fp:
+            self._map = mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ)
+
+        trailer_size = struct.calcsize(LogArchiveWriter.TRAILER_FORMAT)
+        magic, _version = struct.unpack_from("<8sH", self._map, 0)
+        offset, length, trailer_magic = struct.unpack_from(LogArchiveWriter.TRAILER_FORMAT,
+                                                           self._map,
+                                                           len(self._map) - trailer_size)
+        assert magic == LogArchiveWriter.MAGIC and trailer_magic == LogArchiveWriter.MAGIC, \
+            f"The file '{filename}' is not a valid log archive"
+        index = json.loads(zlib.decompress(self._map[offset:offset + length]))
+        self._test_suites = {test_suite["name"]: test_suite for test_suite in index["test_suites"]}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def _get_test_suite(self, test_suite):
+        assert test_suite in self._test_suites, f"Test suite '{test_suite}' not found in archive"
+        return self._test_suites[test_suite]
+
+    def _read_chunk(self, chunk):
+        data = zlib.decompress(self._map[chunk["offset"]:chunk["offset"] + chunk["length"]])
+        return data.decode("utf-8").split("\n")
+
+    def close(self):
+        """
+        Close the archive.
+        """
+        self._map.close()
+
+    def get_test_suites(self):
+        """
+        :return: list with the names of the test suites in the archive.
+        """
+        return list(self._test_suites)
+
+    def get_test_suite_result(self, test_suite):
+        """
+        :param test_suite: the name of the test suite.
+        :return: "PASSED", "FAILED" or "SKIPPED".
+        """
+        return self._get_test_suite(test_suite)["result"]
+
+    def get_test_cases(self, test_suite):
+        """
+        :param test_suite: the name of the test suite.
+        :return: list with the names of the test cases of the test suite.
+        """
+        return [chunk["name"] for chunk in self._get_test_suite(test_suite)["chunks"]
+                if chunk["name"] is not None]
+
+    def get_log_messages(self, test_suite, test_case=None):
+        """
+        Get the log messages of a test suite or a single test case.
+
+        :param test_suite: the name of the test suite.
+        :param test_case: the name of the test case, if None all log messages of the test suite
+            are returned.
+        :return: list with log messages.
+        """
+        log_messages = []
+        for chunk in self._get_test_suite(test_suite)["chunks"]:
+            if test_case is None or chunk["name"] == test_case:
+                log_messages.extend(self._read_chunk(chunk))
+        return log_messages
+
+    def get_errors(self, test_suite=None):
+        """
+        Get the error messages (types ERROR and STDERR) from the index, no log messages are
+        decompressed.
+
+        :param test_suite: the name of the test suite, if None the errors of all test suites are
+            returned.
+        :return: list with tuples: (test suite name, line number, log message).
+        """
+        names = self._test_suites if test_suite is None else [test_suite]
+        return [(name, line_number, log_message) for name in names
+                for line_number, log_message in self._get_test_suite(name)["errors"]]
+
+    def search(self, pattern, test_suite=None):
+        """
+        Search the log messages with a regular expression. Chunks are decompressed one at a time.
+
+        :param pattern: the regular expression to search for.
+        :param test_suite: the name of the test suite, if None all test suites are searched.
+        :return: generator with tuples: (test suite name, line number, log message).
+        """
+        expression = re.compile(pattern)
+        names = self._test_suites if test_suite is None else [test_suite]
+        for name in names:
+            for chunk in self._get_test_suite(name)["chunks"]:
+                for i, log_message in enumerate(self._read_chunk(chunk)):
+                    if expression.search(log_message):
+                        yield name, chunk["first_line"] + i, log_message
+
+
+def main(arguments=None):
+    """
+    Command line interface for log archives.
+
+    :param arguments: list of command line arguments, if None the arguments from sys.argv are used.
+    """
+    parser = argparse.ArgumentParser(prog="python -m lily_unit_test.log_archive",
+                                     description="Read log messages from a log archive.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    command = commands.add_parser("list", help="list the test suites and test cases")
+    command.add_argument("filename")
+    command = commands.add_parser("extract", help="show the log messages of a test suite or case")
+    command.add_argument("filename")
+    command.add_argument("test_suite")
+    command.add_argument("test_case", nargs="?")
+    command = commands.add_parser("errors", help="show the error messages")
+    command.add_argument("filename")
+    command.add_argument("test_suite", nargs="?")
+    command = commands.add_parser("grep", help="search log messages with a regular expression")
+    command.add_argument("filename")
+    command.add_argument("pattern")
+    command.add_argument("test_suite", nargs="?")
+    args = parser.parse_args(arguments)
+
+    with LogArchive(args.filename) as archive:
+        if args.command == "list":
+            for test_suite in archive.get_test_suites():
+                print(f"{test_suite}: {archive.get_test_suite_result(test_suite)}")
+                for test_case in archive.get_test_cases(test_suite):
+                    print(f"    {test_case}")
+        elif args.command == "extract":
+            for log_message in archive.get_log_messages(args.test_suite, args.test_case):
+                print(log_message)
+        elif args.command == "errors":
+            for test_suite, line_number, log_message in archive.get_errors(args.test_suite):
+                print(f"{test_suite}:{line_number + 1}: {log_message}")
+        else:
+            for test_suite, line_number, log_message in archive.search(args.pattern,
+                                                                       args.test_suite):
+                print(f"{test_suite}:{line_number + 1}: {log_message}")
+
+
+if __name__ == "__main__":
+
+    sys.exit(main())
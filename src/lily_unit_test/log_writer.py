@@ -0,0 +1,153 @@
+"""
+Background writer for log files.
+"""
+
+import bz2
+import gzip
+import lzma
+import os
+import queue
+import threading
+
+from lily_unit_test.log_archive import LogArchiveWriter
+from lily_unit_test.test_settings import TestSettings
+
+
+class LogWriter:  # pylint: disable=too-many-instance-attributes
+    """
+    Writes log files in a background thread, so writing does not delay the execution of the tests.
+
+    :param output_path: the folder where the log files are written, created on the first write.
+    :param compression: None for plain text files, or one of: "gzip", "bz2", "lzma".
+    :param buffer_size: number of bytes that are collected before writing them to the file.
+    :param archive_filename: if set, the log messages are also written to a log archive.
+    :param text_files: if False, no text log files are written (only the archive, if set).
+
+    Log files are written in the order they are added. Each file is flushed and synced to disk
+    before the next file is written. Calling :code:`close()` waits until all files are written.
+    """
+
+    COMPRESSION_TYPES = {
+        None: "",
+        "gzip": ".gz",
+        "bz2": ".bz2",
+        "lzma": ".xz"
+    }
+
+    def __init__(self, output_path, compression=None,
+                 buffer_size=TestSettings.LOG_WRITER_BUFFER_SIZE, archive_filename=None,
+                 text_files=True):
+        assert compression in self.COMPRESSION_TYPES, \
+            f"Log file compression '{compression}' is not supported"
+        self._output_path = output_path
+        self._compression = compression
+        self._buffer_size = buffer_size
+        self._archive_filename = archive_filename
+        self._archive = None
+        self._text_files = text_files
+        self._queue = queue.Queue()
+        self._error = None
+        self._is_path_created = False
+        self._thread = threading.Thread(target=self._process_queue, daemon=True)
+        self._thread.start()
+
+    def _process_queue(self):
+        while True:
+            item = self._queue.get()
+            if self._error is None:
+                try:
+                    if item is None:
+                        if self._archive is not None:
+                            self._archive.close()
+                    else:
+                        self._process_item(*item)
+                except Exception as e:
+                    self._error = e
+            if item is None:
+                break
+
+    def _process_item(self, name, log_messages):
+        if self._text_files:
+            self._write_file(self.get_filename(name), log_messages)
+        if self._archive_filename is not None:
+            if self._archive is None:
+                os.makedirs(os.path.dirname(self._archive_filename), exist_ok=True)
+                self._archive = LogArchiveWriter(self._archive_filename)
+            self._archive.add_test_suite(name, log_messages)
+
+    def _open_compressed(self, fp):
+        if self._compression == "gzip":
+            return gzip.GzipFile(fileobj=fp, mode="wb")
+        if self._compression == "bz2":
+            return bz2.BZ2File(fp, "wb")
+        if self._compression == "lzma":
+            return lzma.LZMAFile(fp, "wb")
+        return None
+
+    def _write_file(self, filename, log_messages):
+        if not self._is_path_created:
+            os.makedirs(self._output_path, exist_ok=True)
+            self._is_path_created = True
+
+        with open(os.path.join(self._output_path, filename), "wb",
+                  buffering=self._buffer_size) as fp:
+            compressed = self._open_compressed(fp)
+            target = fp if compressed is None else compressed
+            chunk = []
+            chunk_size = 0
+            for message in log_messages:
+                chunk.append(message)
+                chunk_size += len(message) + 1
+                if chunk_size >= self._buffer_size:
+                    target.write(("\n".join(chunk) + "\n").encode("utf-8"))
+                    chunk = []
+                    chunk_size = 0
+            if len(chunk) > 0:
+                target.write(("\n".join(chunk) + "\n").encode("utf-8"))
+            if compressed is not None:
+                # Closing the compressed stream does not close the file, it only writes the trailer
+                compressed.close()
+            fp.flush()
+            os.fsync(fp.fileno())
+
+    def get_filename(self, name):
+        """
+        Get the filename of the log file including the extension for the compression type.
+
+        :param name: the name of the log file without extension.
+        :return: the filename of the log file.
+        """
+        return f"{name}.txt{self.COMPRESSION_TYPES[self._compression]}"
+
+    def write(self, name, log_messages):
+        """
+        Add a log file to the queue for writing.
+
+        :param name: the name of the log file without extension.
+        :param log_messages: the list of log messages to write to the file.
+        """
+        self._queue.put((name, log_messages))
+
+    def close(self):
+        """
+        Wait until all log files are written and stop the writer thread.
+        If writing a log file failed, the exception is raised here.
+        """
+        if self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join()
+        if self._error is not None:
+            raise self._error
+
+
+if __name__ == "__main__":
+
+    import tempfile
+
+    with tempfile.TemporaryDirectory() as temp_folder:
+        writer = LogWriter(temp_folder, "gzip")
+        writer.write("01_TestRunner", ["First message", "Second message"])
+        writer.close()
+        for log_file in os.listdir(temp_folder):
+            with gzip.open(os.path.join(temp_folder, log_file), "rt", encoding="utf-8") as fp_in:
+                print(log_file, repr(fp_in.read()))
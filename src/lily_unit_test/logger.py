@@ -9,7 +9,7 @@ import time
 from datetime import datetime
 
 
-class Logger:
+class Logger:  # pylint: disable=too-many-instance-attributes
     """
     Logger class.
     Handles all log messages and messages from stdout and stderr.
@@ -17,6 +17,7 @@ class Logger:
 
     :param redirect_std: if True, stdout and stderr are redirected to the logger.
     :param log_to_stdout: if True, log messages are written to the stdout (console).
+    :param log_level: the minimum level of messages that are logged: "DEBUG", "INFO" or "ERROR".
 
     | All log messages are stored to an internal buffer (list of strings).
     | All log messages have the following format:
@@ -41,6 +42,17 @@ class Logger:
     | STDERR | Standard error messages, messages that are written to standard error handler,
              | usually when an exception is raised.
     ======== =================================================================================
+
+    | The log level determines which messages are stored. With log level "INFO", debug messages
+    | are ignored. With log level "ERROR", info and debug messages are ignored.
+    | Error, stdout and stderr messages are always stored.
+    | Ignored messages are not formatted, the check costs almost nothing. To benefit from this,
+    | pass the values as arguments instead of formatting the message yourself:
+
+    .. code-block:: python
+
+        # The message is only formatted when debug messages are logged
+        self.log.debug("Sample {}: {:.3f} V", index, voltage)
     """
 
     TYPE_INFO = "INFO"
@@ -50,6 +62,8 @@ class Logger:
     TYPE_STDERR = "STDERR"
     TYPE_EMPTY_LINE = "EMPTY_LINE"
 
+    LOG_LEVELS = (TYPE_DEBUG, TYPE_INFO, TYPE_ERROR)
+
     TIME_STAMP_FORMAT = "%Y-%m-%d %H:%M:%S.%f"
     _LOG_FORMAT = "{} | {:6} | {}"
 
@@ -65,22 +79,147 @@ class Logger:
         def flush(self):
             """ Required for compatibility. """
 
-    def __init__(self, redirect_std=True, log_to_stdout=True):
+    class _StdRouter:
+
+        def __init__(self, std_type, original):
+            self._type = std_type
+            self._original = original
+
+        def write(self, message):
+            logger = Logger.get_active_logger()
+            if logger is None:
+                self._original.write(message)
+            else:
+                logger.handle_message(self._type, message)
+
+        def flush(self):
+            """ Required for compatibility. """
+
+    # Shared by all loggers: the loggers that redirect stdout and stderr
+    _std_lock = threading.RLock()
+    _std_original = (None, None)
+    _std_loggers = []
+    _thread_loggers = {}
+    # The console while the file descriptors of stdout and stderr are captured (see FdCapture)
+    _console = None
+
+    def __init__(self, redirect_std=True, log_to_stdout=True, log_level=TYPE_DEBUG):
         self._log_to_stdout = log_to_stdout
+        self._log_level = None
+        self._is_debug_enabled = True
+        self._is_info_enabled = True
+        self.set_log_level(log_level)
         self._log_messages = []
         self._output = ""
         self._has_stderr_messages = False
         self._lock = threading.RLock()
+        # Cache for the date and time part of the time stamp, this only changes every second
+        self._time_stamp_second = None
+        self._time_stamp_prefix = ""
+        self._listeners = []
+
+        with self._std_lock:
+            # Messages to stdout are written to where stdout of this thread was going to
+            thread_logger = self.get_thread_logger()
+            if thread_logger is not None:
+                self._org_stdout = self._StdLogger(thread_logger, self.TYPE_STDOUT)
+            elif len(self._std_loggers) > 0:
+                self._org_stdout = Logger._std_original[0]
+            else:
+                self._org_stdout = sys.stdout
+            if redirect_std:
+                if len(self._std_loggers) == 0:
+                    Logger._std_original = (sys.stdout, sys.stderr)
+                    sys.stdout = self._StdRouter(self.TYPE_STDOUT, sys.stdout)
+                    sys.stderr = self._StdRouter(self.TYPE_STDERR, sys.stderr)
+                self._std_loggers.append(self)
+                self.redirect_thread()
+
+    @classmethod
+    def get_thread_logger(cls):
+        """
+        Get the logger that redirects the stdout and stderr messages of the current thread.
 
-        self._org_stdout = sys.stdout
-        self._org_stderr = sys.stderr
-        if redirect_std:
-            sys.stdout = self._StdLogger(self, self.TYPE_STDOUT)
-            sys.stderr = self._StdLogger(self, self.TYPE_STDERR)
+        :return: the logger, or None if the current thread is not redirected by a logger.
+        """
+        with cls._std_lock:
+            loggers = cls._thread_loggers.get(threading.get_ident())
+            if loggers:
+                return loggers[-1]
+        return None
+
+    @classmethod
+    def get_active_logger(cls):
+        """
+        Get the logger that receives the stdout and stderr messages of the current thread.
+        If no logger redirects the current thread, the most recently created logger that
+        redirects stdout and stderr is returned.
+
+        :return: the logger, or None if stdout and stderr are not redirected.
+        """
+        with cls._std_lock:
+            logger = cls.get_thread_logger()
+            if logger is None and len(cls._std_loggers) > 0:
+                logger = cls._std_loggers[-1]
+        return logger
+
+    @staticmethod
+    def get_result(last_message):
+        """
+        Get the result of a test suite or test run from its last log message.
+
+        :param last_message: the last log message of the test suite or test run.
+        :return: "PASSED", "FAILED" or "SKIPPED". Only test suites that are skipped because of the
+            time budget are "SKIPPED", other skipped test suites are "FAILED".
+        """
+        if "PASSED" in last_message:
+            return "PASSED"
+        if "SKIPPED because of the time budget" in last_message:
+            return "SKIPPED"
+        return "FAILED"
+
+    def redirect_thread(self):
+        """
+        Redirect the stdout and stderr messages of the current thread to this logger.
+        This is done automatically for the thread that creates the logger and for threads that
+        are started with the :code:`start_thread()` method of the test suite.
+        The redirection ends when the logger is shut down.
+        """
+        with self._std_lock:
+            if self in self._std_loggers:
+                self._thread_loggers.setdefault(threading.get_ident(), []).append(self)
+
+    def add_listener(self, listener):
+        """
+        Add a function that is called for each log message that is stored.
+
+        :param listener: function with the message type and the log message as arguments.
+
+        The listener is called from the thread that logs the message, it should return quickly.
+        """
+        with self._lock:
+            self._listeners.append(listener)
 
     def log_to_stdout(self, enable):
         self._log_to_stdout = enable
 
+    def set_log_level(self, log_level):
+        """
+        Set the minimum level of messages that are logged.
+
+        :param log_level: "DEBUG", "INFO" or "ERROR".
+        """
+        assert log_level in self.LOG_LEVELS, f"Log level '{log_level}' is not defined"
+        self._log_level = log_level
+        self._is_debug_enabled = log_level == self.TYPE_DEBUG
+        self._is_info_enabled = log_level != self.TYPE_ERROR
+
+    def get_log_level(self):
+        """
+        :return: the minimum level of messages that are logged.
+        """
+        return self._log_level
+
     def get_log_messages(self):
         """
         Returns a reference to the log messages buffer.
@@ -105,31 +244,54 @@ class Logger:
         Shutdown the logger.
         This will restore the original stdout and stderr handlers.
         """
-        sys.stdout = self._org_stdout
-        sys.stderr = self._org_stderr
-
-    def info(self, message):
+        with self._std_lock:
+            if self not in self._std_loggers:
+                return
+            self._std_loggers.remove(self)
+            for thread_id, loggers in list(self._thread_loggers.items()):
+                while self in loggers:
+                    loggers.remove(self)
+                if len(loggers) == 0:
+                    del self._thread_loggers[thread_id]
+            if len(self._std_loggers) == 0:
+                sys.stdout, sys.stderr = Logger._std_original
+
+    def info(self, message, *args, **kwargs):
         """
         Log a 'info' type message.
 
         :param message: the message to write to the logger.
+        :param args: if given, the message is formatted with: :code:`message.format(*args)`.
+        :param kwargs: if given, the message is formatted with: :code:`message.format(**kwargs)`.
         """
-        self.handle_message(self.TYPE_INFO, f"{message}\n")
+        if self._is_info_enabled:
+            if args or kwargs:
+                message = message.format(*args, **kwargs)
+            self.handle_message(self.TYPE_INFO, f"{message}\n")
 
-    def debug(self, message):
+    def debug(self, message, *args, **kwargs):
         """
         Log a 'debug' type message.
 
         :param message: the message to write to the logger.
+        :param args: if given, the message is formatted with: :code:`message.format(*args)`.
+        :param kwargs: if given, the message is formatted with: :code:`message.format(**kwargs)`.
         """
-        self.handle_message(self.TYPE_DEBUG, f"{message}\n")
+        if self._is_debug_enabled:
+            if args or kwargs:
+                message = message.format(*args, **kwargs)
+            self.handle_message(self.TYPE_DEBUG, f"{message}\n")
 
-    def error(self, message):
+    def error(self, message, *args, **kwargs):
         """
-        Log a 'error' type message.
+        Log a 'error' type message. Error messages are always logged.
 
         :param message: the message to write to the logger.
+        :param args: if given, the message is formatted with: :code:`message.format(*args)`.
+        :param kwargs: if given, the message is formatted with: :code:`message.format(**kwargs)`.
         """
+        if args or kwargs:
+            message = message.format(*args, **kwargs)
         self.handle_message(self.TYPE_ERROR, f"{message}\n")
 
     def empty_line(self):
@@ -138,6 +300,22 @@ class Logger:
         """
         self.handle_message(self.TYPE_EMPTY_LINE, "")
 
+    def _get_stdout(self):
+        # Only the original stdout is replaced, not the redirections to other loggers
+        if self._console is not None and not isinstance(self._org_stdout, (self._StdLogger,
+                                                                           self._StdRouter)):
+            return self._console
+        return self._org_stdout
+
+    def _get_time_stamp(self):
+        now = time.time()
+        second = int(now)
+        if second != self._time_stamp_second:
+            self._time_stamp_second = second
+            self._time_stamp_prefix = datetime.fromtimestamp(second).strftime(
+                self.TIME_STAMP_FORMAT.split(".", maxsplit=1)[0])
+        return f"{self._time_stamp_prefix}.{int((now - second) * 1000):03d}"
+
     def handle_message(self, message_type, message_text):
         """
         Handles the message of a given type. This method is use by :code:`info()`, :code:`debug()`,
@@ -155,7 +333,7 @@ class Logger:
                 if message_type == self.TYPE_STDERR:
                     self._has_stderr_messages = True
 
-                timestamp = datetime.now().strftime(self.TIME_STAMP_FORMAT)[:-3]
+                timestamp = self._get_time_stamp()
                 self._output += message_text
                 while "\n" in self._output:
                     index = self._output.find("\n")
@@ -163,10 +341,13 @@ class Logger:
                     self._output = self._output[index + 1:]
                     messages_to_write.append(line)
 
+            stdout = self._get_stdout() if self._log_to_stdout else None
             for message in messages_to_write:
                 self._log_messages.append(message)
-                if self._log_to_stdout:
-                    self._org_stdout.write(f"{message}\n")
+                if stdout is not None:
+                    stdout.write(f"{message}\n")
+                for listener in self._listeners:
+                    listener(message_type, message)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,227 @@
+"""
+Compact storage of measured values with limits, with export to CSV and a binary columnar file.
+"""
+
+import csv
+import itertools
+import json
+import math
+import struct
+import sys
+import threading
+import time
+
+from array import array
+
+
+class Measurements:
+    """
+    Stores measurements in columns of typed arrays, so millions of measurements fit in memory
+    without a Python object for each value. Names, units and test case names are stored once in
+    a table of strings and the columns have their index.
+
+    Columns:
+
+    | name, unit, test_case: index in the table of strings.
+    | value, low, high: the measured value and the limits, not a number if there is no limit.
+    | time: time of the measurement in seconds since the epoch.
+    | passed: 1 if the value is within the limits, else 0.
+
+    The test suite has a Measurements object, see :code:`TestSuite.record()`.
+    """
+
+    COLUMNS = {"name": "I", "unit": "I", "test_case": "I", "value": "d", "low": "d", "high": "d",
+               "time": "d", "passed": "B"}
+
+    _MAGIC = b"LMC1"
+
+    def __init__(self):
+        self._columns = {name: array(typecode) for name, typecode in self.COLUMNS.items()}
+        self._strings = []
+        self._string_indexes = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._columns["value"])
+
+    ###########
+    # Private #
+    ###########
+
+    def _get_string_index(self, text):
+        index = self._string_indexes.get(text)
+        if index is None:
+            index = self._string_indexes[text] = len(self._strings)
+            self._strings.append(text)
+        return index
+
+    ##########
+    # Public #
+    ##########
+
+    def add(self, name, value, unit="", low=None, high=None, test_case=""):
+        # pylint: disable=too-many-arguments,too-many-positional-arguments
+        """
+        Add a measurement.
+
+        :param name: the name of the measurement.
+        :param value: the measured value.
+        :param unit: the unit of the value.
+        :param low: the lowest allowed value or None for no limit.
+        :param high: the highest allowed value or None for no limit.
+        :param test_case: the name of the test case that did the measurement.
+        :return: True if the value is within the limits, else False.
+        """
+        value = float(value)
+        low = math.nan if low is None else float(low)
+        high = math.nan if high is None else float(high)
+        # Not a number is never within the limits
+        passed = not math.isnan(value) and not value < low and not value > high
+        with self._lock:
+            columns = self._columns
+            columns["name"].append(self._get_string_index(name))
+            columns["unit"].append(self._get_string_index(unit))
+            columns["test_case"].append(self._get_string_index(test_case))
+            columns["value"].append(value)
+            columns["low"].append(low)
+            columns["high"].append(high)
+            columns["time"].append(time.time())
+            columns["passed"].append(passed)
+        return passed
+
+    def get_column(self, name):
+        """
+        :param name: the name of the column.
+        :return: the column, an array. For the names, units and test cases, the values are
+            indexes in the table of strings.
+        """
+        return self._columns[name]
+
+    def get_strings(self):
+        """
+        :return: the table of strings with the names, units and test case names.
+        """
+        return self._strings
+
+    def get_summary(self):
+        """
+        Get the statistics of each measurement name, in order of the first measurement.
+
+        :return: list with dictionaries with the name, unit, count, number of failed values,
+            minimum, mean and maximum value and the limits of the first measurement.
+        """
+        columns = self._columns
+        # One pass over the rows, the values are grouped by name with the first row and the
+        # number of passed values. The keys of a dictionary keep the order of the first
+        # measurement of each name.
+        groups = {}
+        for row, name_index, value, passed in zip(itertools.count(), columns["name"],
+                                                  columns["value"], columns["passed"]):
+            group = groups.get(name_index)
+            if group is None:
+                group = groups[name_index] = [row, array("d"), 0]
+            group[1].append(value)
+            group[2] += passed
+        summary = []
+        for name_index, (first, values, n_passed) in groups.items():
+            summary.append({
+                "name": self._strings[name_index],
+                "unit": self._strings[columns["unit"][first]],
+                "count": len(values),
+                "failed": len(values) - n_passed,
+                "min": min(values),
+                "mean": math.fsum(values) / len(values),
+                "max": max(values),
+                "low": columns["low"][first],
+                "high": columns["high"][first]
+            })
+        return summary
+
+    def write_csv(self, filename):
+        """
+        Write the measurements to a CSV file with a header, one row for each measurement.
+        Empty limits are not set.
+
+        :param filename: the name of the file.
+        """
+        columns = self._columns
+        strings = self._strings
+        with open(filename, "w", encoding="utf-8", newline="") as fp:
+            writer = csv.writer(fp)
+            writer.writerow(self.COLUMNS)
+            writer.writerows(zip(
+                map(strings.__getitem__, columns["name"]),
+                map(strings.__getitem__, columns["unit"]),
+                map(strings.__getitem__, columns["test_case"]),
+                map(repr, columns["value"]),
+                ("" if math.isnan(x) else repr(x) for x in columns["low"]),
+                ("" if math.isnan(x) else repr(x) for x in columns["high"]),
+                map("{:.6f}".format, columns["time"]),
+                columns["passed"]))
+
+    def write_binary(self, filename):
+        """
+        Write the measurements to a binary file with the columns one after the other.
+
+        :param filename: the name of the file.
+
+        The file starts with :code:`LMC1` and the length of a JSON header (4 bytes, little
+        endian). The header has the table of strings, the number of measurements and the type
+        codes of the columns (see the :code:`array` module). After the header, the columns follow
+        in the order of the header, as little endian values.
+        """
+        header = json.dumps({"count": len(self), "strings": self._strings,
+                             "columns": self.COLUMNS}).encode("utf-8")
+        with open(filename, "wb") as fp:
+            fp.write(self._MAGIC + struct.pack("<I", len(header)) + header)
+            for column in self._columns.values():
+                if sys.byteorder == "big":
+                    column = array(column.typecode, column)
+                    column.byteswap()
+                column.tofile(fp)
+
+    @classmethod
+    def read_binary(cls, filename):
+        """
+        Read the measurements from a file that is written by :code:`write_binary()`.
+
+        :param filename: the name of the file.
+        :return: Measurements object.
+        """
+        measurements = cls()
+        with open(filename, "rb") as fp:
+            assert fp.read(4) == cls._MAGIC, f"Not a measurements file: {filename}"
+            header = json.loads(fp.read(struct.unpack("<I", fp.read(4))[0]).decode("utf-8"))
+            for name, typecode in header["columns"].items():
+                column = array(typecode)
+                column.fromfile(fp, header["count"])
+                if sys.byteorder == "big":
+                    column.byteswap()
+                measurements._columns[name] = column
+        measurements._strings = header["strings"]
+        measurements._string_indexes = {text: i for i, text in enumerate(header["strings"])}
+        return measurements
+
+
+if __name__ == "__main__":
+
+    import os
+    import random
+    import tempfile
+    import tracemalloc
+
+    tracemalloc.start()
+    _measurements = Measurements()
+    start_time = time.perf_counter()
+    for i in range(1000000):
+        _measurements.add("Output voltage", random.gauss(5.0, 0.03), "V", 4.9, 5.1,
+                          "MyTestSuite.test_output_voltage")
+    print(f"Added {len(_measurements)} measurements in {time.perf_counter() - start_time:.2f} s, "
+          f"memory {tracemalloc.get_traced_memory()[0] / 1024 / 1024:.1f} MB")
+    for _line in _measurements.get_summary():
+        print(_line)
+    with tempfile.TemporaryDirectory() as temp_folder:
+        _filename = os.path.join(temp_folder, "measurements.lmc")
+        _measurements.write_binary(_filename)
+        print(f"Binary file {os.path.getsize(_filename) / 1024 / 1024:.1f} MB")
+        print(len(Measurements.read_binary(_filename)), "measurements read")
@@ -0,0 +1,106 @@
+"""
+Parametrized test methods.
+"""
+
+import csv
+
+
+class CsvParameters:
+    """
+    Reads parameters for a parametrized test method from a CSV file.
+
+    :param filename: the filename of the CSV file, the first row contains the parameter names.
+    :param converters: optional dictionary with a conversion function per parameter name,
+        e.g.: :code:`{"address": lambda x: int(x, 16)}`. Values without a converter are strings.
+
+    The file is read row by row when the test method is executed, it is never loaded completely.
+    Each row is passed to the test method as keyword arguments.
+    """
+
+    def __init__(self, filename, converters=None):
+        self._filename = filename
+        self._converters = {} if converters is None else converters
+
+    def __iter__(self):
+        with open(self._filename, "r", encoding="utf-8", newline="") as fp:
+            for row in csv.DictReader(fp):
+                for key, converter in self._converters.items():
+                    row[key] = converter(row[key])
+                yield row
+
+
+def parametrize(parameters, name=None):
+    """
+    Decorator for running a test method for each set of parameters.
+    Each set of parameters is reported as a separate test case.
+
+    :param parameters: an iterable with the sets of parameters, a function returning an iterable
+        (e.g. a generator function) or a :code:`CsvParameters` object.
+    :param name: optional function that creates a name from a set of parameters. The name is
+        added to the test case name. By default the index of the set of parameters is used.
+
+    The parameters are not read before the test method is executed. A function or a generator is
+    called when the test method is executed. The sets of parameters are processed one by one,
+    so large sets of parameters do not have to fit in memory. If reading the parameters raises an
+    exception, e.g. a missing CSV file, the test method is reported as a failed test case and the
+    other test methods still run.
+
+    A set of parameters can be a dictionary (passed as keyword arguments), a tuple (passed as
+    positional arguments) or any other value (passed as single argument).
+
+    .. code-block:: python
+
+        import lily_unit_test
+
+        def register_values():
+            for address in range(0x100):
+                yield address, address ^ 0xFF
+
+        class MyTestSuite(lily_unit_test.TestSuite):
+
+            @lily_unit_test.parametrize([1, 2, 3])
+            def test_add_one(self, value):
+                self.fail_if(add_one(value) != value + 1, "Wrong return value")
+
+            @lily_unit_test.parametrize(register_values, name=lambda x: f"0x{x[0]:02X}")
+            def test_register(self, address, value):
+                write_register(address, value)
+                self.fail_if(read_register(address) != value, "Wrong register value")
+
+            @lily_unit_test.parametrize(lily_unit_test.CsvParameters("limits.csv"))
+            def test_limits(self, channel, low, high):
+                # Called with the values from the columns: channel, low, high
+    """
+    def _decorator(test_method):
+        test_method.parameters = parameters
+        test_method.parameters_name = name
+        return test_method
+
+    return _decorator
+
+
+def get_test_cases(test_method_name, test_method):
+    """
+    Generator for the test cases of a test method.
+
+    :param test_method_name: the name of the test method.
+    :param test_method: the (bound) test method.
+    :return: generator with tuples: (test case name, arguments, keyword arguments).
+    """
+    parameters = getattr(test_method, "parameters", None)
+    if parameters is None:
+        yield test_method_name, (), {}
+        return
+
+    if callable(parameters):
+        parameters = parameters()
+    name = test_method.parameters_name
+    for i, parameter in enumerate(parameters):
+        parameter_name = i if name is None else name(parameter)
+        test_case_name = f"{test_method_name}[{parameter_name}]"
+        if isinstance(parameter, dict):
+            yield test_case_name, (), parameter
+        elif isinstance(parameter, tuple):
+            yield test_case_name, parameter, {}
+        else:
+            yield test_case_name, (parameter,), {}
@@ -0,0 +1,326 @@
+"""
+Plugins that receive the events of a test run, e.g. for custom reporting.
+"""
+
+import importlib.metadata
+import inspect
+import queue
+import threading
+
+from lily_unit_test.test_settings import TestSettings
+
+
+class Plugin:
+    """
+    Base class for plugins. Override the methods of the events the plugin needs.
+
+    Only the methods that are overridden are called. When no plugin overrides a method,
+    that event costs nothing. The log message event is called for every log message,
+    only override it when needed.
+
+    By default, the methods are called from the thread that runs the test, so they should return
+    quickly. Set :code:`RUN_IN_BACKGROUND` to True to call the methods from a separate thread.
+    The events are then queued and the tests do not wait for the plugin.
+
+    .. code-block:: python
+
+        import lily_unit_test
+
+        class SlowTestCasesReporter(lily_unit_test.Plugin):
+
+            RUN_IN_BACKGROUND = True
+
+            def __init__(self):
+                self._durations = []
+
+            def case_finished(self, test_suite, test_case, result, duration):
+                self._durations.append((duration, test_case))
+
+            def run_finished(self, result, report_data):
+                for duration, test_case in sorted(self._durations, reverse=True)[:10]:
+                    print(f"{duration:.3f} {test_case}")
+
+        options = {
+            "plugins": [SlowTestCasesReporter()]
+        }
+        lily_unit_test.TestRunner.run(".", options)
+
+    Plugins can also be registered by installed packages, using the entry point group
+    :code:`lily_unit_test.plugins`. The entry point refers to a plugin class or object.
+    For example, in the pyproject.toml of the package that has the plugin:
+
+    .. code-block:: toml
+
+        [project.entry-points."lily_unit_test.plugins"]
+        slow_test_cases = "my_package.reporters:SlowTestCasesReporter"
+    """
+
+    RUN_IN_BACKGROUND = False
+    HOOKS = ("run_started", "suite_started", "case_started", "log_message", "case_finished",
+             "suite_finished", "run_finished")
+
+    def run_started(self, test_suites_path, test_suites):
+        """
+        Called when the test run starts.
+
+        :param test_suites_path: the path with the test suites.
+        :param test_suites: list with the names of the test suites, in order of execution.
+        """
+
+    def suite_started(self, test_suite):
+        """
+        Called when a test suite starts.
+
+        :param test_suite: the name of the test suite.
+        """
+
+    def case_started(self, test_suite, test_case):
+        """
+        Called when a test case starts.
+
+        :param test_suite: the name of the test suite.
+        :param test_case: the name of the test case.
+        """
+
+    def log_message(self, test_suite, message_type, message):
+        """
+        Called for each log message of the test runner and the test suites.
+
+        :param test_suite: the name of the test suite, or "TestRunner".
+        :param message_type: the type of the message (see logger).
+        :param message: the log message as it is written in the log file.
+        """
+
+    def case_finished(self, test_suite, test_case, result, duration):
+        """
+        Called when a test case is finished.
+
+        :param test_suite: the name of the test suite.
+        :param test_case: the name of the test case.
+        :param result: True if the test case is passed.
+        :param duration: the duration of the test case in seconds.
+        """
+
+    def suite_finished(self, test_suite, result, duration, skipped, log_messages):
+        """
+        Called when a test suite is finished.
+
+        :param test_suite: the name of the test suite.
+        :param result: True if the test suite is passed, None if it was skipped because of the
+            time budget.
+        :param duration: the duration of the test suite in seconds.
+        :param skipped: True if the test suite was skipped because of failed dependencies or the
+            time budget.
+        :param log_messages: list with the log messages of the test suite.
+        """
+
+    def run_finished(self, result, report_data):
+        """
+        Called when the test run is finished.
+
+        :param result: True if all test suites are passed.
+        :param report_data: dictionary with the report IDs (e.g. "02_MyTestSuite") and the log
+            messages, the same data that is used for the HTML report.
+        """
+
+    def close(self):
+        """
+        Called after the last event, to release the resources of the plugin.
+        """
+
+
+class _BackgroundPlugin:
+
+    def __init__(self, plugin, handle_error):
+        self._plugin = plugin
+        self._handle_error = handle_error
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._process_queue, daemon=True)
+        self._thread.start()
+
+    def _process_queue(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            name, args, kwargs = item
+            try:
+                getattr(self._plugin, name)(*args, **kwargs)
+            except Exception as e:
+                self._handle_error(self._plugin, name, e)
+        try:
+            self._plugin.close()
+        except Exception as e:
+            self._handle_error(self._plugin, "close", e)
+
+    def get_hook(self, name):
+        return lambda *args, **kwargs: self._queue.put((name, args, kwargs))
+
+    def close(self):
+        self._queue.put(None)
+        self._thread.join()
+
+
+class PluginManager:  # pylint: disable=too-many-instance-attributes
+    """
+    Calls the hooks of the plugins. This is used by the test runner and the test suites.
+
+    :param plugins: list with plugin objects.
+    :param errors: errors that occurred before the test run, e.g. when loading the plugins.
+        They are returned by :code:`get_errors()` like the errors of the hooks.
+
+    For each hook there is an attribute with the same name. The attribute is None if no plugin
+    overrides the hook, so the caller can skip the event with a single check.
+    """
+
+    def __init__(self, plugins, errors=()):
+        self._plugins = list(plugins)
+        self._errors = list(errors)
+        self._lock = threading.Lock()
+        self._background = {plugin: _BackgroundPlugin(plugin, self._handle_error)
+                            for plugin in self._plugins if plugin.RUN_IN_BACKGROUND}
+        self.run_started = self._get_hook("run_started")
+        self.suite_started = self._get_hook("suite_started")
+        self.case_started = self._get_hook("case_started")
+        self.log_message = self._get_hook("log_message")
+        self.case_finished = self._get_hook("case_finished")
+        self.suite_finished = self._get_hook("suite_finished")
+        self.run_finished = self._get_hook("run_finished")
+
+    def _handle_error(self, plugin, name, error):
+        with self._lock:
+            self._errors.append(f"Plugin {plugin.__class__.__name__} failed in {name}: {error}")
+
+    def _get_inline_hook(self, plugin, name):
+        method = getattr(plugin, name)
+
+        def _hook(*args, **kwargs):
+            try:
+                method(*args, **kwargs)
+            except Exception as e:
+                self._handle_error(plugin, name, e)
+
+        return _hook
+
+    def _get_hook(self, name):
+        hooks = []
+        for plugin in self._plugins:
+            if getattr(plugin.__class__, name) is not getattr(Plugin, name):
+                if plugin in self._background:
+                    hooks.append(self._background[plugin].get_hook(name))
+                else:
+                    hooks.append(self._get_inline_hook(plugin, name))
+        if len(hooks) == 0:
+            return None
+        if len(hooks) == 1:
+            return hooks[0]
+
+        def _call_hooks(*args, **kwargs):
+            for hook in hooks:
+                hook(*args, **kwargs)
+
+        return _call_hooks
+
+    def has_hooks(self):
+        """
+        :return: True if at least one plugin overrides at least one hook.
+        """
+        return any(getattr(self, name) is not None for name in Plugin.HOOKS)
+
+    def get_errors(self):
+        """
+        Get the errors from the plugins since the last call. Errors in plugins do not stop the
+        test run.
+
+        :return: list with error messages.
+        """
+        with self._lock:
+            errors = self._errors
+            self._errors = []
+        return errors
+
+    def close(self):
+        """
+        Wait until the background plugins processed all events and close all plugins.
+        """
+        for plugin in self._plugins:
+            if plugin in self._background:
+                self._background[plugin].close()
+            else:
+                try:
+                    plugin.close()
+                except Exception as e:
+                    self._handle_error(plugin, "close", e)
+
+
+def load_entry_point_plugins():
+    """
+    Load the plugins that are registered by installed packages. An entry point that cannot be
+    loaded or a plugin that cannot be created does not stop the test run, it is reported as error.
+
+    :return: tuple with a list with plugin objects and a list with error messages.
+    """
+    plugins = []
+    errors = []
+    for entry_point in importlib.metadata.entry_points(group=TestSettings.PLUGIN_ENTRY_POINT_GROUP):
+        try:
+            plugin = entry_point.load()
+            if inspect.isclass(plugin):
+                plugin = plugin()
+            assert isinstance(plugin, Plugin), "not a Plugin class or object"
+            plugins.append(plugin)
+        except Exception as e:
+            errors.append(f"Plugin entry point {entry_point.name} failed to load: {e}")
+    return plugins, errors
+
+
+if __name__ == "__main__":
+
+    # Benchmark: the overhead of the hooks per test case
+    import time
+
+    from lily_unit_test.parametrize import parametrize
+    from lily_unit_test.test_suite import TestSuite
+
+    N_TEST_CASES = 20000
+
+    class _BenchmarkTestSuite(TestSuite):
+
+        @parametrize(range(N_TEST_CASES))
+        def test_nothing(self, _value):
+            pass
+
+    class _CountingPlugin(Plugin):
+
+        def __init__(self):
+            self.n_cases = 0
+
+        def case_finished(self, test_suite, test_case, result, duration):
+            self.n_cases += 1
+
+    class _BackgroundCountingPlugin(_CountingPlugin):
+
+        RUN_IN_BACKGROUND = True
+
+    def _run_benchmark(plugins):
+        durations = []
+        for _ in range(5):
+            test_suite = _BenchmarkTestSuite()
+            test_suite.log.log_to_stdout(False)
+            if plugins is not None:
+                test_suite._plugins = plugins  # pylint: disable=protected-access
+            start = time.perf_counter()
+            test_suite.run()
+            durations.append(time.perf_counter() - start)
+        return 1e6 * min(durations) / N_TEST_CASES
+
+    plugin_manager = PluginManager([Plugin()])
+    print(f"No plugins                 : {_run_benchmark(None):.2f} us per test case")
+    print(f"Plugin without hooks       : "
+          f"{_run_benchmark(plugin_manager if plugin_manager.has_hooks() else None):.2f} "
+          f"us per test case")
+    print(f"Inline plugin with hook    : "
+          f"{_run_benchmark(PluginManager([_CountingPlugin()])):.2f} us per test case")
+    plugin_manager = PluginManager([_BackgroundCountingPlugin()])
+    print(f"Background plugin with hook: {_run_benchmark(plugin_manager):.2f} us per test case")
+    plugin_manager.close()
@@ -0,0 +1,204 @@
+"""
+Runs test suites in separate processes, so a test suite cannot affect the other test suites.
+"""
+
+import importlib
+import multiprocessing
+import os
+import pickle
+import signal
+import sys
+
+from lily_unit_test.logger import Logger
+from lily_unit_test.resources import ResourceManager
+
+
+class _PluginForwarder:
+    # Sends the test case events from the test suite process to the test runner
+
+    def __init__(self, connection, hooks):
+        self.case_started = None
+        self.case_finished = None
+        for name in hooks:
+            setattr(self, name, self._get_hook(connection, name))
+
+    @staticmethod
+    def _get_hook(connection, name):
+        return lambda *args: connection.send(("hook", name, args))
+
+
+def _run_test_suite_process(connection, test_suites_path, module_name, class_name, options):
+    # pylint: disable=protected-access
+    if test_suites_path not in sys.path:
+        sys.path.append(test_suites_path)
+    try:
+        test_suite = getattr(importlib.import_module(module_name), class_name)
+        ts = test_suite(options["report_folder"])
+    except Exception as e:
+        logger = Logger(False, False)
+        logger.error(f"Test suite {class_name}: FAILED by exception in the test suite process\n"
+                     f"Exception: {e}")
+        for log_message in logger.get_log_messages():
+            connection.send(("log", Logger.TYPE_ERROR, log_message))
+        connection.send(("result", False, []))
+        os._exit(0)
+    # Each log message is sent right away, so the log is complete up to a crash.
+    # The test runner writes the log messages to stdout.
+    ts.log.log_to_stdout(False)
+    ts.log.add_listener(lambda message_type, message: connection.send(("log", message_type,
+                                                                       message)))
+    ts._test_case_filter = set(options["test_case_filter"])
+    ts._test_method_selection = options["test_methods"]
+    ts._measurements_path = options["measurements_path"]
+    ts._deadline = options["deadline"]
+    if options["log_level"] is not None and test_suite.LOG_LEVEL is None:
+        ts.log.set_log_level(options["log_level"])
+    ts._resource_manager = ResourceManager(options["resources"], ts.log)
+    if len(options["hooks"]) > 0:
+        ts._plugins = _PluginForwarder(connection, options["hooks"])
+    result = ts.run()
+    ts._resource_manager.shutdown()
+    connection.send(("result", result is None or result, ts.get_failed_test_cases()))
+    connection.close()
+    sys.stdout.flush()
+    sys.stderr.flush()
+    # Do not wait for threads that the test suite left running
+    os._exit(0)
+
+
+def check_resources(resources):
+    """
+    Check if the shared resources can be sent to the test suite processes. The resources are
+    pickled, so lambdas and nested functions cannot be used.
+
+    :param resources: dictionary with the resource name and a ResourceProvider object or a
+        function that creates the resource.
+    """
+    for name, resource in resources.items():
+        try:
+            pickle.dumps(resource)
+        except Exception as e:
+            raise AssertionError(
+                f"Resource {name} cannot be sent to the processes of process_isolation, because "
+                f"it cannot be pickled. Use a function or class at module level instead of a "
+                f"lambda or nested function. Error: {e}") from e
+
+
+class ProcessIsolation:
+    """
+    Runs each test suite in its own process. The processes are forked from a server process that
+    has the given modules already imported, so starting a process only takes a few milliseconds.
+    On platforms without fork, each process is a new interpreter that imports the modules itself.
+
+    :param preload_modules: list with the names of the modules to import in the server process.
+
+    The server process is started once. When it is already running, the modules of a new
+    ProcessIsolation object are imported by the test suite processes.
+    """
+
+    def __init__(self, preload_modules):
+        if "forkserver" in multiprocessing.get_all_start_methods():
+            self._context = multiprocessing.get_context("forkserver")
+            self._context.set_forkserver_preload(["lily_unit_test"] + list(preload_modules))
+        else:
+            self._context = multiprocessing.get_context("spawn")
+
+    @staticmethod
+    def _get_crash_messages(test_suite_name, exit_code):
+        reason = f"exit code {exit_code}"
+        if exit_code is not None and exit_code < 0:
+            try:
+                reason = f"signal {signal.Signals(-exit_code).name}"
+            except ValueError:
+                reason = f"signal {-exit_code}"
+        logger = Logger(False, False)
+        logger.error(f"Test suite {test_suite_name}: process ended unexpectedly by {reason}")
+        logger.error(f"Test suite {test_suite_name}: FAILED")
+        return logger.get_log_messages()
+
+    def run_test_suite(self, test_suite, test_suites_path, options, on_log=None, on_hook=None):
+        """
+        Run a test suite in a new process.
+
+        :param test_suite: the test suite class.
+        :param test_suites_path: the path that is needed to import the module of the test suite.
+        :param options: dictionary with the report_folder, log_level, resources,
+            test_case_filter (list with test case names), test_methods (list with the names of the
+            selected test methods or None for all), measurements_path (the path and the start of
+            the filenames of the measurement files or None), deadline (the value of
+            :code:`time.monotonic()` after which no test cases start or None) and hooks (list
+            with the names of the test case events to forward).
+        :param on_log: function that is called with the message type and message for each log
+            message of the test suite.
+        :param on_hook: function that is called with the name and the arguments of each
+            forwarded test case event.
+        :return: tuple with the result, the log messages and the names of the failed test cases.
+        """
+        receiver, sender = self._context.Pipe(duplex=False)
+        # Not a daemon, daemons cannot start processes, like the workers of a load scenario
+        process = self._context.Process(target=_run_test_suite_process,
+                                        args=(sender, test_suites_path, test_suite.__module__,
+                                              test_suite.__name__, options))
+        process.start()
+        # Only the process has the sending end open, so receiving stops when the process ends
+        sender.close()
+        log_messages = []
+        result = None
+        failed_test_cases = []
+        while True:
+            try:
+                item = receiver.recv()
+            except EOFError:
+                break
+            if item[0] == "log":
+                log_messages.append(item[2])
+                if on_log is not None:
+                    on_log(item[1], item[2])
+            elif item[0] == "hook":
+                if on_hook is not None:
+                    on_hook(item[1], *item[2])
+            else:
+                result, failed_test_cases = item[1], item[2]
+        receiver.close()
+        process.join()
+        if result is None:
+            for log_message in self._get_crash_messages(test_suite.__name__, process.exitcode):
+                log_messages.append(log_message)
+                if on_log is not None:
+                    on_log(Logger.TYPE_ERROR, log_message)
+            result = False
+        return result, log_messages, failed_test_cases
+
+
+if __name__ == "__main__":
+
+    import tempfile
+    import time
+
+    _TEST_SUITE = """
+import os
+import signal
+import lily_unit_test
+
+class CrashingTestSuite(lily_unit_test.TestSuite):
+
+    def test_crash(self):
+        print("Crash the process")
+        os.kill(os.getpid(), signal.SIGSEGV)
+"""
+
+    isolation = ProcessIsolation([])
+    _options = {"report_folder": None, "log_level": None, "resources": {}, "test_case_filter": [],
+                "test_methods": None, "measurements_path": None, "deadline": None, "hooks": []}
+    with tempfile.TemporaryDirectory() as temp_folder:
+        with open(os.path.join(temp_folder, "crashing_test_suite.py"), "w",
+                  encoding="utf-8") as fp:
+            fp.write(_TEST_SUITE)
+        sys.path.append(temp_folder)
+        _test_suite = importlib.import_module("crashing_test_suite").CrashingTestSuite
+        for _ in range(3):
+            start = time.perf_counter()
+            _result, _log_messages, _ = isolation.run_test_suite(_test_suite, temp_folder,
+                                                                 _options)
+            print(f"Result: {_result}, duration {1000 * (time.perf_counter() - start):.1f} ms")
+        print("\n".join(_log_messages))
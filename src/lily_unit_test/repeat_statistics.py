@@ -0,0 +1,138 @@
+"""
+Statistics of test cases that are run many times, to find flaky test cases.
+"""
+
+import json
+import math
+import os
+
+from array import array
+
+from lily_unit_test.plugins import Plugin
+
+
+class RepeatStatistics(Plugin):
+    """
+    Plugin that counts the passed and failed runs and keeps the durations of each test case.
+    The test runner uses this plugin when the test suites are repeated.
+
+    A test case is flaky when it failed in some runs, but not in all runs.
+    """
+
+    def __init__(self):
+        # Test case name: [number of runs, number of failures, durations]
+        self._test_cases = {}
+
+    def case_finished(self, test_suite, test_case, result, duration):
+        # Test cases of a test suite run one by one, so no lock is needed
+        item = self._test_cases.get(test_case)
+        if item is None:
+            item = self._test_cases.setdefault(test_case, [0, 0, array("d")])
+        item[0] += 1
+        if not result:
+            item[1] += 1
+        item[2].append(duration)
+
+    def merge(self, other):
+        """
+        Add the statistics of another object, e.g. from a worker process.
+
+        :param other: RepeatStatistics object.
+        """
+        # pylint: disable=protected-access
+        for test_case, (n_runs, n_failed, durations) in other._test_cases.items():
+            item = self._test_cases.setdefault(test_case, [0, 0, array("d")])
+            item[0] += n_runs
+            item[1] += n_failed
+            item[2].extend(durations)
+
+    def get_test_cases(self):
+        """
+        :return: list with the names of the test cases, in order of the first run.
+        """
+        return list(self._test_cases)
+
+    def get_statistics(self, test_case):
+        """
+        :param test_case: the name of the test case.
+        :return: dictionary with the number of runs, the number of failures, the failure rate and
+            the minimum, median, 95th percentile and maximum duration in seconds.
+        """
+        n_runs, n_failed, durations = self._test_cases[test_case]
+        durations = sorted(durations)
+        return {
+            "runs": n_runs,
+            "failed": n_failed,
+            "failure_rate": n_failed / n_runs,
+            "min": durations[0],
+            "median": durations[(n_runs - 1) // 2],
+            "p95": durations[max(0, math.ceil(0.95 * n_runs) - 1)],
+            "max": durations[-1]
+        }
+
+    def get_flaky_test_cases(self):
+        """
+        :return: list with the names of the test cases that failed in some runs, but not in all.
+        """
+        return [test_case for test_case, (n_runs, n_failed, _) in self._test_cases.items()
+                if 0 < n_failed < n_runs]
+
+    def get_failed_test_cases(self):
+        """
+        :return: list with the names of the test cases that failed in all runs.
+        """
+        return [test_case for test_case, (n_runs, n_failed, _) in self._test_cases.items()
+                if n_failed == n_runs]
+
+    def get_summary(self):
+        """
+        :return: list with tuples of the test case name and a line with its statistics,
+            the flaky and failed test cases first.
+        """
+        flaky = set(self.get_flaky_test_cases())
+        failed = set(self.get_failed_test_cases())
+        lines = []
+        for test_case in sorted(self._test_cases, key=lambda x: (x not in flaky, x not in failed)):
+            values = self.get_statistics(test_case)
+            status = "PASSED"
+            if test_case in flaky:
+                status = "FLAKY"
+            elif test_case in failed:
+                status = "FAILED"
+            line = (f"{test_case}: {status}, {values['failed']} of {values['runs']} runs failed "
+                    f"({100 * values['failure_rate']:.1f}%), duration min {values['min']:.3f}, "
+                    f"median {values['median']:.3f}, p95 {values['p95']:.3f}, "
+                    f"max {values['max']:.3f} seconds")
+            lines.append((test_case, line))
+        return lines
+
+    def write(self, filename, time_stamp, repeat, test_suites):
+        """
+        Write the statistics of the test suites and test cases to a JSON file.
+
+        :param filename: the name of the file.
+        :param time_stamp: the time stamp of the test run.
+        :param repeat: the number of repetitions.
+        :param test_suites: dictionary with the report IDs of the test suites and dictionaries
+            with their number of runs and passed runs.
+        """
+        os.makedirs(os.path.dirname(filename), exist_ok=True)
+        with open(filename, "w", encoding="utf-8") as fp:
+            json.dump({
+                "time_stamp": time_stamp,
+                "repeat": repeat,
+                "test_suites": test_suites,
+                "test_cases": {test_case: self.get_statistics(test_case)
+                               for test_case in self._test_cases},
+                "flaky_test_cases": self.get_flaky_test_cases()
+            }, fp, indent=2)
+
+
+if __name__ == "__main__":
+
+    statistics = RepeatStatistics()
+    for i in range(20):
+        statistics.case_finished("MyTestSuite", "MyTestSuite.test_stable", True, 0.01 + i / 1000)
+        statistics.case_finished("MyTestSuite", "MyTestSuite.test_flaky", i % 7 != 0, 0.02)
+    for _test_case, summary_line in statistics.get_summary():
+        print(summary_line)
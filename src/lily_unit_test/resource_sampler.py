@@ -0,0 +1,287 @@
+"""
+Samples the resource usage of the test process, to see where the time of a test suite goes.
+"""
+
+import json
+import os
+import threading
+import time
+
+from array import array
+
+from lily_unit_test.plugins import Plugin
+from lily_unit_test.test_settings import TestSettings
+
+
+class ResourceSampler(Plugin):  # pylint: disable=too-many-instance-attributes
+    """
+    Plugin that samples the resource usage of the test process and its child processes in a
+    background thread. The test runner uses this plugin with the :code:`resource_sampling` option.
+
+    :param interval: time between the samples in seconds.
+
+    Each sample has the CPU time, the resident memory, the number of threads and open files and
+    the number of bytes read and written. The values are read from :code:`/proc`, including the
+    child processes, like local simulators. Without :code:`/proc`, only the CPU time and the
+    number of threads of the Python process are sampled.
+
+    Each sample is attributed to the test suites and test cases that are running. When test
+    suites run in parallel, a sample is attributed to all of them, because the resources are
+    shared by the process.
+    """
+
+    COLUMNS = ("time", "cpu", "rss", "threads", "fds", "read_chars", "write_chars", "read_bytes",
+               "write_bytes")
+
+    def __init__(self, interval=TestSettings.RESOURCE_SAMPLING_INTERVAL):
+        self._interval = interval
+        self._use_proc = os.path.isfile("/proc/self/stat")
+        self._page_size = os.sysconf("SC_PAGE_SIZE") if self._use_proc else 0
+        self._ticks = os.sysconf("SC_CLK_TCK") if self._use_proc else 1
+        self._columns = {name: array("d") for name in self.COLUMNS}
+        # Index in the list of running test suites and test cases for each sample
+        self._labels = []
+        self._label_indexes = {}
+        self._running = {}
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread = None
+        self._start_time = 0
+
+    ###########
+    # Private #
+    ###########
+
+    def _read_proc_values(self, pid):
+        # CPU time, resident memory, threads and the I/O counters of a process
+        with open(f"/proc/{pid}/stat", "r", encoding="utf-8") as fp:
+            data = fp.read()
+        # The process name can have spaces, the fields after the name start at index 3
+        fields = data[data.rindex(")") + 2:].split()
+        values = [(int(fields[11]) + int(fields[12]) + int(fields[13]) + int(fields[14])) /
+                  self._ticks, int(fields[21]) * self._page_size, int(fields[17])]
+        io_values = dict.fromkeys(("rchar", "wchar", "read_bytes", "write_bytes"), 0)
+        try:
+            with open(f"/proc/{pid}/io", "r", encoding="utf-8") as fp:
+                for line in fp:
+                    key, value = line.split(":")
+                    if key in io_values:
+                        io_values[key] = int(value)
+        except OSError:
+            # Not allowed for processes of other users
+            pass
+        return values + list(io_values.values())
+
+    @staticmethod
+    def _get_child_processes(pid):
+        children_files = [f"/proc/{pid}/task/{task}/children"
+                          for task in os.listdir(f"/proc/{pid}/task")]
+        if os.path.isfile(children_files[0]):
+            children = []
+            for filename in children_files:
+                with open(filename, "r", encoding="utf-8") as fp:
+                    children.extend(fp.read().split())
+            return children
+        # Kernel without children files, find the processes with this parent
+        children = []
+        for name in filter(str.isdigit, os.listdir("/proc")):
+            try:
+                with open(f"/proc/{name}/stat", "r", encoding="utf-8") as fp:
+                    data = fp.read()
+            except OSError:
+                continue
+            if data[data.rindex(")") + 2:].split()[1] == str(pid):
+                children.append(name)
+        return children
+
+    def _read_sample(self):
+        if not self._use_proc:
+            times = os.times()
+            return [times.user + times.system + times.children_user + times.children_system, 0,
+                    threading.active_count(), 0, 0, 0, 0, 0]
+        values = self._read_proc_values("self")
+        values.insert(3, len(os.listdir("/proc/self/fd")))
+        pids = self._get_child_processes(os.getpid())
+        while len(pids) > 0:
+            pid = pids.pop()
+            try:
+                child_values = self._read_proc_values(pid)
+                pids.extend(self._get_child_processes(pid))
+            except (OSError, ValueError, IndexError):
+                # The process ended while reading
+                continue
+            for i, value in enumerate(child_values[:3] + [0] + child_values[3:]):
+                values[i] += value
+        return values
+
+    def _add_sample(self):
+        values = self._read_sample()
+        with self._lock:
+            label = tuple(sorted(self._running.items()))
+        if label not in self._label_indexes:
+            self._label_indexes[label] = len(self._labels)
+            self._labels.append(label)
+        self._columns["time"].append(time.perf_counter() - self._start_time)
+        for name, value in zip(self.COLUMNS[1:], values):
+            self._columns[name].append(value)
+        self._columns.setdefault("label", array("L")).append(self._label_indexes[label])
+
+    def _sample(self):
+        while True:
+            self._add_sample()
+            if self._stop_event.wait(self._interval):
+                break
+        # The last sample ends the last interval, also when it is shorter than the interval
+        self._add_sample()
+
+    ##########
+    # Events #
+    ##########
+
+    def run_started(self, test_suites_path, test_suites):
+        self.start()
+
+    def suite_started(self, test_suite):
+        with self._lock:
+            self._running[test_suite] = ""
+
+    def case_started(self, test_suite, test_case):
+        with self._lock:
+            self._running[test_suite] = test_case
+
+    def case_finished(self, test_suite, test_case, result, duration):
+        with self._lock:
+            self._running[test_suite] = ""
+
+    def suite_finished(self, test_suite, result, duration, skipped, log_messages):
+        with self._lock:
+            self._running.pop(test_suite, None)
+
+    def close(self):
+        self.stop()
+
+    ##########
+    # Public #
+    ##########
+
+    def start(self):
+        """
+        Start sampling in the background.
+        """
+        if self._thread is None:
+            self._start_time = time.perf_counter()
+            self._thread = threading.Thread(target=self._sample, daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """
+        Take a last sample and stop sampling.
+        """
+        if self._thread is not None and self._thread.is_alive():
+            self._stop_event.set()
+            self._thread.join()
+
+    def get_timeline(self):
+        """
+        Get all samples, the values are cumulative from the start of the process.
+
+        :return: dictionary with a list of values for each column (see COLUMNS), time and CPU in
+            seconds, memory in bytes. The column 'running' has for each sample a list with the
+            running test suites and test cases, the test case is empty between test cases.
+        """
+        timeline = {name: self._columns[name].tolist() for name in self.COLUMNS}
+        timeline["running"] = [list(map(list, self._labels[i]))
+                               for i in self._columns.get("label", [])]
+        return timeline
+
+    def get_summary(self, test_suite):
+        """
+        Get the resource usage during the test suite.
+
+        :param test_suite: the name of the test suite.
+        :return: dictionary with the duration and CPU time in seconds, the CPU usage (1.0 is one
+            CPU core), the maximum memory, threads and open files, the bytes read and written
+            (all I/O and disk only) and a list with the CPU usage of each sample interval.
+            None if there are no samples of the test suite.
+        """
+        columns = self._columns
+        summary = None
+        for i in range(1, len(columns["time"])):
+            if test_suite not in dict(self._labels[columns["label"][i - 1]]):
+                continue
+            if summary is None:
+                summary = dict.fromkeys(("duration", "cpu", "rss", "threads", "fds", "read_chars",
+                                         "write_chars", "read_bytes", "write_bytes"), 0)
+                summary["cpu_usage"] = []
+            duration = columns["time"][i] - columns["time"][i - 1]
+            cpu = columns["cpu"][i] - columns["cpu"][i - 1]
+            summary["duration"] += duration
+            summary["cpu"] += cpu
+            summary["cpu_usage"].append(cpu / duration if duration > 0 else 0)
+            for name in ("rss", "threads", "fds"):
+                summary[name] = max(summary[name], columns[name][i - 1], columns[name][i])
+            for name in ("read_chars", "write_chars", "read_bytes", "write_bytes"):
+                # Child processes that end take their counters with them
+                summary[name] += max(0, columns[name][i] - columns[name][i - 1])
+        if summary is not None:
+            summary["cpu_usage_mean"] = summary["cpu"] / max(summary["duration"], 1e-9)
+        return summary
+
+    def get_summary_text(self, test_suite):
+        """
+        :param test_suite: the name of the test suite.
+        :return: one line with the summary of the test suite, or an empty string if there are no
+            samples of the test suite.
+        """
+        summary = self.get_summary(test_suite)
+        if summary is None:
+            return ""
+        mb = 1024 * 1024
+        return (f"CPU {summary['cpu']:.2f} s ({100 * summary['cpu_usage_mean']:.0f}% of "
+                f"{summary['duration']:.2f} s), max RSS {summary['rss'] / mb:.1f} MB, "
+                f"max threads {summary['threads']:.0f}, max open files {summary['fds']:.0f}, "
+                f"I/O read {summary['read_chars'] / mb:.1f} MB, "
+                f"write {summary['write_chars'] / mb:.1f} MB, "
+                f"disk read {summary['read_bytes'] / mb:.1f} MB, "
+                f"write {summary['write_bytes'] / mb:.1f} MB")
+
+    def write(self, filename, time_stamp, test_suites):
+        """
+        Write the summaries of the test suites and all samples to a JSON file.
+
+        :param filename: the name of the file.
+        :param time_stamp: the time stamp of the test run.
+        :param test_suites: list with the names of the test suites.
+        """
+        os.makedirs(os.path.dirname(filename), exist_ok=True)
+        with open(filename, "w", encoding="utf-8") as fp:
+            json.dump({
+                "time_stamp": time_stamp,
+                "interval": self._interval,
+                "test_suites": {x: self.get_summary(x) for x in test_suites},
+                "timeline": self.get_timeline()
+            }, fp, separators=(",", ":"))
+
+
+if __name__ == "__main__":
+
+    import subprocess
+    import sys
+
+    sampler = ResourceSampler(0.05)
+    sampler.start()
+    sampler.suite_started("MyTestSuite")
+    sampler.case_started("MyTestSuite", "MyTestSuite.test_busy")
+    end_time = time.perf_counter() + 0.5
+    while time.perf_counter() < end_time:
+        pass
+    sampler.case_finished("MyTestSuite", "MyTestSuite.test_busy", True, 0.5)
+    sampler.case_started("MyTestSuite", "MyTestSuite.test_child_process")
+    subprocess.run([sys.executable, "-c", "sum(range(20000000))"], check=True)
+    sampler.case_finished("MyTestSuite", "MyTestSuite.test_child_process", True, 0.5)
+    sampler.case_started("MyTestSuite", "MyTestSuite.test_waiting")
+    time.sleep(0.5)
+    sampler.suite_finished("MyTestSuite", True, 1.5, False, [])
+    sampler.stop()
+    print(sampler.get_summary_text("MyTestSuite"))
+    print([f"{x:.2f}" for x in sampler.get_summary("MyTestSuite")["cpu_usage"]])
@@ -0,0 +1,149 @@
+"""
+Shared resources for test suites that are created once per test run.
+"""
+
+import threading
+import traceback
+
+
+class ResourceProvider:
+    """
+    Base class for a provider of a shared resource, like an instrument connection or a
+    simulator process.
+
+    The test runner creates the resource when a test suite requests it for the first time.
+    The same resource is given to all test suites that request it during the test run.
+    The resource is destroyed when no other test suite that still has to run needs it.
+
+    .. code-block:: python
+
+        import lily_unit_test
+
+        class PowerSupplyProvider(lily_unit_test.ResourceProvider):
+
+            def create(self):
+                return PowerSupply.connect("192.168.1.10")
+
+            def destroy(self, resource):
+                resource.disconnect()
+
+
+        class MyTestSuite(lily_unit_test.TestSuite):
+            # Declare the resources, this keeps them alive until the last test suite that uses them
+            RESOURCES = ["power_supply"]
+
+            def test_voltage(self):
+                power_supply = self.get_resource("power_supply")
+                power_supply.set_voltage(5)
+
+
+        options = {
+            "resources": {
+                "power_supply": PowerSupplyProvider()
+            }
+        }
+        lily_unit_test.TestRunner.run(".", options)
+
+    Instead of a resource provider object, a function that returns the resource can be used.
+    In that case the resource is not explicitly destroyed.
+    """
+
+    def create(self):
+        """
+        Create the resource. Must be overridden.
+
+        :return: the resource object.
+        """
+        raise NotImplementedError("The create method must be implemented")
+
+    def destroy(self, resource):
+        """
+        Destroy the resource. This can be overridden when the resource needs to be cleaned up.
+
+        :param resource: the resource object that was returned by the create method.
+        """
+
+
+class ResourceManager:
+    """
+    Creates, caches and destroys the shared resources for a test run.
+    This is used by the test runner.
+
+    :param providers: dictionary with the resource name and the resource provider (or function).
+    :param logger: logger for writing messages about creating and destroying resources.
+    """
+
+    def __init__(self, providers, logger):
+        self._providers = providers
+        self._logger = logger
+        self._resources = {}
+        self._usage = {}
+        self._lock = threading.RLock()
+
+    def _destroy(self, name):
+        resource = self._resources.pop(name)
+        provider = self._providers[name]
+        self._logger.info(f"Destroy resource: {name}")
+        if isinstance(provider, ResourceProvider):
+            try:
+                provider.destroy(resource)
+            except Exception as e:
+                self._logger.error(f"Destroying resource '{name}' failed\nException: {e}")
+                self._logger.error(traceback.format_exc().strip())
+
+    def get_resource(self, name, test_suite_name):
+        """
+        Get a resource, the resource is created if it does not exist yet.
+
+        :param name: the name of the resource.
+        :param test_suite_name: the name of the test suite that requests the resource.
+        :return: the resource object.
+        """
+        assert name in self._providers, f"Resource '{name}' is not defined"
+        with self._lock:
+            self._usage.setdefault(name, [])
+            if test_suite_name not in self._usage[name]:
+                self._usage[name].append(test_suite_name)
+            if name not in self._resources:
+                self._logger.info(f"Create resource: {name} (requested by {test_suite_name})")
+                provider = self._providers[name]
+                if isinstance(provider, ResourceProvider):
+                    self._resources[name] = provider.create()
+                else:
+                    self._resources[name] = provider()
+            return self._resources[name]
+
+    def release(self, test_suites_to_run):
+        """
+        Destroy the resources that are not declared by any of the test suites that still have to
+        run.
+
+        :param test_suites_to_run: list with the test suite classes that still have to run.
+        """
+        with self._lock:
+            needed = set()
+            for test_suite in test_suites_to_run:
+                needed.update(test_suite.RESOURCES)
+            for name in list(self._resources):
+                if name not in needed:
+                    self._destroy(name)
+
+    def get_usage(self):
+        """
+        Get the test suites that used each resource, in order of use.
+        Test suites that use the same resource can be grouped together.
+
+        :return: dictionary with the resource name and a list of test suite names.
+        """
+        with self._lock:
+            return {name: list(test_suites) for name, test_suites in self._usage.items()}
+
+    def shutdown(self):
+        """
+        Destroy all resources that still exist and log which test suites used the resources.
+        """
+        with self._lock:
+            for name in list(self._resources):
+                self._destroy(name)
+            for name, test_suite_names in self._usage.items():
+                self._logger.info(f"Resource {name} used by: {', '.join(test_suite_names)}")
@@ -0,0 +1,150 @@
+"""
+Scheduler for running test suites in order of their dependencies.
+"""
+
+
+class TestScheduler:
+    """
+    Determines the order of the test suites from their dependencies.
+
+    :param test_suites: list with test suite classes, in the preferred order.
+    :param run_first: name of the test suite that must run before all other test suites.
+    :param run_last: name of the test suite that must run after all other test suites.
+
+    Test suites declare their dependencies by class name in the :code:`DEPENDS_ON` attribute.
+    A test suite only runs when all test suites it depends on are passed.
+    If more test suites have the same class name, the test suite depends on all of them.
+    Dependencies on test suites that are not part of the test run (e.g. excluded by the options)
+    are ignored. Test suites without dependencies between them keep the order of the given list.
+
+    The test suites to run first and last only determine the order, they are not dependencies.
+    The test suite to run last also runs when other test suites failed.
+    """
+
+    def __init__(self, test_suites, run_first=None, run_last=None):
+        self._test_suites = list(test_suites)
+        self._run_first_and_last = {run_first, run_last} - {None, ""}
+        self._dependencies = {}
+        self._predecessors = {}
+        for test_suite in self._test_suites:
+            names = set(test_suite.DEPENDS_ON)
+            self._dependencies[test_suite] = self._get_test_suites(test_suite, names)
+            if run_first is not None and test_suite.__name__ != run_first:
+                names.add(run_first)
+            if test_suite.__name__ == run_last:
+                names.update(map(lambda x: x.__name__, self._test_suites))
+            self._predecessors[test_suite] = self._get_test_suites(test_suite, names)
+
+        self._check_cycles()
+        self._order = self._sort()
+
+    def _get_test_suites(self, test_suite, names):
+        return {x for x in self._test_suites if x is not test_suite and x.__name__ in names}
+
+    def _check_cycles(self):
+        # Depth first search, keeping track of the path to report the cycle
+        visited = set()
+        path = []
+
+        def _visit(test_suite):
+            if test_suite in path:
+                cycle = [x.__name__ for x in path[path.index(test_suite):] + [test_suite]]
+                raise AssertionError(f"Dependency cycle in test suites: {' -> '.join(cycle)}")
+            if test_suite in visited:
+                return
+            path.append(test_suite)
+            for predecessor in self._predecessors[test_suite]:
+                _visit(predecessor)
+            path.pop()
+            visited.add(test_suite)
+
+        for item in self._test_suites:
+            _visit(item)
+
+    def _get_all_dependencies(self, test_suite):
+        # The dependencies of the test suite and of its dependencies
+        dependencies = set()
+        remaining = [test_suite]
+        while len(remaining) > 0:
+            for dependency in self._dependencies[remaining.pop()]:
+                if dependency not in dependencies:
+                    dependencies.add(dependency)
+                    remaining.append(dependency)
+        return dependencies
+
+    def _sort(self):
+        # Take the first test suite from the list of which all dependencies are done
+        order = []
+        done = set()
+        remaining = list(self._test_suites)
+        while len(remaining) > 0:
+            for test_suite in remaining:
+                if self._predecessors[test_suite].issubset(done):
+                    order.append(test_suite)
+                    done.add(test_suite)
+                    remaining.remove(test_suite)
+                    break
+        return order
+
+    def get_order(self):
+        """
+        :return: list with the test suite classes in the order they can be executed one by one.
+        """
+        return list(self._order)
+
+    def get_dependencies(self, test_suite):
+        """
+        :param test_suite: the test suite class.
+        :return: set with the test suite classes that must pass before the test suite can run.
+        """
+        return set(self._dependencies[test_suite])
+
+    def get_predecessors(self, test_suite):
+        """
+        :param test_suite: the test suite class.
+        :return: set with the test suite classes that must be finished before the test suite
+            can run, these are the dependencies and the test suite to run first or last.
+        """
+        return set(self._predecessors[test_suite])
+
+    def select_within_budget(self, durations, time_budget):
+        """
+        Select the test suites that fit in a time budget. The test suites are tried in the order
+        of the given list. A test suite is selected together with the test suites it depends on,
+        if their expected durations fit in the remaining budget. Else it is not selected and the
+        next test suite is tried. The test suites to run first and last are always selected.
+
+        :param durations: dictionary with the test suite class and the expected duration in
+            seconds. Test suites without an expected duration count as zero seconds.
+        :param time_budget: the time budget in seconds.
+        :return: set with the selected test suite classes.
+        """
+        selected = set()
+        total = 0
+        required = [x for x in self._test_suites if x.__name__ in self._run_first_and_last]
+        for test_suite in required + self._test_suites:
+            needed = ({test_suite} | self._get_all_dependencies(test_suite)) - selected
+            duration = sum(durations.get(x, 0) for x in needed)
+            if test_suite in required or total + duration <= time_budget:
+                selected.update(needed)
+                total += duration
+        return selected
+
+    def get_critical_path(self, durations):
+        """
+        Get the chain of dependent test suites with the longest total duration.
+        This chain determines the minimum duration of the test run, regardless of the number of
+        test suites that run in parallel.
+
+        :param durations: dictionary with the test suite class and the duration in seconds.
+        :return: tuple with the list of test suite names and the total duration in seconds.
+        """
+        paths = {}
+        for test_suite in self._order:
+            path, duration = [], 0
+            for predecessor in self._predecessors[test_suite]:
+                if paths[predecessor][1] > duration:
+                    path, duration = paths[predecessor]
+            paths[test_suite] = (path + [test_suite.__name__],
+                                 duration + durations.get(test_suite, 0))
+        return max(paths.values(), key=lambda x: x[1], default=([], 0))
@@ -0,0 +1,170 @@
+"""
+Selection of test suites and test methods by name patterns and tags.
+"""
+
+import fnmatch
+import re
+
+
+def tags(*names):
+    """
+    Decorator for adding tags to a test method. Test methods can be selected by their tags with
+    the :code:`include_test_suites` and :code:`exclude_test_suites` options of the test runner.
+    Tags of a complete test suite are set with its :code:`TAGS` attribute.
+
+    :param names: the tags.
+
+    .. code-block:: python
+
+        import lily_unit_test
+
+        class MyTestSuite(lily_unit_test.TestSuite):
+
+            TAGS = ["power_supply"]
+
+            @lily_unit_test.tags("smoke")
+            def test_voltage(self):
+                # Runs with "tag:smoke" and "tag:power_supply"
+
+            @lily_unit_test.tags("slow", "calibration")
+            def test_calibration(self):
+                # Runs with "tag:slow", "tag:calibration" and "tag:power_supply"
+    """
+    def _decorator(test_method):
+        test_method.tags = set(getattr(test_method, "tags", set())) | set(names)
+        return test_method
+
+    return _decorator
+
+
+class TestSelector:
+    """
+    Selects test suites and test methods by patterns. The patterns are compiled once.
+
+    :param include: list with patterns of what to run, if empty everything runs.
+    :param exclude: list with patterns of what to skip.
+
+    The patterns can be:
+
+    | :code:`"MyTestSuite"`: the test suite with this class name.
+    | :code:`"MyTestSuite.test_something"`: one test method of a test suite.
+    | :code:`"Test*"`, :code:`"MyTestSuite.test_power_*"`: glob patterns (:code:`*`, :code:`?`,
+      :code:`[abc]`), for the test suite name and the test method name.
+    | :code:`"re:<regular expression>"`: the test suites of which the name contains a match and
+      the test methods of which :code:`"MyTestSuite.test_something"` contains a match.
+    | :code:`"tag:<tag>"`: the test suites and test methods with this tag.
+
+    A selected test method runs all its parametrized test cases.
+    """
+
+    _NAME, _REGEX, _TAG = range(3)
+    _NAME_IN_SOURCE = re.compile(r"\w+")
+    _STAR_IMPORT = re.compile(r"\bimport\s+\*")
+
+    def __init__(self, include=(), exclude=()):
+        self._include = [self._compile(pattern) for pattern in include]
+        self._exclude = [self._compile(pattern) for pattern in exclude]
+
+    @classmethod
+    def _compile(cls, pattern):
+        if pattern.startswith("tag:"):
+            return cls._TAG, pattern[4:], None
+        if pattern.startswith("re:"):
+            return cls._REGEX, re.compile(pattern[3:]), None
+        test_suite_pattern, _, method_pattern = pattern.partition(".")
+        return (cls._NAME, re.compile(fnmatch.translate(test_suite_pattern)),
+                None if method_pattern == "" else re.compile(fnmatch.translate(method_pattern)))
+
+    @classmethod
+    def _matches_test_suite(cls, pattern, test_suite):
+        kind, value, method_pattern = pattern
+        if kind == cls._NAME:
+            return method_pattern is None and value.match(test_suite.__name__) is not None
+        if kind == cls._REGEX:
+            return value.search(test_suite.__name__) is not None
+        return value in test_suite.TAGS
+
+    @classmethod
+    def _matches_test_method(cls, pattern, test_suite, method_name, test_method):
+        kind, value, method_pattern = pattern
+        if kind == cls._NAME:
+            return (method_pattern is not None and value.match(test_suite.__name__) is not None and
+                    method_pattern.match(method_name) is not None)
+        if kind == cls._REGEX:
+            return value.search(f"{test_suite.__name__}.{method_name}") is not None
+        return value in getattr(test_method, "tags", ())
+
+    def is_selecting(self):
+        """
+        :return: True if there are patterns, False if everything is selected.
+        """
+        return len(self._include) > 0 or len(self._exclude) > 0
+
+    def may_match_source(self, source):
+        """
+        Check the source code of a module before it is imported. Only when all include patterns
+        are names or globs, the names in the source code are enough to know if there can be a
+        match. All names are checked, not only the class definitions, so test suites that are
+        imported from other modules are also found. Modules with :code:`import *` are always
+        imported.
+
+        :param source: the source code of the module.
+        :return: False if the module has no test suites that can be selected.
+        """
+        if len(self._include) == 0 or any(x[0] != self._NAME for x in self._include):
+            return True
+        if self._STAR_IMPORT.search(source) is not None:
+            return True
+        names = set(self._NAME_IN_SOURCE.findall(source))
+        return any(pattern[1].match(name) is not None
+                   for pattern in self._include for name in names)
+
+    def get_test_methods(self, test_suite):
+        """
+        :param test_suite: the test suite class.
+        :return: None if the test suite runs completely, else a list with the names of the
+            selected test methods. The list is empty if the test suite is not selected.
+        """
+        if any(self._matches_test_suite(x, test_suite) for x in self._exclude):
+            return []
+        test_suite_included = (len(self._include) == 0 or
+                               any(self._matches_test_suite(x, test_suite) for x in self._include))
+        test_methods = [(name, value) for name, value in vars(test_suite).items()
+                        if name.startswith("test_")]
+        selected = []
+        for name, value in test_methods:
+            if not test_suite_included and not any(
+                    self._matches_test_method(x, test_suite, name, value) for x in self._include):
+                continue
+            if any(self._matches_test_method(x, test_suite, name, value) for x in self._exclude):
+                continue
+            selected.append(name)
+        if test_suite_included and len(selected) == len(test_methods):
+            return None
+        return selected
+
+
+if __name__ == "__main__":
+
+    from lily_unit_test.test_suite import TestSuite
+
+    class MyTestSuite(TestSuite):
+
+        TAGS = ["power_supply"]
+
+        @tags("smoke")
+        def test_voltage(self):
+            pass
+
+        @tags("slow")
+        def test_calibration(self):
+            pass
+
+    for include_patterns, exclude_patterns in ((["MyTestSuite"], []),
+                                               (["My*.test_v*"], []),
+                                               (["tag:smoke"], []),
+                                               (["tag:power_supply"], ["tag:slow"]),
+                                               (["re:Suite\\.test_c"], []),
+                                               (["Other"], [])):
+        selector = TestSelector(include_patterns, exclude_patterns)
+        print(f"{include_patterns} {exclude_patterns}: {selector.get_test_methods(MyTestSuite)}")
@@ -0,0 +1,167 @@
+"""
+Rolling statistics of a soak test, that runs the test suites over and over for a long time.
+"""
+
+import json
+import math
+import os
+import time
+
+from collections import deque
+
+from lily_unit_test.test_settings import TestSettings
+
+
+class SoakStatistics:  # pylint: disable=too-many-instance-attributes
+    """
+    Keeps the statistics of the last iterations of a soak test, so the memory does not grow with
+    the number of iterations. The test runner uses this class with the :code:`soak_duration` and
+    :code:`soak_iterations` options.
+
+    :param window: the number of iterations for the rolling statistics.
+
+    The statistics are:
+
+    | pass rate: the percentage of the passed test suites in the last iterations.
+    | duration drift: how much slower the last iterations are than the first iterations, in
+      percent.
+    | memory trend: how much the resident memory of the test process grows per hour, from a linear
+      fit of the last iterations. Without :code:`/proc`, the memory is not measured.
+    """
+
+    def __init__(self, window=TestSettings.SOAK_WINDOW):
+        # Time, passed test suites, test suites, duration and resident memory of each iteration
+        self._iterations = deque(maxlen=window)
+        self._baseline_durations = []
+        self._window = window
+        self._n_iterations = 0
+        self._n_passed_iterations = 0
+        self._history = []
+        self._use_proc = os.path.isfile("/proc/self/statm")
+        self._page_size = os.sysconf("SC_PAGE_SIZE") if self._use_proc else 0
+
+    ###########
+    # Private #
+    ###########
+
+    def _read_rss(self):
+        if not self._use_proc:
+            return 0
+        with open("/proc/self/statm", "r", encoding="utf-8") as fp:
+            return int(fp.read().split()[1]) * self._page_size
+
+    @staticmethod
+    def _get_slope(points):
+        # Least squares fit of the values over the time, in value per second
+        if len(points) < 2:
+            return 0.0
+        mean_x = math.fsum(x for x, _ in points) / len(points)
+        mean_y = math.fsum(y for _, y in points) / len(points)
+        denominator = math.fsum((x - mean_x) ** 2 for x, _ in points)
+        if denominator == 0:
+            return 0.0
+        return math.fsum((x - mean_x) * (y - mean_y) for x, y in points) / denominator
+
+    ##########
+    # Public #
+    ##########
+
+    def get_n_iterations(self):
+        """
+        :return: the number of iterations.
+        """
+        return self._n_iterations
+
+    def add_iteration(self, n_passed, n_test_suites, duration):
+        """
+        Add the result of an iteration. The resident memory is measured after the iteration.
+
+        :param n_passed: the number of passed test suites.
+        :param n_test_suites: the number of test suites.
+        :param duration: the duration of the iteration in seconds.
+        """
+        self._iterations.append((time.monotonic(), n_passed, n_test_suites, duration,
+                                 self._read_rss()))
+        if len(self._baseline_durations) < self._window:
+            self._baseline_durations.append(duration)
+        self._n_iterations += 1
+        if n_passed == n_test_suites:
+            self._n_passed_iterations += 1
+
+    def get_summary(self):
+        """
+        :return: dictionary with the number of iterations and passed iterations, and of the last
+            iterations: the pass rate of the test suites in percent, the mean duration in seconds,
+            the duration drift in percent, the resident memory in bytes and the memory trend in
+            bytes per hour.
+        """
+        iterations = self._iterations
+        if len(iterations) == 0:
+            return {"iterations": 0, "passed_iterations": 0, "pass_rate": 0.0,
+                    "mean_duration": 0.0, "duration_drift": 0.0, "rss": 0, "rss_trend": 0.0}
+        mean_duration = math.fsum(x[3] for x in iterations) / len(iterations)
+        baseline = math.fsum(self._baseline_durations) / len(self._baseline_durations)
+        return {
+            "iterations": self._n_iterations,
+            "passed_iterations": self._n_passed_iterations,
+            "pass_rate": 100 * sum(x[1] for x in iterations) / max(1, sum(x[2]
+                                                                           for x in iterations)),
+            "mean_duration": mean_duration,
+            "duration_drift": 0.0 if baseline == 0 else 100 * (mean_duration - baseline) / baseline,
+            "rss": iterations[-1][4],
+            "rss_trend": 3600 * self._get_slope([(x[0], x[4]) for x in iterations])
+        }
+
+    def get_summary_text(self):
+        """
+        :return: the summary as a line of text for the log.
+        """
+        summary = self.get_summary()
+        return (f"Iteration {summary['iterations']}: {summary['passed_iterations']} passed, "
+                f"pass rate {summary['pass_rate']:.1f}%, "
+                f"mean duration {summary['mean_duration']:.3f} s, "
+                f"duration drift {summary['duration_drift']:+.1f}%, "
+                f"memory {summary['rss'] / 1048576:.1f} MB, "
+                f"memory trend {summary['rss_trend'] / 1048576:+.2f} MB/hour")
+
+    def add_history(self):
+        """
+        Store the current summary in the history. Call this at a fixed interval, so the history
+        only grows with the duration of the soak test.
+
+        :return: the summary as a line of text for the log.
+        """
+        self._history.append(self.get_summary())
+        return self.get_summary_text()
+
+    def get_history(self):
+        """
+        :return: list with the stored summaries.
+        """
+        return self._history
+
+    def write(self, filename, time_stamp):
+        """
+        Write the current summary and the history to a JSON file.
+
+        :param filename: the name of the file.
+        :param time_stamp: the time stamp of the test run.
+        """
+        os.makedirs(os.path.dirname(filename), exist_ok=True)
+        with open(filename, "w", encoding="utf-8") as fp:
+            json.dump({"time_stamp": time_stamp, "summary": self.get_summary(),
+                       "history": self._history}, fp, indent=2)
+
+
+if __name__ == "__main__":
+
+    import random
+
+    _statistics = SoakStatistics(window=50)
+    _memory = []
+    for _i in range(200):
+        # Leak some memory and get slower
+        _memory.append(bytearray(100000))
+        _statistics.add_iteration(10 - (random.random() < 0.05), 10, 0.01 + _i / 10000)
+        if _i % 50 == 49:
+            print(_statistics.add_history())
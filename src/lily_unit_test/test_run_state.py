@@ -0,0 +1,100 @@
+"""
+State of a single test run, shared by the methods of the test runner.
+"""
+
+import os
+
+from lily_unit_test.last_failed import write_last_failed
+from lily_unit_test.logger import Logger
+from lily_unit_test.resources import ResourceManager
+from lily_unit_test.test_settings import TestSettings
+from lily_unit_test.time_budget import write_durations
+
+
+class TestRunState:  # pylint: disable=too-many-instance-attributes
+    """
+    Holds the state of a single test run.
+    """
+
+    def __init__(self, scheduler, options, log_writer, plugins, statistics=None):
+        self.scheduler = scheduler
+        self.options = options
+        self.log_writer = log_writer
+        self.logger = Logger(False)
+        self.resource_manager = ResourceManager(options["resources"], self.logger)
+        self.test_suites = scheduler.get_order()
+        self.report_name_format = f"{{:0{len(str(len(self.test_suites)))}d}}_{{}}"
+        self.report_ids = {test_suite: self.report_name_format.format(i + 2, test_suite.__name__)
+                           for i, test_suite in enumerate(self.test_suites)}
+        self.reports = {}
+        self.results = {}
+        self.durations = {}
+        self.failed_test_cases = {}
+        self.statistics = statistics
+        self.repetitions = {}
+        self.sampler = None
+        self.isolation = None
+        self.output_path = None
+        self.time_budget = None
+        self.soak_statistics = None
+        # Without hooks, the plugins are skipped with a single check
+        self.plugins = plugins if plugins.has_hooks() else None
+        self.plugin_manager = plugins
+        self.add_log_listener(self.logger, "TestRunner")
+
+    def call_hook(self, name, *args):
+        hook = None if self.plugins is None else getattr(self.plugins, name)
+        if hook is not None:
+            hook(*args)
+
+    def add_log_listener(self, logger, name):
+        if self.plugins is not None and self.plugins.log_message is not None:
+            hook = self.plugins.log_message
+            logger.add_listener(lambda message_type, message: hook(name, message_type, message))
+
+    def report_test_suite(self, test_suite, log_messages):
+        self.reports[test_suite] = log_messages
+        if self.log_writer is not None:
+            self.log_writer.write(self.report_ids[test_suite], log_messages)
+
+    def write_run_files(self, time_stamp):
+        # The files in the report folder with the results of the test run as a whole
+        options = self.options
+        report_folder = options["report_folder"]
+        # The failures and durations are read by the next test runs, they are not written when
+        # nothing is written to the report folder and these features are not used
+        write_rerun_files = (self.log_writer is not None or options["failed_only"] or
+                             options["failed_first"] or options["time_budget"] is not None)
+        if write_rerun_files:
+            # Test suites that are skipped because of the time budget did not run
+            write_last_failed(report_folder, {
+                x.__name__: None if self.results[x] else self.failed_test_cases.get(x, [])
+                for x in self.test_suites if self.results[x] is not None
+            }, time_stamp)
+        if self.soak_statistics is not None:
+            self.soak_statistics.write(os.path.join(
+                report_folder, f"{time_stamp}_{TestSettings.SOAK_STATISTICS_FILENAME}"),
+                time_stamp)
+        if self.statistics is not None:
+            self.statistics.write(os.path.join(
+                report_folder, f"{time_stamp}_{TestSettings.REPEAT_STATISTICS_FILENAME}"),
+                time_stamp, options["repeat"],
+                {report_id: {"runs": x["runs"], "passed": x["passed"]}
+                 for report_id, x in self.repetitions.items()})
+        elif write_rerun_files:
+            # Test suites that did not run or were stopped keep their previous durations
+            write_durations(report_folder, {
+                test_suite.__name__: duration
+                for test_suite, duration in self.durations.items()
+                if self.time_budget is None or not self.time_budget.is_stopped(test_suite)
+            }, time_stamp)
+        if self.sampler is not None:
+            self.sampler.write(os.path.join(
+                report_folder, f"{time_stamp}_{TestSettings.RESOURCE_SAMPLES_FILENAME}"),
+                time_stamp, [x.__name__ for x in self.test_suites])
+        coverage = options["code_coverage"]
+        if coverage is not None:
+            prefix = os.path.join(report_folder, time_stamp)
+            coverage.write(f"{prefix}_{TestSettings.COVERAGE_FILENAME}", time_stamp)
+            coverage.write_html_report(f"{prefix}_{TestSettings.COVERAGE_REPORT_FILENAME}",
+                                       time_stamp)
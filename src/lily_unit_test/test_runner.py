@@ -4,15 +4,37 @@ Runs all test suites from a specific package folder (recursive)
 """
 
 import inspect
+import math
 import os
 import sys
+import threading
+import time
 import webbrowser
 
+import multiprocessing
+
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
 from datetime import datetime
-from lily_unit_test.html_report import generate_html_report
+from lily_unit_test.attachments import read_attachments
+from lily_unit_test.code_coverage import CodeCoverage
+from lily_unit_test.event_stream import EventStream
+from lily_unit_test.html_report import generate_html_report, generate_lazy_html_report
+from lily_unit_test.last_failed import read_last_failed
+from lily_unit_test.log_writer import LogWriter
 from lily_unit_test.logger import Logger
+from lily_unit_test.measurements import Measurements
+from lily_unit_test.plugins import PluginManager, load_entry_point_plugins
+from lily_unit_test.process_isolation import ProcessIsolation, check_resources
+from lily_unit_test.repeat_statistics import RepeatStatistics
+from lily_unit_test.resource_sampler import ResourceSampler
+from lily_unit_test.scheduler import TestScheduler
+from lily_unit_test.selection import TestSelector
+from lily_unit_test.soak_statistics import SoakStatistics
+from lily_unit_test.test_run_state import TestRunState
 from lily_unit_test.test_settings import TestSettings
 from lily_unit_test.test_suite import TestSuite
+from lily_unit_test.time_budget import TimeBudget, read_durations
+from lily_unit_test.trend_report import TrendReport
 
 
 class TestRunner:
@@ -20,6 +42,8 @@ class TestRunner:
     Static class that runs test suites in a specified folder.
     """
 
+    _lock = threading.RLock()
+
     ###########
     # Private #
     ###########
@@ -30,12 +54,33 @@ class TestRunner:
             "report_folder": os.path.join(os.path.dirname(test_suites_path),
                                           TestSettings.REPORT_FOLDER_NAME),
             "create_html_report": False,
+            "lazy_html_report": False,
+            "create_trend_report": False,
             "open_in_browser": False,
             "no_log_files": False,
+            "log_file_compression": None,
+            "create_log_archive": False,
+            "log_level": None,
+            "resources": {},
+            "parallel_test_suites": 1,
+            "repeat": 1,
+            "repeat_processes": 1,
+            "resource_sampling": None,
+            "process_isolation": False,
+            "preload_modules": [],
+            "event_stream": None,
+            "plugins": [],
+            "plugin_entry_points": True,
             "include_test_suites": [],
             "exclude_test_suites": [],
             "run_first": None,
-            "run_last": None
+            "run_last": None,
+            "failed_only": False,
+            "failed_first": False,
+            "time_budget": None,
+            "soak_duration": None,
+            "soak_iterations": None,
+            "coverage": None
         }
         if options is not None:
             for key in options:
@@ -45,13 +90,18 @@ class TestRunner:
 
     @classmethod
     def _populate_test_suites(cls, options):
-        sys.path.append(options["test_suites_path"])
+        # Test runs in a loop do not add the path again
+        if options["test_suites_path"] not in sys.path:
+            sys.path.append(options["test_suites_path"])
 
+        selector = options["test_selector"]
         found_test_suites = []
         for current_folder, sub_folders, filenames in os.walk(options["test_suites_path"]):
             sub_folders.sort()
             filenames.sort()
             for filename in filter(lambda x: x.endswith(".py"), filenames):
+                if not cls._may_have_selected_test_suites(selector, current_folder, filename):
+                    continue
                 import_path = os.path.join(current_folder[len(options["test_suites_path"]) + 1:],
                                            filename.replace(".py", ""))
                 import_path = import_path.replace(os.sep, ".")
@@ -66,15 +116,32 @@ class TestRunner:
         return cls._filter_test_suites(found_test_suites, options)
 
     @classmethod
-    def _filter_test_suites(cls, found_test_suites, options):
-        if len(options["include_test_suites"]) > 0:
-            found_test_suites = list(filter(lambda x: x.__name__ in options["include_test_suites"],
-                                            found_test_suites))
+    def _may_have_selected_test_suites(cls, selector, folder, filename):
+        # Modules without test suites that can be selected are not imported
+        if not selector.is_selecting():
+            return True
+        with open(os.path.join(folder, filename), "r", encoding="utf-8",
+                  errors="replace") as fp:
+            return selector.may_match_source(fp.read())
 
-        if len(options["exclude_test_suites"]) > 0:
-            found_test_suites = list(filter(lambda x: x.__name__ not in
-                                            options["exclude_test_suites"],
+    @classmethod
+    def _filter_test_suites(cls, found_test_suites, options):
+        selector = options["test_selector"]
+        if selector.is_selecting():
+            found_test_suites = list(filter(lambda x: selector.get_test_methods(x) != [],
                                             found_test_suites))
+        # Sorting keeps the order of test suites with the same priority
+        found_test_suites.sort(key=lambda x: -x.PRIORITY)
+
+        last_failed = options["last_failed"]
+        if len(last_failed) > 0:
+            if options["failed_only"]:
+                found_test_suites = list(filter(lambda x: x.__name__ in last_failed or
+                                                x.__name__ in (options["run_first"],
+                                                               options["run_last"]),
+                                                found_test_suites))
+            elif options["failed_first"]:
+                found_test_suites.sort(key=lambda x: x.__name__ not in last_failed)
 
         run_first = options["run_first"]
         run_last = options["run_last"]
@@ -93,75 +160,509 @@ class TestRunner:
         return found_test_suites
 
     @classmethod
-    def _write_log_messages_to_file(cls, report_path, time_stamp, filename, logger):
-        output_path = os.path.join(report_path, time_stamp)
-        if not os.path.isdir(output_path):
-            os.makedirs(output_path)
+    def _create_test_suite(cls, test_suite, state):
+        # pylint: disable=protected-access
+        options = state.options
+        ts = test_suite(options["report_folder"])
+        failed_test_cases = options["last_failed"].get(test_suite.__name__, [])
+        if options["failed_only"] and len(failed_test_cases) > 0:
+            ts._test_case_filter = set(failed_test_cases)
+        if options["log_level"] is not None and test_suite.LOG_LEVEL is None:
+            ts.log.set_log_level(options["log_level"])
+        ts._test_method_selection = options["test_selector"].get_test_methods(test_suite)
+        ts._resource_manager = state.resource_manager
+        ts._plugins = state.plugins
+        if state.output_path is not None:
+            # Not set in the worker processes of repeated test runs, like the log files
+            ts._measurements_path = os.path.join(state.output_path,
+                                                 state.report_ids[test_suite])
+        if state.time_budget is not None:
+            ts._deadline = state.time_budget.get_deadline(test_suite)
+        state.add_log_listener(ts.log, test_suite.__name__)
+        return ts
 
-        with open(os.path.join(str(output_path), filename), "w", encoding="utf-8") as fp:
-            fp.writelines(map(lambda x: f"{x}\n", logger.get_log_messages()))
+    @classmethod
+    def _run_test_suites(cls, scheduler, report_data, test_suite_info, time_stamp, options):
+        log_writer = None
+        if not options["no_log_files"] or options["create_log_archive"]:
+            archive_filename = None
+            if options["create_log_archive"]:
+                archive_filename = os.path.join(options["report_folder"],
+                                                f"{time_stamp}_TestRunner.lla")
+            log_writer = LogWriter(os.path.join(options["report_folder"], time_stamp),
+                                   options["log_file_compression"],
+                                   archive_filename=archive_filename,
+                                   text_files=not options["no_log_files"])
+        statistics = None
+        sampler = None
+        plugins, plugin_errors = cls._load_plugins(options)
+        if options["repeat"] > 1:
+            statistics = RepeatStatistics()
+            plugins.append(statistics)
+        if options["resource_sampling"] is not None:
+            sampler = ResourceSampler(options["resource_sampling"])
+            plugins.append(sampler)
+        if options["code_coverage"] is not None:
+            plugins.append(options["code_coverage"])
+        plugins = PluginManager(plugins, plugin_errors)
+        state = TestRunState(scheduler, options, log_writer, plugins, statistics)
+        state.sampler = sampler
+        if options["soak_duration"] is not None or options["soak_iterations"] is not None:
+            assert statistics is None, "A soak test cannot be combined with repeat"
+            state.soak_statistics = SoakStatistics()
+        state.output_path = os.path.join(options["report_folder"], time_stamp)
+        if options["process_isolation"]:
+            # The modules with the test suites are imported once, in the server process
+            state.isolation = ProcessIsolation(
+                list(options["preload_modules"]) +
+                sorted({test_suite.__module__ for test_suite in state.test_suites}))
+        try:
+            result = cls._run_test_suites_with_state(state, report_data, test_suite_info)
+            state.write_run_files(time_stamp)
+            return result
+        finally:
+            plugins.close()
+            # Errors after the test runner log is finished
+            for error in plugins.get_errors():
+                print(error, file=sys.stderr)
+            if log_writer is not None:
+                log_writer.close()
+
+    @classmethod
+    def _load_plugins(cls, options):
+        plugins = list(options["plugins"])
+        if options["event_stream"] is not None:
+            plugins.append(EventStream(options["event_stream"]))
+        entry_point_plugins, errors = (load_entry_point_plugins() if options["plugin_entry_points"]
+                                       else ([], []))
+        return plugins + entry_point_plugins, errors
 
     @classmethod
-    def _run_test_suites(cls, test_suites_to_run, report_data, time_stamp, options):
-        n_test_suites_passed = 0
-        report_name_format = f"{{:0{len(str(len(test_suites_to_run)))}d}}_{{}}"
-        logger = Logger(False)
-        if len(test_suites_to_run) > 0:
+    def _run_test_suites_with_state(cls, state, report_data, test_suite_info):
+        logger = state.logger
+        n_test_suites = len(state.test_suites)
+        state.call_hook("run_started", state.options["test_suites_path"],
+                        [x.__name__ for x in state.test_suites])
+        if n_test_suites > 0:
             logger.info("Run {n} test suites from folder: "
-                        "{path}".format(n=len(test_suites_to_run),
-                                        path=options["test_suites_path"]))
-            for i, test_suite in enumerate(test_suites_to_run):
-                ts = test_suite(options["report_folder"])
-                n_test_suites_passed += cls._run_test_suite(ts, logger)
-                report_id = report_name_format.format(i + 2, test_suite.__name__)
-                report_data[report_id] = ts.log.get_log_messages()
-                if not options["no_log_files"]:
-                    cls._write_log_messages_to_file(options["report_folder"], time_stamp,
-                                                    f"{report_id}.txt", ts.log)
+                        "{path}".format(n=n_test_suites,
+                                        path=state.options["test_suites_path"]))
+            cls._log_rerun_mode(state)
+            cls._run_test_suites_in_mode(state)
+            critical_path, duration = state.scheduler.get_critical_path(state.durations)
+            logger.empty_line()
+            logger.info(f"Critical path: {' -> '.join(critical_path)} ({duration:.1f} seconds)")
+            if state.sampler is not None:
+                cls._log_resource_usage(state, test_suite_info)
+            if state.options["code_coverage"] is not None:
+                state.options["code_coverage"].stop()
+                logger.empty_line()
+                logger.info(f"Code coverage: {state.options['code_coverage'].get_summary_text()}")
         else:
             logger.info("No test suites found in folder: {path}".format(
-                path=options["test_suites_path"]))
+                path=state.options["test_suites_path"]))
 
+        state.resource_manager.shutdown()
+        # Also the errors of loading the plugins, when no plugin has hooks
+        for error in state.plugin_manager.get_errors():
+            logger.error(error)
         logger.empty_line()
 
-        ratio = 100 * n_test_suites_passed / len(test_suites_to_run)
-        logger.info(f"{n_test_suites_passed} of {len(test_suites_to_run)} "
+        # Report the test suites in order of execution, also when they were executed in parallel
+        for test_suite in state.test_suites:
+            report_data[state.report_ids[test_suite]] = state.reports[test_suite]
+
+        n_test_suites -= cls._log_skipped_test_suites(state)
+        n_test_suites_passed = list(state.results.values()).count(True)
+        ratio = 100 * n_test_suites_passed / max(1, n_test_suites)
+        logger.info(f"{n_test_suites_passed} of {n_test_suites} "
                     f"test suites passed ({ratio:.1f}%)")
-        if len(test_suites_to_run) == n_test_suites_passed:
+        if n_test_suites == n_test_suites_passed:
             logger.info("Test runner result: PASSED")
         else:
             logger.error("Test runner result: FAILED")
 
-        report_id = report_name_format.format(1, "TestRunner")
+        report_id = state.report_name_format.format(1, "TestRunner")
         report_data[report_id] = logger.get_log_messages()
-        if not options["no_log_files"]:
-            cls._write_log_messages_to_file(options["report_folder"], time_stamp,
-                                            f"{report_id}.txt", logger)
         logger.shutdown()
+        state.call_hook("run_finished", n_test_suites == n_test_suites_passed, report_data)
+        if state.log_writer is not None:
+            state.log_writer.write(report_id, logger.get_log_messages())
 
-        return len(test_suites_to_run) == n_test_suites_passed
+        return n_test_suites == n_test_suites_passed
 
     @classmethod
-    def _run_test_suite(cls, test_suite, logger):
-        result_count = 0
-        test_suite_name = test_suite.__class__.__name__
+    def _run_test_suites_in_mode(cls, state):
+        if state.options["time_budget"] is not None:
+            assert state.statistics is None and state.soak_statistics is None, \
+                "The time budget cannot be used with repeated test runs or a soak test"
+            state.time_budget = TimeBudget(state.options["time_budget"], state.options["run_last"])
+            state.logger.info(state.time_budget.start(
+                state.scheduler, read_durations(state.options["report_folder"])))
+        if state.statistics is not None:
+            cls._run_repeated_test_suites(state)
+        elif state.soak_statistics is not None:
+            cls._run_soak_test_suites(state)
+        else:
+            cls._run_scheduled_test_suites(state)
+
+    @classmethod
+    def _log_skipped_test_suites(cls, state):
+        # Returns the number of test suites that are skipped because of the time budget
+        skipped = [x.__name__ for x in state.test_suites if state.results.get(x, False) is None]
+        if len(skipped) > 0:
+            state.logger.info(f"{len(skipped)} test suites skipped because of the time budget: "
+                              f"{', '.join(skipped)}")
+        return len(skipped)
+
+    @classmethod
+    def _log_rerun_mode(cls, state):
+        last_failed = state.options["last_failed"]
+        if state.options["failed_only"] or state.options["failed_first"]:
+            if len(last_failed) == 0:
+                state.logger.info("No failed test suites in the previous test run")
+            else:
+                mode = "only" if state.options["failed_only"] else "first"
+                state.logger.info(f"Run failed test suites of the previous test run {mode}: "
+                                  f"{', '.join(last_failed)}")
+
+    @classmethod
+    def _run_scheduled_test_suites(cls, state):
+        # Runs each test suite when the test suites it depends on are finished
+        n_workers = max(1, state.options["parallel_test_suites"])
+        executor = None
+        if n_workers > 1:
+            # Output of the worker threads goes to where the output of this thread goes to
+            thread_logger = Logger.get_thread_logger()
+            executor = ThreadPoolExecutor(n_workers, initializer=None if thread_logger is None
+                                          else thread_logger.redirect_thread)
+        pending = list(state.test_suites)
+        running = {}
+
+        def _finish(test_suite, result, duration, log_messages, failed_test_cases):
+            state.results[test_suite] = result
+            state.durations[test_suite] = duration
+            if state.time_budget is not None:
+                state.time_budget.finish(test_suite)
+            state.failed_test_cases[test_suite] = failed_test_cases
+            state.call_hook("suite_finished", test_suite.__name__, result, duration, False,
+                            log_messages)
+            state.report_test_suite(test_suite, log_messages)
+            state.resource_manager.release(pending + list(running.values()))
+
+        try:
+            while len(pending) > 0 or len(running) > 0:
+                for test_suite in list(pending):
+                    failed = [x.__name__ for x in state.scheduler.get_dependencies(test_suite)
+                              if state.results.get(x) is False]
+                    if len(failed) > 0:
+                        pending.remove(test_suite)
+                        state.results[test_suite] = False
+                        log_messages = cls._skip_test_suite(
+                            test_suite, f"failed dependencies: {', '.join(sorted(failed))}",
+                            state.logger)
+                        state.report_test_suite(test_suite, log_messages)
+                        state.call_hook("suite_finished", test_suite.__name__, False, 0, True,
+                                        log_messages)
+                    elif (state.scheduler.get_predecessors(test_suite).issubset(state.results) and
+                          len(running) < n_workers):
+                        pending.remove(test_suite)
+                        if state.time_budget is not None and state.time_budget.is_skipped(
+                                test_suite, any(state.results[x] is None for x in
+                                                state.scheduler.get_dependencies(test_suite))):
+                            # Not a failure, the result stays None
+                            state.results[test_suite] = None
+                            log_messages = cls._skip_test_suite(test_suite, "the time budget",
+                                                                state.logger, False)
+                            state.report_test_suite(test_suite, log_messages)
+                            state.call_hook("suite_finished", test_suite.__name__, None, 0, True,
+                                            log_messages)
+                        elif executor is None:
+                            _finish(test_suite, *cls._execute_test_suite(test_suite, state))
+                        else:
+                            running[executor.submit(cls._execute_test_suite, test_suite,
+                                                    state)] = test_suite
+                if len(running) > 0:
+                    done, _ = wait(running, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        _finish(running.pop(future), *future.result())
+        finally:
+            if executor is not None:
+                executor.shutdown()
+
+    @classmethod
+    def _run_repeated_test_suites(cls, state):
+        logger = state.logger
+        n_repetitions = state.options["repeat"]
+        n_processes = min(max(1, state.options["repeat_processes"]), n_repetitions)
+        logger.info(f"Repeat the test suites {n_repetitions} times in {n_processes} "
+                    f"process{'es' if n_processes > 1 else ''}")
+        # Only the log of one repetition of each test suite is written
+        log_writer = state.log_writer
+        state.log_writer = None
+        try:
+            if n_processes == 1:
+                state.repetitions = cls._run_repetitions(state, n_repetitions)
+            else:
+                state.repetitions = cls._run_repetitions_in_processes(state, n_repetitions,
+                                                                      n_processes)
+        finally:
+            state.log_writer = log_writer
+
+        cls._report_repetitions(state, "repetitions")
         logger.empty_line()
-        logger.log_to_stdout(False)
-        logger.info(f"Run test suite: {test_suite_name}")
-        logger.log_to_stdout(True)
-        result = test_suite.run()
-        result_text = "FAILED"
-        log_method = logger.error
-        if result is None or result:
-            result_count = 1
-            result_text = "PASSED"
-            log_method = logger.info
+        logger.info("Repeat statistics:")
+        flaky = state.statistics.get_flaky_test_cases()
+        failed = state.statistics.get_failed_test_cases()
+        for test_case, line in state.statistics.get_summary():
+            log_method = logger.error if test_case in flaky or test_case in failed else logger.info
+            log_method(line)
+        if len(flaky) > 0:
+            logger.error(f"Flaky test cases: {', '.join(flaky)}")
 
-        logger.log_to_stdout(False)
-        log_method(f"Test suite {test_suite_name}: {result_text}")
-        logger.log_to_stdout(True)
+    @classmethod
+    def _run_soak_test_suites(cls, state):
+        # Only the statistics of the last iterations and one log of each test suite are kept
+        options = state.options
+        soak_statistics = state.soak_statistics
+        state.logger.info(f"Soak test: run the test suites for {options['soak_duration']} "
+                          f"seconds or {options['soak_iterations']} iterations")
+        end_time = math.inf
+        if options["soak_duration"] is not None:
+            end_time = time.monotonic() + options["soak_duration"]
+        n_iterations = math.inf
+        if options["soak_iterations"] is not None:
+            n_iterations = options["soak_iterations"]
+        next_report_time = time.monotonic() + TestSettings.SOAK_REPORT_INTERVAL
+        repetitions = cls._create_repetitions(state)
+        log_writer = state.log_writer
+        logger = state.logger
+        state.log_writer = None
+        try:
+            while (soak_statistics.get_n_iterations() < n_iterations and
+                   time.monotonic() < end_time):
+                # The messages of an iteration are not kept in the runner log
+                state.logger = Logger(False)
+                state.add_log_listener(state.logger, "TestRunner")
+                start = time.perf_counter()
+                cls._run_repetition(state, repetitions)
+                soak_statistics.add_iteration(list(state.results.values()).count(True),
+                                              len(state.test_suites), time.perf_counter() - start)
+                if time.monotonic() >= next_report_time:
+                    next_report_time += TestSettings.SOAK_REPORT_INTERVAL
+                    logger.info(soak_statistics.add_history())
+        finally:
+            state.log_writer = log_writer
+            state.logger = logger
+
+        state.logger.empty_line()
+        state.logger.info(soak_statistics.add_history())
+        state.repetitions = repetitions
+        cls._report_repetitions(state, "iterations")
 
-        return result_count
+    @classmethod
+    def _create_repetitions(cls, state):
+        # Per report ID: number of runs and passes, the log messages and failed test cases
+        return {state.report_ids[test_suite]: {"runs": 0, "passed": 0, "log_messages": [],
+                                               "failed_test_cases": []}
+                for test_suite in state.test_suites}
+
+    @classmethod
+    def _run_repetition(cls, state, repetitions):
+        state.results = {}
+        state.reports = {}
+        state.failed_test_cases = {}
+        cls._run_scheduled_test_suites(state)
+        for test_suite in state.test_suites:
+            repetition = repetitions[state.report_ids[test_suite]]
+            # Keep the log of the first failure, else the log of the last repetition
+            if repetition["passed"] == repetition["runs"]:
+                repetition["log_messages"] = state.reports[test_suite]
+            repetition["runs"] += 1
+            if state.results[test_suite]:
+                repetition["passed"] += 1
+            for test_case in state.failed_test_cases.get(test_suite, []):
+                if test_case not in repetition["failed_test_cases"]:
+                    repetition["failed_test_cases"].append(test_case)
+
+    @classmethod
+    def _report_repetitions(cls, state, name):
+        state.logger.empty_line()
+        for test_suite in state.test_suites:
+            repetition = state.repetitions[state.report_ids[test_suite]]
+            state.results[test_suite] = repetition["passed"] == repetition["runs"]
+            state.failed_test_cases[test_suite] = repetition["failed_test_cases"]
+            state.report_test_suite(test_suite, repetition["log_messages"])
+            log_method = state.logger.info if state.results[test_suite] else state.logger.error
+            log_method(f"Test suite {test_suite.__name__}: {repetition['passed']} of "
+                       f"{repetition['runs']} {name} passed")
+
+    @classmethod
+    def _run_repetitions(cls, state, n_repetitions):
+        repetitions = cls._create_repetitions(state)
+        for i in range(n_repetitions):
+            state.logger.empty_line()
+            state.logger.info(f"Repetition {i + 1} of {n_repetitions}")
+            cls._run_repetition(state, repetitions)
+        return repetitions
+
+    @classmethod
+    def _run_repetitions_in_processes(cls, state, n_repetitions, n_processes):
+        # Plugins and the event stream only get the events of the test runner in this process
+        options = dict(state.options, plugins=[], event_stream=None, plugin_entry_points=False)
+        counts = [n_repetitions // n_processes + (i < n_repetitions % n_processes)
+                  for i in range(n_processes)]
+        repetitions = {}
+        # A new process for each worker, forking a process with running threads is not safe
+        with ProcessPoolExecutor(n_processes, mp_context=multiprocessing.get_context("spawn")) \
+                as executor:
+            futures = [executor.submit(cls._run_repeat_worker, options, count) for count in counts]
+            for future in futures:
+                worker_repetitions, statistics = future.result()
+                state.statistics.merge(statistics)
+                cls._merge_repetitions(repetitions, worker_repetitions)
+        return repetitions
+
+    @classmethod
+    def _merge_repetitions(cls, repetitions, worker_repetitions):
+        for report_id, worker_repetition in worker_repetitions.items():
+            repetition = repetitions.setdefault(report_id, {
+                "runs": 0, "passed": 0, "log_messages": worker_repetition["log_messages"],
+                "failed_test_cases": []})
+            # Keep the log of the first failure
+            if (repetition["passed"] == repetition["runs"] and
+                    worker_repetition["passed"] < worker_repetition["runs"]):
+                repetition["log_messages"] = worker_repetition["log_messages"]
+            repetition["runs"] += worker_repetition["runs"]
+            repetition["passed"] += worker_repetition["passed"]
+            for test_case in worker_repetition["failed_test_cases"]:
+                if test_case not in repetition["failed_test_cases"]:
+                    repetition["failed_test_cases"].append(test_case)
+
+    @classmethod
+    def _run_repeat_worker(cls, options, n_repetitions):
+        # Runs in a worker process, the test suites are discovered once per process
+        test_suites = cls._populate_test_suites(options)
+        scheduler = TestScheduler(test_suites, options["run_first"], options["run_last"])
+        statistics = RepeatStatistics()
+        state = TestRunState(scheduler, options, None, PluginManager([statistics]), statistics)
+        try:
+            return cls._run_repetitions(state, n_repetitions), statistics
+        finally:
+            state.resource_manager.shutdown()
+            state.logger.shutdown()
+
+    @classmethod
+    def _log_resource_usage(cls, state, test_suite_info):
+        state.sampler.stop()
+        state.logger.empty_line()
+        state.logger.info("Resource usage:")
+        for test_suite in state.test_suites:
+            text = state.sampler.get_summary_text(test_suite.__name__)
+            if text != "":
+                state.logger.info(f"{test_suite.__name__}: {text}")
+                test_suite_info[state.report_ids[test_suite]] = (
+                    text, state.sampler.get_summary(test_suite.__name__)["cpu_usage"])
+
+    @classmethod
+    def _read_measurement_summaries(cls, report_data, options, time_stamp):
+        summaries = {}
+        for report_id in report_data:
+            filename = os.path.join(options["report_folder"], time_stamp,
+                                    f"{report_id}_{TestSettings.MEASUREMENTS_BINARY_FILENAME}")
+            if os.path.isfile(filename):
+                summaries[report_id] = Measurements.read_binary(filename).get_summary()
+        return summaries
+
+    @classmethod
+    def _read_attachments(cls, report_data, options, time_stamp):
+        attachments = {}
+        for report_id in report_data:
+            filename = os.path.join(options["report_folder"], time_stamp,
+                                    f"{report_id}_{TestSettings.ATTACHMENTS_FILENAME}")
+            if os.path.isfile(filename):
+                attachments[report_id] = read_attachments(filename)
+        return attachments
+
+    @classmethod
+    def _execute_test_suite(cls, test_suite, state):
+        start = time.perf_counter()
+        state.call_hook("suite_started", test_suite.__name__)
+        if state.isolation is None:
+            ts = cls._create_test_suite(test_suite, state)
+
+            def _run():
+                return ts.run(), ts.log.get_log_messages(), ts.get_failed_test_cases()
+        else:
+            def _run():
+                return cls._run_isolated_test_suite(test_suite, state)
+
+        result, log_messages, failed_test_cases = cls._run_test_suite(test_suite.__name__, _run,
+                                                                      state.logger)
+        return result, time.perf_counter() - start, log_messages, failed_test_cases
+
+    @classmethod
+    def _run_isolated_test_suite(cls, test_suite, state):
+        options = state.options
+        hooks = []
+        log_hook = None
+        if state.plugins is not None:
+            hooks = [name for name in ("case_started", "case_finished")
+                     if getattr(state.plugins, name) is not None]
+            log_hook = state.plugins.log_message
+
+        def _on_log(message_type, message):
+            # Like the test suite logger does when the test suite runs in this process
+            print(message)
+            if log_hook is not None:
+                log_hook(test_suite.__name__, message_type, message)
+
+        test_case_filter = []
+        if options["failed_only"]:
+            test_case_filter = options["last_failed"].get(test_suite.__name__, [])
+        return state.isolation.run_test_suite(test_suite, options["test_suites_path"], {
+            "report_folder": options["report_folder"],
+            "log_level": options["log_level"],
+            "resources": options["resources"],
+            "test_case_filter": test_case_filter,
+            "test_methods": options["test_selector"].get_test_methods(test_suite),
+            "measurements_path": os.path.join(state.output_path, state.report_ids[test_suite]),
+            "deadline": (None if state.time_budget is None
+                         else state.time_budget.get_deadline(test_suite)),
+            "hooks": hooks
+        }, _on_log, state.call_hook)
+
+    @classmethod
+    def _skip_test_suite(cls, test_suite, reason, logger, is_failure=True):
+        message = f"Test suite {test_suite.__name__}: SKIPPED because of {reason}"
+        with cls._lock:
+            logger.empty_line()
+            (logger.error if is_failure else logger.info)(message)
+        skip_logger = Logger(False, False)
+        skip_logger.info(f"Run test suite: {test_suite.__name__}")
+        (skip_logger.error if is_failure else skip_logger.info)(message)
+        return skip_logger.get_log_messages()
+
+    @classmethod
+    def _log_without_stdout(cls, logger, log_method, message):
+        # The test suite already writes these messages to stdout
+        with cls._lock:
+            logger.log_to_stdout(False)
+            log_method(message)
+            logger.log_to_stdout(True)
+
+    @classmethod
+    def _run_test_suite(cls, test_suite_name, run_test_suite, logger):
+        # The run function returns the result, the log messages and the failed test cases
+        with cls._lock:
+            logger.empty_line()
+            cls._log_without_stdout(logger, logger.info, f"Run test suite: {test_suite_name}")
+        result, log_messages, failed_test_cases = run_test_suite()
+        if result is None or result:
+            cls._log_without_stdout(logger, logger.info, f"Test suite {test_suite_name}: PASSED")
+            return True, log_messages, failed_test_cases
+        cls._log_without_stdout(logger, logger.error, f"Test suite {test_suite_name}: FAILED")
+        return False, log_messages, failed_test_cases
 
     ##########
     # Public #
@@ -179,25 +680,129 @@ class TestRunner:
         Options:
         The options dictionary can have the following values:
 
-        ===================== ========================== ===========================================
-        Key name              Default value              Description
-        ===================== ========================== ===========================================
-        | report_folder       | "lily_unit_test_reports" | The path where the reports are written.
-                                                         | The path is by default at the same level
-                                                         | as the test_suites_path. When setting
-                                                         | a path, use an absolute path.
-        | create_html_report  | False                    | Create a single file HTML report.
-        | open_in_browser     | False                    | Open the HTML report in the default
-                                                         | browser when all tests are finished.
-        | no_log_files        | False                    | Skip writing text log files.
-                                                         | In case another form of logging is used,
-                                                         | writing text log files can be skipped.
-        | include_test_suites | []                       | Only run the test suites in this list.
-                                                         | Other test suites are skipped.
-        | exclude_test_suites | []                       | Skip the test suites in this list.
-        | run_first           | None                     | Run this test suite first.
-        | run_last            | None                     | Run this test suite last.
-        ===================== ========================== ===========================================
+        ====================== ========================== ==========================================
+        Key name               Default value              Description
+        ====================== ========================== ==========================================
+        | report_folder        | "lily_unit_test_reports" | The path where the reports are written.
+                                                          | The path is by default at the same level
+                                                          | as the test_suites_path. When setting a
+                                                          | path, use an absolute path.
+        | create_html_report   | False                    | Create a single file HTML report.
+        | lazy_html_report     | False                    | Create the HTML report for large logs.
+                                                          | The log messages are compressed and only
+                                                          | shown when a test suite is expanded,
+                                                          | with filters and search.
+        | create_trend_report  | False                    | Create a report with the pass rate and
+                                                          | duration of the test suites over all
+                                                          | test runs in the report folder. See the
+                                                          | TrendReport class.
+        | open_in_browser      | False                    | Open the HTML report in the default
+                                                          | browser when all tests are finished.
+        | no_log_files         | False                    | Skip writing text log files. In case
+                                                          | another form of logging is used, writing
+                                                          | text log files can be skipped. The
+                                                          | files for failed_only, failed_first and
+                                                          | time_budget are then only written when
+                                                          | one of these options is set.
+        | log_file_compression | None                     | Compress the text log files, use one of:
+                                                          | "gzip", "bz2" or "lzma". Log files are
+                                                          | written in the background while the next
+                                                          | test suite is running.
+        | create_log_archive   | False                    | Write all log messages to a single
+                                                          | indexed archive file (.lla). See the
+                                                          | LogArchive class for reading archives.
+        | log_level            | None                     | Minimum level of the messages that are
+                                                          | logged by the test suites: "DEBUG",
+                                                          | "INFO" or "ERROR". Test suites with the
+                                                          | LOG_LEVEL attribute set are not changed.
+        | resources            | {}                       | Shared resources for the test suites.
+                                                          | Dictionary with the resource name and a
+                                                          | ResourceProvider object or a function
+                                                          | that creates the resource. With
+                                                          | process_isolation they must be
+                                                          | picklable, so no lambdas.
+        | include_test_suites  | []                       | Only run the test suites and test
+                                                          | methods that match a pattern in this
+                                                          | list. Other test suites are skipped and
+                                                          | their modules are not imported when
+                                                          | possible. Patterns are test suite names,
+                                                          | "MyTestSuite.test_method", globs like
+                                                          | "Test*.test_power_*", regular
+                                                          | expressions "re:<expression>" and tags
+                                                          | "tag:<tag>". See the TestSelector class.
+        | exclude_test_suites  | []                       | Skip the test suites and test methods
+                                                          | that match a pattern in this list.
+        | run_first            | None                     | Run this test suite first.
+        | run_last             | None                     | Run this test suite last.
+        | failed_only          | False                    | Only run the test suites that failed in
+                                                          | the previous test run. Of these test
+                                                          | suites only the failed test cases run.
+                                                          | If nothing failed, all test suites run.
+        | failed_first         | False                    | Run the test suites that failed in the
+                                                          | previous test run first, then the rest.
+        | parallel_test_suites | 1                        | Number of test suites that can run at
+                                                          | the same time. Test suites only start
+                                                          | when the test suites they depend on are
+                                                          | passed (see DEPENDS_ON below).
+        | event_stream         | None                     | Publish the progress of the test run as
+                                                          | JSON lines to a file, a named pipe
+                                                          | ("fifo:<path>") or a Unix socket
+                                                          | ("unix:<path>"). See the EventStream
+                                                          | class for the events.
+        | plugins              | []                       | List with plugin objects that receive
+                                                          | the events of the test run. See the
+                                                          | Plugin class.
+        | plugin_entry_points  | True                     | Load the plugins that are registered by
+                                                          | installed packages.
+        | repeat               | 1                        | Run the test suites this many times, for
+                                                          | example to find flaky test cases. The
+                                                          | runner log and a JSON file in the report
+                                                          | folder have the pass and fail counts and
+                                                          | durations of each test case. A test
+                                                          | suite passes if it passed in all
+                                                          | repetitions. Its log is of the first
+                                                          | failed repetition, else of the last one.
+        | repeat_processes     | 1                        | Number of processes that run the
+                                                          | repetitions. The options must be
+                                                          | picklable and plugins only get the
+                                                          | events of the test runner.
+        | resource_sampling    | None                     | Sample the CPU time, memory, threads,
+                                                          | open files and I/O of the test process
+                                                          | and its child processes every given
+                                                          | number of seconds (e.g. 0.1). The usage
+                                                          | per test suite is in the runner log and
+                                                          | HTML report, all samples are written to
+                                                          | a JSON file in the report folder.
+        | process_isolation    | False                    | Run each test suite in its own process,
+                                                          | so it cannot affect other test suites,
+                                                          | e.g. by threads that keep running or
+                                                          | changed modules. A crash of the process
+                                                          | fails the test suite. The processes are
+                                                          | forked from a server process that has
+                                                          | the test suite modules imported. Shared
+                                                          | resources are created in each process.
+        | preload_modules      | []                       | Names of other modules to import in the
+                                                          | server process for process_isolation.
+        | time_budget          | None                     | Maximum duration of the test run in
+                                                          | seconds. The test suites with the
+                                                          | highest PRIORITY that fit, with their
+                                                          | expected durations, are selected. At the
+                                                          | deadline no test suites and test cases
+                                                          | start. The runner log lists the skipped
+                                                          | test suites, they are not failures.
+        | soak_duration        | None                     | Run the test suites over and over for
+                                                          | this many seconds, for endurance tests.
+                                                          | The test suites are collected once and
+                                                          | only rolling statistics and one log of
+                                                          | each test suite are kept, so the memory
+                                                          | does not grow. See SoakStatistics.
+        | soak_iterations      | None                     | Run the test suites this many times as a
+                                                          | soak test, or until the soak_duration.
+        | coverage             | None                     | Measure the code coverage of the source
+                                                          | code in these folders, per test suite. A
+                                                          | JSON file and HTML report are written to
+                                                          | the report folder. See CodeCoverage.
+        ====================== ========================== ==========================================
 
         Not all keys have to present, you can omit keys. For the missing keys, defaults are used.
         For test suite names, use their class names.
@@ -235,6 +840,17 @@ class TestRunner:
             }
             TestRunner.run(".", options)
 
+        Example: running one test method and all test methods tagged 'smoke'
+
+        .. code-block:: python
+
+            from lily_unit_test import TestRunner
+
+            options = {
+                "include_test_suites": ["MyTestSuite.test_voltage", "tag:smoke"]
+            }
+            TestRunner.run(".", options)
+
         Example: running only one test suite
 
         .. code-block:: python
@@ -268,6 +884,20 @@ class TestRunner:
             }
             TestRunner.run(".", options)
 
+        Example: rerun the failed test suites of the previous test run
+
+        .. code-block:: python
+
+            from lily_unit_test import TestRunner
+
+            # After each test run, the failed test suites and test cases are stored in the file
+            # 'last_failed.json' in the report folder. Test suites that did not run, keep their
+            # failures from earlier test runs.
+            options = {
+                "failed_only": True
+            }
+            TestRunner.run(".", options)
+
         Because the options are in a dictionary, they can be easily read from a JSON file.
 
         .. code-block:: python
@@ -278,18 +908,63 @@ class TestRunner:
             TestRunner.run(".", json.load(open("/path/to/json_file", "r")))
 
         This makes it easy to automate tests using different configurations.
+
+        Example: run the test suites 50 times in 4 processes, to find flaky test cases
+
+        .. code-block:: python
+
+            from lily_unit_test import TestRunner
+
+            options = {
+                "repeat": 50,
+                "repeat_processes": 4
+            }
+
+            # Worker processes import the main module, so the guard is needed
+            if __name__ == "__main__":
+                TestRunner.run(".", options)
         """
         test_suites_path = os.path.abspath(test_suites_path)
         options = cls._parse_options(options, test_suites_path)
         options["test_suites_path"] = test_suites_path
-        test_suites_to_run = cls._populate_test_suites(options)
+        options["last_failed"] = {}
+        if options["failed_only"] or options["failed_first"]:
+            options["last_failed"] = read_last_failed(options["report_folder"])
+        options["test_selector"] = TestSelector(options["include_test_suites"],
+                                                options["exclude_test_suites"])
+        if options["process_isolation"]:
+            check_resources(options["resources"])
+        options["code_coverage"] = None
+        if options["coverage"] is not None:
+            assert options["repeat_processes"] == 1 and not options["process_isolation"], \
+                "The coverage is only measured in the test process"
+            # Started before importing the test suites, for the lines that run when importing
+            options["code_coverage"] = CodeCoverage(options["coverage"])
+            options["code_coverage"].start()
+        try:
+            test_suites_to_run = cls._populate_test_suites(options)
+            scheduler = TestScheduler(test_suites_to_run, options["run_first"], options["run_last"])
+        except BaseException:
+            # The test run does not start, so the coverage is not stopped by the test runner
+            if options["code_coverage"] is not None:
+                options["code_coverage"].stop()
+            raise
         time_stamp = datetime.now().strftime(TestSettings.REPORT_TIME_STAMP_FORMAT)
 
         report_data = {}
-        test_run_result = cls._run_test_suites(test_suites_to_run, report_data, time_stamp, options)
+        test_suite_info = {}
+        test_run_result = cls._run_test_suites(scheduler, report_data, test_suite_info, time_stamp,
+                                               options)
 
         if options.get("create_html_report", False):
-            html_output = generate_html_report(report_data)
+            measurements = cls._read_measurement_summaries(report_data, options, time_stamp)
+            attachments = cls._read_attachments(report_data, options, time_stamp)
+            if options["lazy_html_report"]:
+                html_output = generate_lazy_html_report(report_data, test_suite_info, measurements,
+                                                        attachments)
+            else:
+                html_output = generate_html_report(report_data, test_suite_info, measurements,
+                                                   attachments)
             filename = os.path.join(options["report_folder"], f"{time_stamp}_TestRunner.html")
             if not os.path.isdir(options["report_folder"]):
                 os.makedirs(options["report_folder"])
@@ -299,6 +974,12 @@ class TestRunner:
             if options.get("open_in_browser", False):
                 webbrowser.open(filename)
 
+        if options["create_trend_report"]:
+            trend_report = TrendReport(options["report_folder"])
+            trend_report.update_index()
+            if trend_report.write_html_report() is None:
+                print("No trend report written, the test runs have no log files or log archive")
+
         return test_run_result
 
 
@@ -6,3 +6,32 @@ Container for the test settings
 class TestSettings:
     REPORT_FOLDER_NAME = "lily_unit_test_reports"
     REPORT_TIME_STAMP_FORMAT = "%Y%m%d_%H%M%S"
+    LOG_WRITER_BUFFER_SIZE = 1024 * 1024
+    LAST_FAILED_FILENAME = "last_failed.json"
+    DURATIONS_FILENAME = "durations.json"
+    EVENT_STREAM_QUEUE_SIZE = 10000
+    EVENT_STREAM_CLOSE_TIMEOUT = 5
+    PLUGIN_ENTRY_POINT_GROUP = "lily_unit_test.plugins"
+    TREND_INDEX_FILENAME = "trend_index.json"
+    TREND_REPORT_FILENAME = "trend_report.html"
+    TREND_REGRESSION_THRESHOLD = 0.2
+    TREND_MINIMUM_DURATION = 0.1
+    TREND_REPORT_MAX_RUNS = 20
+    REPEAT_STATISTICS_FILENAME = "repeat_statistics.json"
+    RESOURCE_SAMPLING_INTERVAL = 0.1
+    RESOURCE_SAMPLES_FILENAME = "resource_samples.json"
+    COMPARE_MAX_DIFFERENCES = 10
+    COMPARE_CONTEXT = 3
+    COMPARE_TEXT_WINDOW = 1000
+    MEASUREMENTS_CSV_FILENAME = "measurements.csv"
+    MEASUREMENTS_BINARY_FILENAME = "measurements.lmc"
+    FD_CAPTURE_BUFFER_SIZE = 65536
+    FD_CAPTURE_STOP_TIMEOUT = 5
+    SOAK_WINDOW = 100
+    SOAK_REPORT_INTERVAL = 60
+    SOAK_STATISTICS_FILENAME = "soak_statistics.json"
+    COVERAGE_FILENAME = "coverage.json"
+    COVERAGE_REPORT_FILENAME = "coverage.html"
+    ATTACHMENTS_FOLDER_NAME = "attachments"
+    ATTACHMENTS_FILENAME = "attachments.json"
+    ATTACHMENT_BUFFER_SIZE = 1024 * 1024
@@ -2,15 +2,27 @@
 Test suite class.
 """
 
+import functools
+import os
+import sys
 import threading
 import time
 import traceback
 
+from lily_unit_test.attachments import AttachmentStore, write_attachments
 from lily_unit_test.classification import Classification
+from lily_unit_test.clock import Clock, VirtualClock
+from lily_unit_test.compare import compare
+from lily_unit_test.fd_capture import FdCapture
+from lily_unit_test.load_test import LoadGenerator
 from lily_unit_test.logger import Logger
+from lily_unit_test.measurements import Measurements
+from lily_unit_test.parametrize import get_test_cases
+from lily_unit_test.test_settings import TestSettings
+from lily_unit_test.tolerance import check_close, check_monotonic, check_range
 
 
-class TestSuite:
+class TestSuite:  # pylint: disable=too-many-instance-attributes
     """
     Base class for all test suites.
 
@@ -22,13 +34,34 @@ class TestSuite:
     """
 
     CLASSIFICATION = Classification.PASS
+    LOG_LEVEL = None
+    RESOURCES = []
+    DEPENDS_ON = []
+    TAGS = []
+    VIRTUAL_TIME = False
+    CAPTURE_FD_OUTPUT = False
+    PRIORITY = 0
+    EXPECTED_DURATION = None
 
     def __init__(self, report_path=None):
         self._test_suite_name = self.__class__.__name__
         self._report_path = report_path
         self.log = Logger()
+        if self.LOG_LEVEL is not None:
+            self.log.set_log_level(self.LOG_LEVEL)
         self._test_suite_result = None
         self._lock = threading.RLock()
+        self._resource_manager = None
+        self._test_case_filter = set()
+        self._test_method_selection = None
+        self._failed_test_cases = []
+        self._plugins = None
+        self.measurements = Measurements()
+        self.clock = Clock()
+        self._measurements_path = None
+        self._test_case_name = ""
+        self._deadline = None
+        self._attachments = []
 
     def _set_result(self, result):
         with self._lock:
@@ -39,11 +72,36 @@ class TestSuite:
             result = self._test_suite_result
         return result
 
+    def _log_info(self, message):
+        # Messages from the test suite itself are always logged, regardless of the log level
+        self.log.handle_message(Logger.TYPE_INFO, f"{message}\n")
+
+    def _fail_with_summary(self, summary, error_message, raise_exception):
+        if summary is not None:
+            if callable(error_message):
+                error_message = error_message()
+            self.fail(summary if error_message is None else f"{error_message}\n{summary}",
+                      raise_exception)
+
     def _get_test_methods(self):
         test_methods = list(filter(lambda x: x.startswith("test_"),
                                    list(vars(self.__class__).keys())))
         n_tests = len(test_methods)
         assert n_tests > 0, "No tests defined (methods starting with 'test_)"
+        if self._test_method_selection is not None:
+            test_methods = list(filter(lambda x: x in self._test_method_selection, test_methods))
+            self._log_info(f"Run selected test methods only: {', '.join(test_methods)}")
+        if len(self._test_case_filter) > 0:
+            # Skip the test methods without selected test cases, before reading any parameters
+            method_names = {x.split(".", maxsplit=1)[-1].split("[")[0]
+                            for x in self._test_case_filter}
+            selected = list(filter(lambda x: x in method_names, test_methods))
+            if len(selected) > 0:
+                self._log_info(f"Run selected test cases only: "
+                               f"{', '.join(sorted(self._test_case_filter))}")
+                return selected
+            self._log_info("None of the selected test cases exist, run all test cases")
+            self._test_case_filter = set()
         return test_methods
 
     def _run_setup(self, log_traceback):
@@ -59,30 +117,145 @@ class TestSuite:
                 self.log.error(traceback.format_exc().strip())
             self._set_result(False)
 
+    def _run_test_case(self, test_case_name, test_method, args, kwargs, log_traceback):
+        plugins = self._plugins
+        if plugins is None:
+            return self._execute_test_case(test_case_name, test_method, args, kwargs,
+                                           log_traceback)
+
+        if plugins.case_started is not None:
+            plugins.case_started(self._test_suite_name, test_case_name)
+        start = time.perf_counter()
+        result = self._execute_test_case(test_case_name, test_method, args, kwargs,
+                                         log_traceback)
+        if plugins.case_finished is not None:
+            plugins.case_finished(self._test_suite_name, test_case_name, result,
+                                  time.perf_counter() - start)
+        return result
+
+    def _execute_test_case(self, test_case_name, test_method, args, kwargs, log_traceback):
+        self._log_info(f"Run test case: {test_case_name}")
+        self._test_case_name = test_case_name
+        try:
+            # Start result None. Test case can set the result to False by using a fail method.
+            self._set_result(None)
+            load_settings = getattr(test_method, "load_scenario", None)
+            if load_settings is None:
+                method_result = test_method(*args, **kwargs)
+            else:
+                # The result is in the measurements of the load scenario
+                method_result = None
+                self._run_load_scenario(test_case_name,
+                                        functools.partial(test_method, *args, **kwargs),
+                                        load_settings)
+            if (not self.log.has_stderr_messages() and self._get_result() is None and
+                    method_result is None or method_result):
+                self._log_info(f"Test case {test_case_name}: PASSED")
+                return True
+            self.log.error(f"Test case {test_case_name}: FAILED")
+        except Exception as e:
+            self.log.error(f"Test case {test_case_name}: FAILED by exception\nException: {e}")
+            if log_traceback:
+                self.log.error(traceback.format_exc().strip())
+        return False
+
+    def _run_load_scenario(self, test_case_name, function, settings):
+        generator = LoadGenerator(function, settings["concurrency"], settings["duration"],
+                                  settings["iterations"], settings["mode"])
+        result = generator.run()
+        summary = result["histogram"].get_summary()
+        self._log_info(f"Load scenario {test_case_name}: {result['calls']} calls from "
+                       f"{settings['concurrency']} workers ({generator.get_mode()}) in "
+                       f"{result['duration']:.2f} s, {result['throughput']:.1f} calls/s, "
+                       f"{result['errors']} errors ({result['error_rate']:.2f}%)")
+        self._log_info("Latency: " + ", ".join(f"{name} {1000 * summary[name]:.3f} ms" for name in
+                                               ("min", "mean", "p50", "p90", "p99", "p99.9",
+                                                "max")))
+        if result["first_error"] is not None:
+            self.log.error(f"First error: {result['first_error']}")
+        # The thresholds are the limits of the measurements
+        name = test_case_name.split(".", maxsplit=1)[1]
+        self.record(f"{name} throughput", result["throughput"], "calls/s",
+                    low=settings["min_throughput"])
+        self.record(f"{name} error rate", result["error_rate"], "%",
+                    high=settings["max_error_rate"])
+        for percentile in ("p50", "p90", "p99", "p99.9"):
+            high = settings["max_p99"] if percentile == "p99" else None
+            self.record(f"{name} {percentile} latency", 1000 * summary[percentile], "ms",
+                        high=None if high is None else 1000 * high)
+
+    def _get_attachments_report_path(self):
+        report_path = self.get_report_path()
+        if report_path is None:
+            # Not run by the test runner, use its default: next to the folder with the test suites
+            filename = getattr(sys.modules.get(self.__class__.__module__), "__file__", None)
+            folder = (os.getcwd() if filename is None
+                      else os.path.dirname(os.path.dirname(os.path.abspath(filename))))
+            report_path = os.path.join(folder, TestSettings.REPORT_FOLDER_NAME)
+        return report_path
+
+    def _is_past_deadline(self):
+        # Set by the test runner when the test run has a time budget
+        return self._deadline is not None and time.monotonic() >= self._deadline
+
+    @staticmethod
+    def _get_test_cases(test_method_name, test_method):
+        # Yields the test case name, the method to run and its arguments. An exception from the
+        # parameter source is a failed test case of the test method, the other methods still run.
+        test_cases = get_test_cases(test_method_name, test_method)
+        while True:
+            try:
+                name, args, kwargs = next(test_cases)
+            except StopIteration:
+                return
+            except Exception as e:
+                error = RuntimeError(f"Cannot get the parameters of {test_method_name}: {e}")
+                error.__cause__ = e
+
+                def _raise_error():
+                    raise error
+
+                yield test_method_name, _raise_error, (), {}
+                return
+            yield name, test_method, args, kwargs
+
     def _run_test_methods(self, test_methods, log_traceback):
         n_passed = 0
-        for test_method in test_methods:
-            test_case_name = f"{self._test_suite_name}.{test_method}"
-            self.log.info(f"Run test case: {test_case_name}")
-            try:
-                # Start result None. Test case can set the result to False by using a fail method.
-                self._set_result(None)
-                method_result = getattr(self, test_method)()
-                if (not self.log.has_stderr_messages() and self._get_result() is None and
-                        method_result is None or method_result):
+        n_test_cases = 0
+        n_skipped = 0
+        for test_method_name in test_methods:
+            test_method = getattr(self, test_method_name)
+            method_name = f"{self._test_suite_name}.{test_method_name}"
+            for name, method, args, kwargs in self._get_test_cases(test_method_name, test_method):
+                test_case_name = f"{self._test_suite_name}.{name}"
+                if (len(self._test_case_filter) > 0 and
+                        test_case_name not in self._test_case_filter and
+                        method_name not in self._test_case_filter and method is test_method):
+                    continue
+                # At least one test case runs, so the test suite always has a result
+                if n_test_cases > 0 and self._is_past_deadline():
+                    self._log_info(f"Test case {test_case_name}: "
+                                   "SKIPPED because of the time budget")
+                    n_skipped += 1
+                    continue
+                n_test_cases += 1
+                if self._run_test_case(test_case_name, method, args, kwargs, log_traceback):
                     n_passed += 1
-                    self.log.info(f"Test case {test_case_name}: PASSED")
                 else:
-                    self.log.error(f"Test case {test_case_name}: FAILED")
-            except Exception as e:
-                self.log.error(f"Test case {test_case_name}: FAILED by exception\nException: {e}")
-                if log_traceback:
-                    self.log.error(traceback.format_exc().strip())
+                    self._failed_test_cases.append(test_case_name)
 
-        ratio = 100 * n_passed / len(test_methods)
-        self.log.info(f"Test suite {self._test_suite_name}: "
-                      f"{n_passed} of {len(test_methods)} test cases passed ({ratio:.1f}%)")
-        self._set_result(n_passed == len(test_methods))
+        if n_test_cases == 0:
+            self.log.error(f"Test suite {self._test_suite_name}: FAILED: no test cases, "
+                           "all parameter sets are empty")
+            self._set_result(False)
+            return
+        ratio = 100 * n_passed / n_test_cases
+        self._log_info(f"Test suite {self._test_suite_name}: "
+                       f"{n_passed} of {n_test_cases} test cases passed ({ratio:.1f}%)")
+        if n_skipped > 0:
+            self._log_info(f"Test suite {self._test_suite_name}: "
+                           f"{n_skipped} test cases skipped because of the time budget")
+        self._set_result(n_passed == n_test_cases)
 
     def _run_teardown(self, log_traceback):
         try:
@@ -94,6 +267,50 @@ class TestSuite:
                 self.log.error(traceback.format_exc().strip())
             self._set_result(False)
 
+    def _write_measurements(self):
+        if len(self.measurements) == 0:
+            return
+        n_failed = len(self.measurements) - sum(self.measurements.get_column("passed"))
+        self._log_info(f"Test suite {self._test_suite_name}: {len(self.measurements)} "
+                       f"measurements recorded, {n_failed} out of limits")
+        if self._measurements_path is None:
+            return
+        try:
+            os.makedirs(os.path.dirname(self._measurements_path), exist_ok=True)
+            self.measurements.write_csv(
+                f"{self._measurements_path}_{TestSettings.MEASUREMENTS_CSV_FILENAME}")
+            self.measurements.write_binary(
+                f"{self._measurements_path}_{TestSettings.MEASUREMENTS_BINARY_FILENAME}")
+        except Exception as e:
+            self.log.error(f"Test suite {self._test_suite_name}: FAILED writing the measurements\n"
+                           f"Exception: {e}")
+            self._set_result(False)
+
+    def _write_attachments(self):
+        if len(self._attachments) == 0 or self._measurements_path is None:
+            return
+        try:
+            write_attachments(f"{self._measurements_path}_{TestSettings.ATTACHMENTS_FILENAME}",
+                              self._attachments)
+        except Exception as e:
+            self.log.error(f"Test suite {self._test_suite_name}: FAILED writing the attachments\n"
+                           f"Exception: {e}")
+            self._set_result(False)
+
+    def _check_classification(self):
+        if self.CLASSIFICATION == Classification.FAIL:
+            # We expect a failure
+            self._set_result(not self._get_result())
+            if self._get_result():
+                self._log_info("Test suite failed, "
+                               "but accepted because classification is set to 'FAIL'")
+            else:
+                self.log.error("Test suite passed, "
+                               "but a failure was expected because classification is set to 'FAIL'")
+        elif self.CLASSIFICATION != Classification.PASS:
+            self.log.error(f"Test classification is not defined: '{self.CLASSIFICATION}'")
+            self._set_result(False)
+
     def run(self, log_traceback=False):
         """
         Run the test suite.
@@ -106,17 +323,30 @@ class TestSuite:
         Before executing the test methods, it executes the setup method. After executing the test
         methods, it executes the teardown method.
         """
-        self.log.info(f"Run test suite: {self._test_suite_name}")
+        self._log_info(f"Run test suite: {self._test_suite_name}")
 
         self._set_result(None)
+        self._failed_test_cases = []
+        self._attachments = []
+        self.measurements = Measurements()
+        fd_capture = FdCapture(self.log)
+        if self.VIRTUAL_TIME:
+            self.clock = VirtualClock()
+            self.clock.add_thread()
+            self.clock.enter_thread()
         try:
+            if self.CAPTURE_FD_OUTPUT:
+                fd_capture.start()
             test_methods = self._get_test_methods()
             self._run_setup(log_traceback)
-            # After setup, result is either None or False
-            if self._get_result() is None:
-                self._run_test_methods(test_methods, log_traceback)
-            assert self._get_result() is not None, "Unexpected test result None"
-            self._run_teardown(log_traceback)
+            try:
+                # After setup, result is either None or False
+                if self._get_result() is None:
+                    self._run_test_methods(test_methods, log_traceback)
+                assert self._get_result() is not None, "Unexpected test result None"
+            finally:
+                # The teardown always runs after the setup
+                self._run_teardown(log_traceback)
         except Exception as e:
             self.log.error(f"Test suite {self._test_suite_name}: FAILED by exception\n"
                            f"Exception: {e}")
@@ -124,21 +354,17 @@ class TestSuite:
                 self.log.error(traceback.format_exc().strip())
             self._set_result(False)
 
-        if self.CLASSIFICATION == Classification.FAIL:
-            # We expect a failure
-            self._set_result(not self._get_result())
-            if self._get_result():
-                self.log.info("Test suite failed, "
-                              "but accepted because classification is set to 'FAIL'")
-            else:
-                self.log.error("Test suite passed, "
-                               "but a failure was expected because classification is set to 'FAIL'")
-        elif self.CLASSIFICATION != Classification.PASS:
-            self.log.error(f"Test classification is not defined: '{self.CLASSIFICATION}'")
-            self._set_result(False)
+        fd_capture.stop()
+        if self.VIRTUAL_TIME:
+            self.clock.exit_thread()
+            self.clock.close()
+
+        self._write_measurements()
+        self._write_attachments()
+        self._check_classification()
 
         if self._get_result():
-            self.log.info(f"Test suite {self._test_suite_name}: PASSED")
+            self._log_info(f"Test suite {self._test_suite_name}: PASSED")
         else:
             self.log.error(f"Test suite {self._test_suite_name}: FAILED")
 
@@ -154,6 +380,30 @@ class TestSuite:
         """
         return self._report_path
 
+    def get_failed_test_cases(self):
+        """
+        Get the names of the test cases that failed in the last run of the test suite.
+
+        :return: list with test case names, e.g.: :code:`["MyTestSuite.test_something"]`.
+        """
+        return list(self._failed_test_cases)
+
+    def get_resource(self, name):
+        """
+        Get a shared resource from the test runner. The resource is created when it is requested
+        for the first time in the test run. See the resource provider class for more details.
+
+        :param name: the name of the resource, as defined in the test runner options.
+        :return: the resource object.
+
+        Declare the resources that the test suite uses in the :code:`RESOURCES` attribute.
+        The test runner keeps the resource alive until the last test suite that declares it.
+        Shared resources are only available when the test suite is executed by the test runner.
+        """
+        assert self._resource_manager is not None, \
+            "Shared resources are only available when running from the test runner"
+        return self._resource_manager.get_resource(name, self._test_suite_name)
+
     ##############################
     # Override these when needed #
     ##############################
@@ -188,7 +438,8 @@ class TestSuite:
         """
         Make the test suite fail.
 
-        :param error_message: the error message that should be written to the logger.
+        :param error_message: the error message that should be written to the logger, or a
+            function that returns the error message.
         :param raise_exception: if True, an exception is raised and the test suite will stop.
 
         The fail method logs an error message and raises an exception.
@@ -219,6 +470,8 @@ class TestSuite:
                     # do some other stuff
 
         """
+        if callable(error_message):
+            error_message = error_message()
         self.log.error(error_message)
         if raise_exception:
             raise Exception(error_message)
@@ -229,13 +482,17 @@ class TestSuite:
         Fail if the given expression evaluates to True.
 
         :param expression: the expression that should be evaluated.
-        :param error_message: the error message that should be written to the logger.
+        :param error_message: the error message that should be written to the logger, or a
+            function that returns the error message.
         :param raise_exception: if True, an exception is raised and the test suite will stop.
 
         Same as :code:`fail()` but evaluates an expression first.
         If the expression evaluates to :code:`True`, the :code:`fail()` method is executed
         with the given parameters.
 
+        Use a function for an error message that takes time to create, so it is only created
+        when the test fails: :code:`self.fail_if(x > 10, lambda: f"Too high: {describe(x)}")`.
+
         .. code-block:: python
 
             class MyTestSuite(lily_unit_test.TestSuite):
@@ -256,14 +513,214 @@ class TestSuite:
         if expression:
             self.fail(error_message, raise_exception)
 
+    def fail_if_not_equal(self, actual, expected, error_message=None, raise_exception=True,
+                          max_differences=TestSettings.COMPARE_MAX_DIFFERENCES):
+        """
+        Fail if the actual value is not equal to the expected value. The error message has a
+        summary of the first differences.
+
+        :param actual: the actual value.
+        :param expected: the expected value.
+        :param error_message: optional error message that is written before the differences,
+            or a function that returns the error message.
+        :param raise_exception: if True, an exception is raised and the test suite will stop.
+        :param max_differences: maximum number of differences in the error message.
+
+        Equal values cost the same as comparing them with :code:`==`, also for large data.
+        Bytes, text, sequences (e.g. lists) and mappings (e.g. dictionaries) are compared item
+        by item only when they differ, and only until the maximum number of differences is found.
+
+        .. code-block:: python
+
+            class MyTestSuite(lily_unit_test.TestSuite):
+
+                def test_memory_dump(self):
+                    # Reports the offsets and bytes of the first differences
+                    self.fail_if_not_equal(read_memory(0, 0x1000000), expected_dump,
+                                           "Memory content is wrong")
+
+                def test_registers(self):
+                    # Reports the missing keys and the keys with different values
+                    self.fail_if_not_equal(read_registers(), {"CTRL": 0x01, "STATUS": 0x80})
+        """
+        self._fail_with_summary(compare(actual, expected, max_differences), error_message,
+                                raise_exception)
+
+    def fail_if_out_of_range(self, values, minimum=None, maximum=None, error_message=None,
+                             raise_exception=True):
+        """
+        Fail if any of the values is out of range. All values are checked at once and the error
+        message has one summary: the number of values out of range, the worst value and the
+        indices.
+
+        :param values: the values, a list, an :code:`array.array`, an object with the buffer
+            protocol or a NumPy array.
+        :param minimum: the minimum value, a list with the minimum for each value or None.
+        :param maximum: the maximum value, a list with the maximum for each value or None.
+        :param error_message: optional error message that is written before the summary,
+            or a function that returns the error message.
+        :param raise_exception: if True, an exception is raised and the test suite will stop.
+
+        When NumPy is installed, the values are checked with NumPy.
+
+        .. code-block:: python
+
+            class MyTestSuite(lily_unit_test.TestSuite):
+
+                def test_output_voltage(self):
+                    # Fails with e.g.:
+                    # 12 of 10000 values out of range [4.9, 5.1]
+                    # Worst at index 5012: 5.37, 0.27 outside the limits
+                    # Indices: 5008-5019
+                    self.fail_if_out_of_range(self.scope.read_waveform(), 4.9, 5.1)
+        """
+        self._fail_with_summary(check_range(values, minimum, maximum), error_message,
+                                raise_exception)
+
+    def fail_if_not_close(self, values, expected, abs_tolerance=0.0, rel_tolerance=0.0,
+                          error_message=None, raise_exception=True):
+        # pylint: disable=too-many-arguments,too-many-positional-arguments
+        """
+        Fail if any of the values deviates too much from the expected value. All values are
+        checked at once and the error message has one summary.
+
+        :param values: the values, a list, an :code:`array.array`, an object with the buffer
+            protocol or a NumPy array.
+        :param expected: the expected value or a list with the expected value for each value.
+        :param abs_tolerance: the allowed absolute deviation.
+        :param rel_tolerance: the allowed deviation relative to the expected value
+            (e.g. 0.01 for 1%).
+        :param error_message: optional error message that is written before the summary,
+            or a function that returns the error message.
+        :param raise_exception: if True, an exception is raised and the test suite will stop.
+
+        The allowed deviation is the largest of the absolute and the relative tolerance.
+
+        .. code-block:: python
+
+            class MyTestSuite(lily_unit_test.TestSuite):
+
+                def test_frequency_response(self):
+                    gains = self.analyzer.sweep(frequencies)
+                    self.fail_if_not_close(gains, reference_gains, 0.1, 0.02)
+        """
+        self._fail_with_summary(check_close(values, expected, abs_tolerance, rel_tolerance),
+                                error_message, raise_exception)
+
+    def fail_if_not_monotonic(self, values, increasing=True, strict=False, error_message=None,
+                              raise_exception=True):
+        """
+        Fail if the values are not increasing or decreasing. All values are checked at once and
+        the error message has one summary.
+
+        :param values: the values, a list, an :code:`array.array`, an object with the buffer
+            protocol or a NumPy array.
+        :param increasing: True if the values must increase, False if the values must decrease.
+        :param strict: True if equal values next to each other are not allowed.
+        :param error_message: optional error message that is written before the summary,
+            or a function that returns the error message.
+        :param raise_exception: if True, an exception is raised and the test suite will stop.
+
+        .. code-block:: python
+
+            class MyTestSuite(lily_unit_test.TestSuite):
+
+                def test_sweep(self):
+                    self.fail_if_not_monotonic(self.generator.get_sweep_frequencies(),
+                                               strict=True)
+        """
+        self._fail_with_summary(check_monotonic(values, increasing, strict), error_message,
+                                raise_exception)
+
+    def record(self, name, value, unit="", low=None, high=None):
+        """
+        Record a measured value. The value is checked against the limits, if the value is out of
+        the limits, an error is logged and the test case fails, but continues.
+
+        :param name: the name of the measurement.
+        :param value: the measured value.
+        :param unit: the unit of the value.
+        :param low: the lowest allowed value or None for no limit.
+        :param high: the highest allowed value or None for no limit.
+        :return: True if the value is within the limits, else False.
+
+        The measurements are stored in the :code:`measurements` attribute, a Measurements object
+        that stores the values in compact columns. When the test suite is run by the test runner,
+        the measurements are written next to the log files as a CSV file and a binary file with
+        the columns. The HTML report has a table with a summary of each measurement.
+
+        .. code-block:: python
+
+            class MyTestSuite(lily_unit_test.TestSuite):
+
+                def test_output_voltage(self):
+                    for load in (0.1, 0.5, 1.0):
+                        self.electronic_load.set_current(load)
+                        self.record("Output voltage", self.dmm.read_voltage(), "V", 4.9, 5.1)
+        """
+        passed = self.measurements.add(name, value, unit, low, high, self._test_case_name)
+        if not passed:
+            limits = ", ".join("-" if x is None else f"{x:g}" for x in (low, high))
+            self.fail(f"Measurement {name}: {float(value):g} {unit} is out of the limits "
+                      f"[{limits}]", False)
+        return passed
+
+    def attach(self, path_or_buffer, name=None):
+        """
+        Attach a file or a buffer to the report of the current test case, like a scope capture,
+        firmware image or packet dump.
+
+        :param path_or_buffer: the filename of a file, or an object with the bytes, like bytes,
+            bytearray or memoryview.
+        :param name: the name of the attachment, by default the name of the file.
+        :return: dictionary with the test case, name, hash, size and path of the attachment.
+
+        The attachments are stored by their content in the folder 'attachments' in the report
+        folder, so identical attachments are stored only once, see the AttachmentStore class.
+        Without a report path, the default report folder of the test runner is used, next to the
+        folder with the module of the test suite.
+        The attachment is logged and the HTML report links to it from the test suite. When the
+        test suite is run by the test runner, the attachments are also written next to the log
+        files as a JSON file.
+
+        .. code-block:: python
+
+            class MyTestSuite(lily_unit_test.TestSuite):
+
+                def test_flash_firmware(self):
+                    self.attach("build/firmware.hex")
+                    self.attach(self.scope.get_screenshot(), "scope_capture.png")
+        """
+        if name is None:
+            assert isinstance(path_or_buffer, (str, os.PathLike)), "Attachment without a name"
+            name = os.path.basename(path_or_buffer)
+        store = AttachmentStore(os.path.join(self._get_attachments_report_path(),
+                                             TestSettings.ATTACHMENTS_FOLDER_NAME))
+        digest, size, path = store.add(path_or_buffer)
+        attachment = {"test_case": self._test_case_name, "name": name, "sha256": digest,
+                      "size": size, "path": f"{TestSettings.ATTACHMENTS_FOLDER_NAME}/{path}"}
+        with self._lock:
+            self._attachments.append(attachment)
+        self._log_info(f'Attachment "{name}": {attachment["path"]} ({size} bytes)')
+        return attachment
+
+    def get_attachments(self):
+        """
+        Get the attachments of the last run of the test suite.
+
+        :return: list with a dictionary for each attachment, see attach().
+        """
+        with self._lock:
+            return list(self._attachments)
+
     @staticmethod
     def sleep(sleep_time):
         """
-        Simple wrapper for time.sleep()
+        Wrapper for time.sleep(). With virtual time, the clock of the test suite is used.
 
         :param sleep_time: time to sleep in seconds (can be fractional)
         """
-        time.sleep(sleep_time)
+        Clock.get_thread_clock().sleep(sleep_time)
 
     @staticmethod
     def start_thread(target, args=()):
@@ -313,7 +770,22 @@ class TestSuite:
         When checking if the thread is finished,
         a timeout should be included.
         """
-        t = threading.Thread(target=target, args=args)
+        # Messages from the thread are written to the logger of the thread that starts it
+        logger = Logger.get_active_logger()
+        # The thread uses the virtual time of the thread that starts it
+        clock = Clock.get_thread_clock()
+        clock.add_thread()
+
+        def _run_target():
+            if logger is not None:
+                logger.redirect_thread()
+            clock.enter_thread()
+            try:
+                target(*args)
+            finally:
+                clock.exit_thread()
+
+        t = threading.Thread(target=_run_target)
         t.daemon = True
         t.start()
         return t
@@ -354,6 +826,7 @@ class TestSuite:
 
         """
         result = None
+        clock = Clock.get_thread_clock()
         while timeout > 0:
             if callable(object_to_check):
                 result = object_to_check()
@@ -361,7 +834,7 @@ class TestSuite:
                 result = object_to_check[0]
             if result == expected_result:
                 return True
-            time.sleep(interval)
+            clock.sleep(interval)
             timeout -= interval
         return False
 
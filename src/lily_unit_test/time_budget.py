@@ -0,0 +1,144 @@
+"""
+Time budget for a test run: selects the test suites that fit and stops at the deadline.
+"""
+
+import json
+import os
+import time
+
+from lily_unit_test.test_settings import TestSettings
+
+
+class TimeBudget:
+    """
+    Selects the test suites that fit in a time budget and keeps track of the deadline.
+
+    :param time_budget: the time budget in seconds.
+    :param run_last: name of the test suite that runs last, this test suite is never stopped.
+
+    The expected duration of a test suite is its duration in a previous test run, or else its
+    :code:`EXPECTED_DURATION` attribute. The durations of the test suites are stored in the report
+    folder after each test run. Test suites without an expected duration count as zero seconds.
+    """
+
+    def __init__(self, time_budget, run_last=None):
+        self._time_budget = time_budget
+        self._run_last = run_last
+        self._selection = None
+        self._deadline = None
+        self._stopped = set()
+
+    ##########
+    # Public #
+    ##########
+
+    def start(self, scheduler, durations):
+        """
+        Select the test suites and start the time budget.
+
+        :param scheduler: the scheduler with the test suites of the test run, in order of
+            priority.
+        :param durations: dictionary with the test suite names and their durations in seconds from
+            previous test runs.
+        :return: text that describes the selection.
+        """
+        test_suites = scheduler.get_order()
+        expected_durations = {}
+        for test_suite in test_suites:
+            duration = durations.get(test_suite.__name__, test_suite.EXPECTED_DURATION)
+            if duration is not None:
+                expected_durations[test_suite] = duration
+        self._selection = scheduler.select_within_budget(expected_durations, self._time_budget)
+        self._deadline = time.monotonic() + self._time_budget
+        expected_duration = sum(expected_durations.get(x, 0) for x in self._selection)
+        return (f"Time budget of {self._time_budget} seconds: {len(self._selection)} of "
+                f"{len(test_suites)} test suites selected, expected duration "
+                f"{expected_duration:.1f} seconds")
+
+    def get_deadline(self, test_suite):
+        """
+        :param test_suite: the test suite class.
+        :return: the value of :code:`time.monotonic()` after which the test suite starts no more
+            test cases, None if the test suite is not stopped.
+        """
+        if test_suite.__name__ == self._run_last:
+            return None
+        return self._deadline
+
+    def is_skipped(self, test_suite, skipped_dependencies):
+        """
+        :param test_suite: the test suite class that can start.
+        :param skipped_dependencies: True if test suites it depends on are skipped.
+        :return: True if the test suite is skipped: it is not selected, the test suites it depends
+            on are skipped, or the deadline has passed.
+        """
+        if test_suite not in self._selection or skipped_dependencies:
+            return True
+        deadline = self.get_deadline(test_suite)
+        return deadline is not None and time.monotonic() >= deadline
+
+    def finish(self, test_suite):
+        """
+        Register that a test suite is finished. A test suite that finishes after the deadline
+        may have skipped test cases.
+
+        :param test_suite: the test suite class.
+        """
+        if time.monotonic() >= self._deadline:
+            self._stopped.add(test_suite)
+
+    def is_stopped(self, test_suite):
+        """
+        :param test_suite: the test suite class.
+        :return: True if the test suite finished after the deadline, its duration is not complete.
+        """
+        return test_suite in self._stopped
+
+
+def read_durations(report_folder):
+    """
+    Read the durations of the test suites from previous test runs.
+
+    :param report_folder: the report folder of the test runs.
+    :return: dictionary with the test suite names and their durations in seconds.
+    """
+    filename = os.path.join(report_folder, TestSettings.DURATIONS_FILENAME)
+    if not os.path.isfile(filename):
+        return {}
+    with open(filename, "r", encoding="utf-8") as fp:
+        return json.load(fp)["test_suites"]
+
+
+def write_durations(report_folder, durations, time_stamp):
+    """
+    Write the durations of the test suites. Test suites that are not in the given durations keep
+    their durations from previous test runs.
+
+    :param report_folder: the report folder of the test runs.
+    :param durations: dictionary with the test suite names and their durations in seconds.
+    :param time_stamp: the time stamp of the test run.
+    """
+    all_durations = read_durations(report_folder)
+    all_durations.update({name: round(duration, 3) for name, duration in durations.items()})
+    os.makedirs(report_folder, exist_ok=True)
+    with open(os.path.join(report_folder, TestSettings.DURATIONS_FILENAME), "w",
+              encoding="utf-8") as fp:
+        json.dump({"time_stamp": time_stamp, "test_suites": all_durations}, fp, indent=2)
+
+
+if __name__ == "__main__":
+
+    from lily_unit_test.scheduler import TestScheduler
+    from lily_unit_test.test_suite import TestSuite
+
+    _test_suites = [
+        type("TestFlash", (TestSuite,), {"PRIORITY": 10, "EXPECTED_DURATION": 20}),
+        type("TestFunctional", (TestSuite,), {"DEPENDS_ON": ["TestFlash"]}),
+        type("TestSoak", (TestSuite,), {"EXPECTED_DURATION": 600}),
+        type("TestSmoke", (TestSuite,), {"EXPECTED_DURATION": 5})
+    ]
+    _budget = TimeBudget(120)
+    print(_budget.start(TestScheduler(_test_suites), {"TestFunctional": 60}))
+    for _test_suite in _test_suites:
+        _skipped = _budget.is_skipped(_test_suite, False)
+        print(f"{_test_suite.__name__}: {'skipped' if _skipped else 'run'}")
@@ -0,0 +1,271 @@
+"""
+Checks of many measurement values at once, with a summary of the values that fail.
+"""
+
+import itertools
+import math
+import operator
+
+from lily_unit_test.test_settings import TestSettings
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+def _get_values(values):
+    # A NumPy array when NumPy is installed, else a list, with one dimension
+    try:
+        view = memoryview(values)
+    except TypeError:
+        view = None
+    if numpy is not None:
+        return numpy.asarray(values if view is None else view, dtype=float).ravel()
+    if view is not None:
+        return view.tolist()
+    return values if isinstance(values, list) else list(values)
+
+
+def _is_scalar(value):
+    # None has zero dimensions for NumPy, but it is no limit
+    return value is not None and (isinstance(value, (int, float)) or
+                                  (numpy is not None and numpy.ndim(value) == 0))
+
+
+def _get_limits(limits, n_values):
+    if limits is None or _is_scalar(limits):
+        return limits
+    limits = _get_values(limits)
+    assert len(limits) == n_values, f"Expected {n_values} limits, got {len(limits)}"
+    return limits
+
+
+def _repeat(limits):
+    return itertools.repeat(limits) if _is_scalar(limits) else limits
+
+
+def _pick(values, indices):
+    if _is_scalar(values) or numpy is not None:
+        return values if _is_scalar(values) else values[indices]
+    return list(map(values.__getitem__, indices))
+
+
+def _get_item(values, index):
+    return values if _is_scalar(values) else values[index]
+
+
+def _get_indices(selection):
+    return list(itertools.compress(itertools.count(), selection))
+
+
+def _format_indices(indices, max_groups):
+    # Consecutive indices are shown as one range
+    if numpy is not None:
+        breaks = (numpy.flatnonzero(numpy.diff(indices) != 1) + 1).tolist()
+    else:
+        breaks = list(itertools.compress(itertools.count(1), map(
+            operator.ne, map(operator.sub, itertools.islice(indices, 1, None), indices),
+            itertools.repeat(1))))
+    starts = [0] + breaks
+    ends = breaks + [len(indices)]
+    groups = []
+    for start, end in zip(starts[:max_groups], ends):
+        first, last = int(indices[start]), int(indices[end - 1])
+        groups.append(str(first) if first == last else f"{first}-{last}")
+    if len(starts) > max_groups:
+        groups.append("...")
+    return ", ".join(groups)
+
+
+def _get_summary(description, indices, excess, get_details, max_groups):
+    # Excess: how far each failing value is from passing, not a number is the worst
+    if len(indices) == 0:
+        return None
+    if numpy is not None:
+        worst = int(numpy.argmax(numpy.where(numpy.isnan(excess), numpy.inf, excess)))
+    else:
+        worst = max(range(len(indices)),
+                    key=lambda i: math.inf if math.isnan(excess[i]) else excess[i])
+    return "\n".join([f"{len(indices)} of {description}",
+                      f"Worst at index {int(indices[worst])}: {get_details(worst)}",
+                      f"Indices: {_format_indices(indices, max_groups)}"])
+
+
+def _get_range_text(minimum, maximum):
+    if _is_scalar(minimum) and _is_scalar(maximum):
+        return f"out of range [{minimum:g}, {maximum:g}]"
+    if _is_scalar(minimum) and maximum is None:
+        return f"below {minimum:g}"
+    if _is_scalar(maximum) and minimum is None:
+        return f"above {maximum:g}"
+    return "out of the limits"
+
+
+def check_range(values, minimum=None, maximum=None,
+                max_groups=TestSettings.COMPARE_MAX_DIFFERENCES):
+    """
+    Check if all values are within the limits.
+
+    :param values: the values, a list, an :code:`array.array`, an object with the buffer
+        protocol or a NumPy array.
+    :param minimum: the minimum value, the minimum for each value (same type as the values) or
+        None for no minimum.
+    :param maximum: the maximum value, the maximum for each value or None for no maximum.
+    :param max_groups: maximum number of groups of consecutive indices in the summary.
+    :return: None if all values are within the limits, else a text with the number of values
+        out of range, the worst value and the indices.
+
+    Values that are not a number are always out of range. No values are always within the limits.
+    """
+    values = _get_values(values)
+    n_values = len(values)
+    minimum = _get_limits(minimum, n_values)
+    maximum = _get_limits(maximum, n_values)
+    if n_values == 0:
+        return None
+    if numpy is not None:
+        passed = ~numpy.isnan(values)
+        if minimum is not None:
+            passed &= values >= minimum
+        if maximum is not None:
+            passed &= values <= maximum
+        indices = numpy.flatnonzero(~passed)
+        # The initial not a number is ignored by fmax, values that are not a number stay
+        excess = numpy.full(len(indices), numpy.nan)
+        if minimum is not None:
+            excess = numpy.fmax(excess, _pick(minimum, indices) - values[indices])
+        if maximum is not None:
+            excess = numpy.fmax(excess, values[indices] - _pick(maximum, indices))
+    else:
+        # The sum is only not a number if there are values that are not a number
+        indices = (_get_indices(map(math.isnan, values)) if math.isnan(sum(values)) else [])
+        # The smallest and largest value are found faster than comparing each value
+        if minimum is not None and not (_is_scalar(minimum) and min(values) >= minimum):
+            indices.extend(_get_indices(map(operator.lt, values, _repeat(minimum))))
+        if maximum is not None and not (_is_scalar(maximum) and max(values) <= maximum):
+            indices.extend(_get_indices(map(operator.gt, values, _repeat(maximum))))
+        indices.sort()
+        selected = _pick(values, indices)
+        # Not a number stays not a number, because of the order of the arguments
+        excess = [math.nan] * len(indices)
+        if minimum is not None:
+            excess = list(map(max, map(operator.sub, _repeat(_pick(minimum, indices)), selected),
+                              excess))
+        if maximum is not None:
+            excess = list(map(max, map(operator.sub, selected, _repeat(_pick(maximum, indices))),
+                              excess))
+    return _get_summary(f"{n_values} values {_get_range_text(minimum, maximum)}", indices, excess,
+                        lambda i: f"{values[indices[i]]:g}, " + (
+                            "not a number" if math.isnan(excess[i]) else
+                            f"{excess[i]:g} outside the limits"),
+                        max_groups)
+
+
+def check_close(values, expected, abs_tolerance=0.0, rel_tolerance=0.0,
+                max_groups=TestSettings.COMPARE_MAX_DIFFERENCES):
+    """
+    Check if all values are close to the expected values.
+
+    :param values: the values, a list, an :code:`array.array`, an object with the buffer
+        protocol or a NumPy array.
+    :param expected: the expected value or the expected value for each value.
+    :param abs_tolerance: the allowed absolute deviation.
+    :param rel_tolerance: the allowed deviation relative to the expected value
+        (e.g. 0.01 for 1%).
+    :param max_groups: maximum number of groups of consecutive indices in the summary.
+    :return: None if all values are close, else a text with the number of values that are not
+        close, the worst value and the indices.
+
+    The allowed deviation of each value is the largest of the absolute tolerance and the relative
+    tolerance times the expected value.
+    """
+    values = _get_values(values)
+    n_values = len(values)
+    expected = _get_limits(expected, n_values)
+    if numpy is not None:
+        deviations = numpy.abs(values - expected)
+        allowed = numpy.maximum(abs_tolerance, rel_tolerance * numpy.abs(expected))
+        indices = numpy.flatnonzero(~(deviations <= allowed))
+        allowed = _pick(allowed, indices)
+        excess = deviations[indices] - allowed
+    else:
+        deviations = list(map(abs, map(operator.sub, values, _repeat(expected))))
+        if _is_scalar(expected):
+            allowed = max(abs_tolerance, rel_tolerance * abs(expected))
+        else:
+            allowed = list(map(max, itertools.repeat(abs_tolerance),
+                               map(operator.mul, itertools.repeat(rel_tolerance),
+                                   map(abs, expected))))
+        # Not a number is never close
+        indices = _get_indices(map(operator.not_, map(operator.le, deviations,
+                                                      _repeat(allowed))))
+        allowed = _pick(allowed, indices)
+        excess = list(map(operator.sub, _pick(deviations, indices), _repeat(allowed)))
+    expected = _pick(expected, indices)
+    return _get_summary(
+        f"{n_values} values not close to the expected values", indices, excess,
+        lambda i: (f"{values[indices[i]]:g}, expected {_get_item(expected, i):g}, "
+                   f"allowed deviation {_get_item(allowed, i):g}"),
+        max_groups)
+
+
+def check_monotonic(values, increasing=True, strict=False,
+                    max_groups=TestSettings.COMPARE_MAX_DIFFERENCES):
+    """
+    Check if the values are increasing or decreasing, like the frequencies of a sweep.
+
+    :param values: the values, a list, an :code:`array.array`, an object with the buffer
+        protocol or a NumPy array.
+    :param increasing: True if the values must increase, False if the values must decrease.
+    :param strict: True if equal values next to each other are not allowed.
+    :param max_groups: maximum number of groups of consecutive indices in the summary.
+    :return: None if the values are monotonic, else a text with the number of values that go in
+        the wrong direction, the largest step in the wrong direction and the indices.
+    """
+    values = _get_values(values)
+    if numpy is not None:
+        steps = numpy.diff(values) if increasing else -numpy.diff(values)
+        step_indices = numpy.flatnonzero(~(steps > 0 if strict else steps >= 0))
+        indices = step_indices + 1
+        excess = -steps[step_indices]
+    else:
+        steps = map(operator.sub, itertools.islice(values, 1, None), values)
+        if not increasing:
+            steps = map(operator.neg, steps)
+        steps = list(steps)
+        step_indices = _get_indices(map(operator.not_, map(
+            operator.gt if strict else operator.ge, steps, itertools.repeat(0))))
+        indices = list(map(operator.add, step_indices, itertools.repeat(1)))
+        excess = list(map(operator.neg, _pick(steps, step_indices)))
+    direction = "increasing" if increasing else "decreasing"
+    return _get_summary(
+        f"{len(values)} values not {'strictly ' if strict else ''}{direction}", indices, excess,
+        lambda i: f"{values[indices[i] - 1]:g} to {values[indices[i]]:g}", max_groups)
+
+
+if __name__ == "__main__":
+
+    import time
+
+    from array import array
+
+    n_samples = 1000000
+    waveform = array("d", (math.sin(i / 1000) for i in range(n_samples)))
+    waveform[123456] = 1.5
+    waveform[500000:500100] = array("d", [-1.2] * 100)
+
+    start_time = time.perf_counter()
+    summary = check_range(waveform, -1.0, 1.0)
+    print(f"Range check of {n_samples} samples: {1000 * (time.perf_counter() - start_time):.1f} ms")
+    print(summary)
+
+    frequencies = [1000 + 10 * i for i in range(n_samples)]
+    frequencies[1000] = frequencies[999]
+    start_time = time.perf_counter()
+    summary = check_monotonic(frequencies, strict=True)
+    print(f"Monotonic check of {n_samples} samples: "
+          f"{1000 * (time.perf_counter() - start_time):.1f} ms")
+    print(summary)
+
+    print(check_close([1.0, 2.05, 2.9, float("nan")], [1.0, 2.0, 3.0, 4.0], rel_tolerance=0.02))
@@ -0,0 +1,381 @@
+"""
+Trend report over the test runs in a report folder.
+"""
+
+import argparse
+import bz2
+import gzip
+import html
+import json
+import lzma
+import os
+import sys
+
+from datetime import datetime
+from string import Template
+from lily_unit_test.log_archive import LogArchive
+from lily_unit_test.logger import Logger
+from lily_unit_test.test_settings import TestSettings
+
+
+class TrendReport:
+    """
+    Compares the test runs in a report folder.
+
+    :param report_folder: the report folder of the test runner.
+
+    The results and durations of the test suites are read from the log files of each test run,
+    or from the log archive if there are no log files. They are stored in a small index file in
+    the report folder. Updating the index only reads the test runs that are not in the index yet.
+    Test runs stay in the index when their log files are removed.
+
+    .. code-block:: python
+
+        from lily_unit_test import TrendReport
+
+        trend_report = TrendReport("lily_unit_test_reports")
+        trend_report.update_index()
+        for test_suite, duration, baseline_duration in trend_report.get_regressions():
+            print(f"{test_suite}: {baseline_duration:.1f} -> {duration:.1f} seconds")
+        trend_report.write_html_report()
+
+    The trend report can also be created from the command line:
+
+    .. code-block:: console
+
+        python -m lily_unit_test.trend_report lily_unit_test_reports --threshold 0.5
+    """
+
+    INDEX_VERSION = 1
+    _OPENERS = {
+        ".txt": open,
+        ".gz": gzip.open,
+        ".bz2": bz2.open,
+        ".xz": lzma.open
+    }
+
+    def __init__(self, report_folder):
+        self._report_folder = report_folder
+        self._index_filename = os.path.join(report_folder, TestSettings.TREND_INDEX_FILENAME)
+        self._runs = {}
+        if os.path.isfile(self._index_filename):
+            with open(self._index_filename, "r", encoding="utf-8") as fp:
+                index = json.load(fp)
+            if index.get("version") == self.INDEX_VERSION:
+                self._runs = index["runs"]
+
+    @staticmethod
+    def _is_time_stamp(name):
+        try:
+            datetime.strptime(name, TestSettings.REPORT_TIME_STAMP_FORMAT)
+        except ValueError:
+            return False
+        return True
+
+    @staticmethod
+    def _get_summary(first_line, last_line):
+        time_format = Logger.TIME_STAMP_FORMAT
+        start = datetime.strptime(first_line.split(" | ", maxsplit=1)[0], time_format)
+        end = datetime.strptime(last_line.split(" | ", maxsplit=1)[0], time_format)
+        # Skipped test suites did not run, they are neither passed nor failed
+        result = {"PASSED": True, "FAILED": False, "SKIPPED": None}[Logger.get_result(last_line)]
+        return {
+            "result": result,
+            "duration": (end - start).total_seconds()
+        }
+
+    def _read_log_file(self, filename):
+        # Only the first and last line are needed, the file is read line by line
+        extension = os.path.splitext(filename)[1]
+        first_line = None
+        last_line = None
+        with self._OPENERS[extension](filename, "rt", encoding="utf-8") as fp:
+            for line in fp:
+                if line.strip() != "":
+                    if first_line is None:
+                        first_line = line
+                    last_line = line
+        if first_line is None:
+            return None
+        return self._get_summary(first_line, last_line.strip())
+
+    def _read_log_folder(self, log_folder):
+        test_suites = {}
+        run = None
+        for filename in sorted(os.listdir(log_folder)):
+            name, extension = os.path.splitext(filename)
+            if extension != ".txt":
+                name, extension = os.path.splitext(name)
+            if extension != ".txt" or "_" not in name:
+                continue
+            summary = self._read_log_file(os.path.join(log_folder, filename))
+            if summary is None:
+                continue
+            name = name.split("_", maxsplit=1)[1]
+            if name == "TestRunner":
+                run = summary
+            else:
+                test_suites[name] = summary
+        if run is None:
+            # The test run is not finished, the test runner log is written last
+            return None
+        run["test_suites"] = test_suites
+        return run
+
+    def _read_log_archive(self, filename):
+        test_suites = {}
+        run = None
+        with LogArchive(filename) as archive:
+            for test_suite in archive.get_test_suites():
+                log_messages = list(filter(lambda x: x.strip() != "",
+                                           archive.get_log_messages(test_suite)))
+                if len(log_messages) == 0:
+                    continue
+                summary = self._get_summary(log_messages[0], log_messages[-1])
+                name = test_suite.split("_", maxsplit=1)[1]
+                if name == "TestRunner":
+                    run = summary
+                else:
+                    test_suites[name] = summary
+        if run is None:
+            return None
+        run["test_suites"] = test_suites
+        return run
+
+    def _find_new_runs(self):
+        new_runs = {}
+        if not os.path.isdir(self._report_folder):
+            return new_runs
+        for item in os.scandir(self._report_folder):
+            if item.is_dir() and self._is_time_stamp(item.name):
+                new_runs[item.name] = item.path
+            elif item.name.endswith("_TestRunner.lla"):
+                time_stamp = item.name[:-len("_TestRunner.lla")]
+                if self._is_time_stamp(time_stamp):
+                    # Log files are preferred over the archive
+                    new_runs.setdefault(time_stamp, item.path)
+        return {key: value for key, value in new_runs.items() if key not in self._runs}
+
+    def update_index(self):
+        """
+        Add the test runs that are not in the index yet and write the index file.
+
+        :return: the number of test runs that are added.
+        """
+        n_added = 0
+        for time_stamp, path in sorted(self._find_new_runs().items()):
+            if os.path.isdir(path):
+                run = self._read_log_folder(path)
+            else:
+                run = self._read_log_archive(path)
+            if run is not None:
+                self._runs[time_stamp] = run
+                n_added += 1
+
+        if n_added > 0:
+            self._runs = dict(sorted(self._runs.items()))
+            with open(self._index_filename, "w", encoding="utf-8") as fp:
+                json.dump({"version": self.INDEX_VERSION, "runs": self._runs}, fp,
+                          separators=(",", ":"))
+        return n_added
+
+    def get_runs(self):
+        """
+        :return: list with the time stamps of the test runs in the index, oldest first.
+        """
+        return list(self._runs)
+
+    def get_test_suites(self):
+        """
+        :return: list with the names of all test suites in the index.
+        """
+        return sorted({name for run in self._runs.values() for name in run["test_suites"]})
+
+    def get_history(self, test_suite):
+        """
+        Get the results and durations of a test suite over all test runs.
+
+        :param test_suite: the name of the test suite.
+        :return: list with tuples: (time stamp, result, duration), None for test runs without
+            the test suite. The result is True for passed, False for failed and None for skipped.
+        """
+        history = []
+        for time_stamp, run in self._runs.items():
+            summary = run["test_suites"].get(test_suite)
+            if summary is None:
+                history.append((time_stamp, None, None))
+            else:
+                history.append((time_stamp, summary["result"], summary["duration"]))
+        return history
+
+    def get_pass_rate(self, test_suite):
+        """
+        :param test_suite: the name of the test suite.
+        :return: the fraction of the test runs with the test suite in which it passed, test runs
+            in which it was skipped are not counted.
+        """
+        results = [x[1] for x in self.get_history(test_suite) if x[1] is not None]
+        return results.count(True) / len(results) if len(results) > 0 else 0
+
+    def get_slowdowns(self, run, other_run, n_test_suites=10):
+        """
+        Get the test suites that became slower between two test runs. Test suites that are
+        skipped in one of the test runs are not compared.
+
+        :param run: the time stamp of the first test run.
+        :param other_run: the time stamp of the second test run.
+        :param n_test_suites: the maximum number of test suites to return, None for all.
+        :return: list with tuples: (test suite name, duration in run, duration in other run),
+            the largest slowdown first.
+        """
+        assert run in self._runs, f"Test run '{run}' not found"
+        assert other_run in self._runs, f"Test run '{other_run}' not found"
+        durations = self._runs[run]["test_suites"]
+        other_durations = self._runs[other_run]["test_suites"]
+        slowdowns = []
+        for name in durations.keys() & other_durations.keys():
+            if durations[name]["result"] is None or other_durations[name]["result"] is None:
+                # Skipped test suites have no duration to compare
+                continue
+            duration = durations[name]["duration"]
+            other_duration = other_durations[name]["duration"]
+            if other_duration > duration:
+                slowdowns.append((name, duration, other_duration))
+        slowdowns.sort(key=lambda x: x[2] - x[1], reverse=True)
+        return slowdowns[:n_test_suites]
+
+    def get_regressions(self, baseline=None, run=None,
+                        threshold=TestSettings.TREND_REGRESSION_THRESHOLD):
+        """
+        Get the test suites of which the duration increased more than a threshold.
+
+        :param baseline: the time stamp of the baseline test run, by default the first test run.
+        :param run: the time stamp of the test run to check, by default the last test run.
+        :param threshold: the relative increase of the duration, e.g. 0.2 for 20% slower.
+        :return: list with tuples: (test suite name, duration in run, duration in baseline).
+        """
+        runs = self.get_runs()
+        if len(runs) == 0:
+            return []
+        baseline = runs[0] if baseline is None else baseline
+        run = runs[-1] if run is None else run
+        # Durations below the resolution of the time stamps are not compared
+        minimum = TestSettings.TREND_MINIMUM_DURATION
+        return [(name, other_duration, duration)
+                for name, duration, other_duration in self.get_slowdowns(baseline, run, None)
+                if other_duration >= minimum and other_duration > duration * (1 + threshold)]
+
+    def _generate_test_suite_rows(self, run_columns, regressions):
+        rows = ""
+        for test_suite in self.get_test_suites():
+            history = dict((x[0], x[1:]) for x in self.get_history(test_suite))
+            row_class = ' class="regression"' if test_suite in regressions else ""
+            rows += f"<tr{row_class}><td>{html.escape(test_suite)}</td>"
+            rows += f"<td>{100 * self.get_pass_rate(test_suite):.1f}%</td>"
+            for time_stamp in run_columns:
+                result, duration = history[time_stamp]
+                if duration is None:
+                    rows += "<td></td>"
+                elif result is None:
+                    rows += '<td class="skipped">skipped</td>'
+                else:
+                    rows += (f'<td class="{"passed" if result else "failed"}">'
+                             f"{duration:.1f}</td>")
+            rows += "</tr>\n"
+        return rows
+
+    def _generate_slowdown_rows(self, run, other_run):
+        rows = ""
+        for name, duration, other_duration in self.get_slowdowns(run, other_run):
+            rows += (f"<tr><td>{html.escape(name)}</td><td>{duration:.1f}</td>"
+                     f"<td>{other_duration:.1f}</td>"
+                     f"<td>+{other_duration - duration:.1f}</td></tr>\n")
+        return rows
+
+    def generate_html_report(self, baseline=None, compare=None,
+                             threshold=TestSettings.TREND_REGRESSION_THRESHOLD):
+        """
+        Generate the HTML trend report.
+
+        :param baseline: the time stamp of the baseline test run, by default the first test run.
+        :param compare: tuple with the time stamps of two test runs for the slowdowns, by default
+            the baseline and the last test run.
+        :param threshold: the relative increase of the duration for a regression.
+        :return: the HTML report as string.
+        """
+        runs = self.get_runs()
+        assert len(runs) > 0, "No test runs in the report folder"
+        baseline = runs[0] if baseline is None else baseline
+        compare = (baseline, runs[-1]) if compare is None else compare
+        regressions = {x[0] for x in self.get_regressions(baseline, runs[-1], threshold)}
+        run_columns = runs[-TestSettings.TREND_REPORT_MAX_RUNS:]
+
+        template_values = {
+            "n_runs": len(runs),
+            "first_run": runs[0],
+            "last_run": runs[-1],
+            "baseline": baseline,
+            "threshold": f"{100 * threshold:.0f}",
+            "run_headers": "".join(f"<th>{x}</th>" for x in run_columns),
+            "test_suite_rows": self._generate_test_suite_rows(run_columns, regressions),
+            "compare_run": compare[0],
+            "compare_other_run": compare[1],
+            "slowdown_rows": self._generate_slowdown_rows(*compare)
+        }
+        template_filename = os.path.join(os.path.dirname(__file__), "artifacts",
+                                         "trend_report_template.html")
+        with open(template_filename, "r", encoding="utf-8") as fp:
+            template = fp.read()
+        return Template(template).substitute(template_values)
+
+    def write_html_report(self, filename=None, **kwargs):
+        """
+        Write the HTML trend report to a file.
+
+        :param filename: the filename of the report, by default 'trend_report.html' in the report
+            folder.
+        :param kwargs: the arguments for generating the report, see generate_html_report.
+        :return: the filename of the report, or None if there are no test runs in the index.
+        """
+        if len(self.get_runs()) == 0:
+            return None
+        if filename is None:
+            filename = os.path.join(self._report_folder, TestSettings.TREND_REPORT_FILENAME)
+        with open(filename, "w", encoding="utf-8") as fp:
+            fp.write(self.generate_html_report(**kwargs))
+        return filename
+
+
+def main(arguments=None):
+    """
+    Command line interface for the trend report.
+
+    :param arguments: list of command line arguments, if None the arguments from sys.argv are used.
+    """
+    parser = argparse.ArgumentParser(prog="python -m lily_unit_test.trend_report",
+                                     description="Create a trend report of the test runs.")
+    parser.add_argument("report_folder")
+    parser.add_argument("--baseline", help="time stamp of the baseline test run")
+    parser.add_argument("--compare", nargs=2, metavar="TIME_STAMP",
+                        help="time stamps of two test runs to compare")
+    parser.add_argument("--threshold", type=float, default=TestSettings.TREND_REGRESSION_THRESHOLD,
+                        help="relative increase of the duration for a regression")
+    parser.add_argument("--output", help="filename of the HTML report")
+    args = parser.parse_args(arguments)
+
+    trend_report = TrendReport(args.report_folder)
+    print(f"Added {trend_report.update_index()} test runs to the index")
+    for name, duration, baseline_duration in trend_report.get_regressions(args.baseline,
+                                                                        None, args.threshold):
+        print(f"Regression: {name}: {baseline_duration:.1f} -> {duration:.1f} seconds")
+    filename = trend_report.write_html_report(args.output, baseline=args.baseline,
+                                              compare=args.compare, threshold=args.threshold)
+    if filename is None:
+        print("No test runs with log files or a log archive in the report folder")
+    else:
+        print(f"Report: {filename}")
+
+
+if __name__ == "__main__":
+
+    sys.exit(main())
@@ -0,0 +1,79 @@
+"""
+Helpers for the test suites that run the test runner on generated test suite modules.
+"""
+
+import glob
+import os
+import shutil
+import tempfile
+
+import lily_unit_test
+
+
+class TestSuiteFolder:
+    """
+    Temporary folder with generated test suite modules. The reports of the test runs are written
+    to the 'reports' folder in this folder.
+    """
+
+    def __init__(self):
+        self.path = tempfile.mkdtemp()
+        self.report_folder = os.path.join(self.path, "reports")
+
+    def add_module(self, filename, source):
+        """
+        Write a module to the folder.
+
+        :param filename: the filename, relative to the folder.
+        :param source: the source code of the module.
+        :return: the full filename of the module.
+        """
+        filename = os.path.join(self.path, filename)
+        os.makedirs(os.path.dirname(filename), exist_ok=True)
+        with open(filename, "w", encoding="utf-8") as fp:
+            fp.write(source)
+        return filename
+
+    def run(self, options=None, sub_folder=""):
+        """
+        Run the test suites in the folder, without writing log files.
+
+        :param options: the options for the test runner, these override the defaults.
+        :param sub_folder: run the test suites in this sub folder only.
+        :return: the result of the test run.
+        """
+        run_options = {"report_folder": self.report_folder, "no_log_files": True}
+        run_options.update({} if options is None else options)
+        return lily_unit_test.TestRunner.run(os.path.join(self.path, sub_folder), run_options)
+
+    def get_report_files(self, filename):
+        """
+        :param filename: the filename in the report folder, may have wildcards.
+        :return: sorted list with the matching files, the last one is of the latest test run.
+        """
+        return sorted(glob.glob(os.path.join(self.report_folder, filename)))
+
+    def remove(self):
+        """
+        Remove the folder with all files.
+        """
+        shutil.rmtree(self.path)
+
+
+class ReportPlugin(lily_unit_test.Plugin):
+    """
+    Keeps the report data of the last test run.
+    """
+
+    def __init__(self):
+        self.report_data = {}
+
+    def run_finished(self, result, report_data):
+        self.report_data = report_data
+
+    def get_runner_log(self):
+        """
+        :return: list with the log messages of the test runner.
+        """
+        return next(value for key, value in self.report_data.items()
+                    if key.endswith("_TestRunner"))
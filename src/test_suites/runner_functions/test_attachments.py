@@ -0,0 +1,142 @@
+"""
+Test attaching files and buffers to the report, stored by their content.
+"""
+
+import glob
+import hashlib
+import importlib
+import os
+import sys
+import threading
+
+import lily_unit_test
+
+from lily_unit_test.attachments import AttachmentStore, read_attachments
+from lily_unit_test.test_settings import TestSettings
+
+from .runner_helpers import TestSuiteFolder
+
+
+_TEST_SUITE_TEMPLATE = '''
+import os
+import lily_unit_test
+
+_IMAGE = os.path.join(os.path.dirname(__file__), "firmware.bin")
+
+class TestAttachFlash(lily_unit_test.TestSuite):
+
+    def test_flash(self):
+        self.attach(_IMAGE)
+        self.attach(b"Packet dump", "packets.pcap")
+
+class TestAttachVerify(lily_unit_test.TestSuite):
+
+    def test_verify(self):
+        # The same image is stored once
+        with open(_IMAGE, "rb") as fp:
+            self.attach(memoryview(fp.read()), "read_back.bin")
+        # Output that looks like an attachment is not linked in the report
+        print('Attachment "fake.bin": javascript:alert(1) (1 bytes)')
+'''
+
+
+class TestAttachments(lily_unit_test.TestSuite):
+
+    _folder = None
+
+    def setup(self):
+        self._folder = TestSuiteFolder()
+        self._folder.add_module("attach_test_suites.py", _TEST_SUITE_TEMPLATE)
+        with open(os.path.join(self._folder.path, "firmware.bin"), "wb") as fp:
+            fp.write(bytes(range(256)) * 40000)
+
+    def teardown(self):
+        self._folder.remove()
+
+    def _get_stored_files(self, folder):
+        return [x for x in glob.glob(os.path.join(folder, "*", "*")) if os.path.isfile(x)]
+
+    def test_store(self):
+        folder = os.path.join(self._folder.path, "store")
+        store = AttachmentStore(folder)
+        image = os.path.join(self._folder.path, "firmware.bin")
+        digest, size, path = store.add(image)
+        self.log.debug(f"Stored: {path}")
+        self.fail_if(size != 10240000 or path != f"{digest[:2]}/{digest}", "Wrong attachment")
+        with open(image, "rb") as fp:
+            self.fail_if(store.add(fp.read())[0] != digest, "Same content, different hash")
+        self.fail_if(store.add(b"")[1] != 0, "Wrong size of an empty attachment")
+        self.fail_if(len(self._get_stored_files(folder)) != 2, "The content is not stored once")
+        with open(os.path.join(folder, path.replace("/", os.sep)), "rb") as fp:
+            content = fp.read()
+        with open(image, "rb") as fp:
+            self.fail_if(content != fp.read(), "The stored content is different")
+        self.fail_if(hashlib.sha256(content).hexdigest() != digest,
+                     "The hash is not of the stored content")
+        self.fail_if(len(glob.glob(os.path.join(folder, "*.tmp"))) > 0,
+                     "Temporary files are not removed")
+
+        # Content that is already stored is not copied, the temporary file cannot be written
+        temp_filename = os.path.join(folder, f"{os.getpid()}_{threading.get_ident()}.tmp")
+        os.makedirs(temp_filename)
+        try:
+            self.fail_if(store.add(image)[0] != digest, "Wrong hash of the stored file")
+            self.fail_if(store.add(content)[0] != digest, "Wrong hash of the stored buffer")
+        finally:
+            os.rmdir(temp_filename)
+
+    def test_attach_in_test_run(self):
+        for _ in range(2):
+            self.fail_if(not self._folder.run({"create_html_report": True}), "Test run failed")
+        # Identical content is stored once, also over test runs
+        attachments_folder = os.path.join(self._folder.report_folder,
+                                          TestSettings.ATTACHMENTS_FOLDER_NAME)
+        self.fail_if(len(self._get_stored_files(attachments_folder)) != 2,
+                     "The attachments are not stored by their content")
+
+        filenames = self._folder.get_report_files(
+            os.path.join("*", f"*_TestAttachFlash_{TestSettings.ATTACHMENTS_FILENAME}"))
+        attachments = read_attachments(filenames[-1])
+        self.log.debug(f"Attachments: {attachments}")
+        self.fail_if([(x["test_case"], x["name"]) for x in attachments] !=
+                     [("TestAttachFlash.test_flash", "firmware.bin"),
+                      ("TestAttachFlash.test_flash", "packets.pcap")],
+                     "Wrong attachments of the test suite")
+
+        filenames = self._folder.get_report_files("*_TestRunner.html")
+        with open(filenames[-1], "r", encoding="utf-8") as fp:
+            report = fp.read()
+        link = (f'<td>TestAttachVerify.test_verify</td><td><a href="{attachments[0]["path"]}" '
+                'download="read_back.bin">read_back.bin</a></td>')
+        self.fail_if(link not in report, "The attachment is not linked in the HTML report")
+        self.fail_if('href="javascript:' in report, "Output of the test suite is linked")
+
+    def test_attach_without_test_runner(self):
+        self._folder.add_module(os.path.join("standalone", "attach_standalone.py"),
+                                _TEST_SUITE_TEMPLATE.replace("firmware.bin", "../firmware.bin"))
+        sys.path.insert(0, os.path.join(self._folder.path, "standalone"))
+        try:
+            test_suite = importlib.import_module("attach_standalone").TestAttachFlash()
+            test_suite.log.log_to_stdout(False)
+            self.fail_if(not test_suite.run(), "The test suite should pass")
+        finally:
+            sys.path.pop(0)
+            sys.modules.pop("attach_standalone", None)
+        # Like the default report folder of the test runner, next to the folder of the module
+        attachments_folder = os.path.join(self._folder.path, TestSettings.REPORT_FOLDER_NAME,
+                                          TestSettings.ATTACHMENTS_FOLDER_NAME)
+        self.fail_if(len(self._get_stored_files(attachments_folder)) != 2,
+                     "The attachments are not stored in the default report folder")
+
+    def test_name_of_buffer(self):
+        try:
+            self.attach(b"Data")
+        except AssertionError as e:
+            self.log.debug(f"Expected error: {e}")
+            return True
+        return False
+
+
+if __name__ == "__main__":
+
+    TestAttachments().run()
@@ -0,0 +1,158 @@
+"""
+Test measuring the code coverage of each test suite.
+"""
+
+import importlib
+import json
+import os
+import sys
+import threading
+
+import lily_unit_test
+
+from lily_unit_test.code_coverage import CodeCoverage
+from lily_unit_test.test_settings import TestSettings
+
+from .runner_helpers import ReportPlugin, TestSuiteFolder
+
+
+_SOURCE_TEMPLATE = '''
+VALUE = 1
+
+
+def add(a, b):
+    return a + b
+
+
+def divide(a, b):
+    if b == 0:
+        raise ZeroDivisionError("Cannot divide by zero")
+    return a / b
+
+
+def not_used():
+    return None
+'''
+
+_TEST_SUITE_TEMPLATE = '''
+import lily_unit_test
+import coverage_calculator
+
+
+class TestCoverageAdd(lily_unit_test.TestSuite):
+
+    def test_add(self):
+        for i in range(1000):
+            self.fail_if(coverage_calculator.add(i, 1) != i + 1, "Wrong sum")
+
+
+class TestCoverageDivide(lily_unit_test.TestSuite):
+
+    def test_divide(self):
+        self.fail_if(coverage_calculator.divide(6, 3) != 2, "Wrong quotient")
+'''
+
+
+class TestCodeCoverage(lily_unit_test.TestSuite):
+
+    _folder = None
+    _source_folder = None
+
+    def setup(self):
+        self._folder = TestSuiteFolder()
+        self._source_folder = os.path.dirname(self._folder.add_module(
+            os.path.join("source", "coverage_calculator.py"), _SOURCE_TEMPLATE))
+        self._folder.add_module(os.path.join("test_suites", "coverage_test_suites.py"),
+                                _TEST_SUITE_TEMPLATE)
+        sys.path.append(self._source_folder)
+
+    def teardown(self):
+        sys.path.remove(self._source_folder)
+        for name in ("coverage_calculator", "coverage_test_suites"):
+            sys.modules.pop(name, None)
+        self._folder.remove()
+
+    def test_coverage_of_threads(self):
+        coverage = CodeCoverage([self._source_folder])
+        coverage.start()
+        try:
+            calculator = importlib.import_module("coverage_calculator")
+            coverage.suite_started("TestThreads")
+            thread = threading.Thread(target=calculator.add, args=(1, 2))
+            thread.start()
+            thread.join()
+            coverage.suite_finished("TestThreads", True, 0, False, [])
+        finally:
+            coverage.stop()
+            # Imported again by the test run
+            sys.modules.pop("coverage_calculator", None)
+        self.log.debug(f"Method: {coverage.get_method()}")
+        filename = os.path.join(self._source_folder, "coverage_calculator.py")
+        self.fail_if(coverage.get_covered_lines("TestThreads") != {filename: [6]},
+                     "The line executed by the thread is not covered")
+        self.fail_if(coverage.get_covered_lines() != {filename: [2, 5, 6, 9, 15]},
+                     "The lines executed when importing are not covered")
+        self.fail_if(coverage.get_method() == "settrace" and sys.gettrace() is not None,
+                     "The trace function is not removed")
+
+    def test_run_with_coverage(self):
+        plugin = ReportPlugin()
+        result = self._folder.run({"plugins": [plugin], "coverage": [self._source_folder]},
+                                  "test_suites")
+        self.fail_if(not result, "The test run should pass")
+        runner_log = "\n".join(plugin.get_runner_log())
+        self.fail_if("Code coverage: 7 of 9 lines covered (77.8%) in 1 files" not in runner_log,
+                     "Wrong coverage in the runner log")
+
+        filenames = self._folder.get_report_files(f"*_{TestSettings.COVERAGE_FILENAME}")
+        with open(filenames[0], "r", encoding="utf-8") as fp:
+            data = json.load(fp)
+        filename = os.path.join(self._source_folder, "coverage_calculator.py")
+        self.log.debug(f"Files: {data['files']}")
+        self.log.debug(f"Test suites: {data['test_suites']}")
+        self.fail_if(data["files"][filename] != {"executable": [2, 5, 6, 9, 10, 11, 12, 15, 16],
+                                                 "covered": [2, 5, 6, 9, 10, 12, 15]},
+                     "Wrong coverage of the test run")
+        # The lines that run when importing the module are not in the test suites
+        self.fail_if(data["test_suites"] != {"TestCoverageAdd": {filename: [6]},
+                                             "TestCoverageDivide": {filename: [10, 12]}},
+                     "Wrong coverage of the test suites")
+        filenames = self._folder.get_report_files(f"*_{TestSettings.COVERAGE_REPORT_FILENAME}")
+        with open(filenames[0], "r", encoding="utf-8") as fp:
+            report = fp.read()
+        self.fail_if("<td>TestCoverageDivide</td>" not in report,
+                     "The test suites are not in the HTML report")
+        self.fail_if("<td>coverage_calculator.py</td>" not in report,
+                     "The files are not in the HTML report")
+
+    def test_failing_import(self):
+        monitoring = getattr(sys, "monitoring", None)
+
+        def _get_tracing():
+            return sys.gettrace(), (None if monitoring is None
+                                    else monitoring.get_tool(monitoring.COVERAGE_ID))
+
+        tracing = _get_tracing()
+        self._folder.add_module(os.path.join("broken", "broken_test_suites.py"),
+                                "raise ImportError('Broken module')\n")
+        try:
+            self._folder.run({"coverage": [self._source_folder]}, "broken")
+        except ImportError as e:
+            self.log.debug(f"Expected error: {e}")
+        else:
+            self.fail("Importing the test suites should fail")
+        self.fail_if(_get_tracing() != tracing, "The coverage is not stopped")
+
+    def test_process_isolation(self):
+        try:
+            self._folder.run({"coverage": [self._source_folder], "process_isolation": True},
+                             "test_suites")
+        except AssertionError as e:
+            self.log.debug(f"Expected error: {e}")
+            return True
+        return False
+
+
+if __name__ == "__main__":
+
+    TestCodeCoverage().run()
@@ -0,0 +1,103 @@
+"""
+Test the event stream of the test runner.
+"""
+
+import json
+import os
+import socket
+import time
+
+import lily_unit_test
+
+from lily_unit_test.event_stream import EventStream
+
+from .runner_helpers import TestSuiteFolder
+
+
+_TEST_SUITE_TEMPLATE = '''
+import lily_unit_test
+
+class {name}(lily_unit_test.TestSuite):
+
+    def test_one(self):
+        self.log.info("Message from {name}")
+
+    def test_two(self):
+        return {result}
+'''
+
+
+class TestEventStream(lily_unit_test.TestSuite):
+
+    def test_file(self):
+        folder = TestSuiteFolder()
+        try:
+            for name, result in (("TestEventStreamA", True), ("TestEventStreamB", False)):
+                folder.add_module(f"event_stream_{name.lower()}.py",
+                                  _TEST_SUITE_TEMPLATE.format(name=name, result=result))
+            filename = os.path.join(folder.path, "events", "events.jsonl")
+            # The second test run appends to the file
+            for _ in range(2):
+                folder.run({"event_stream": filename})
+            with open(filename, "r", encoding="utf-8") as fp:
+                all_events = list(map(json.loads, fp.readlines()))
+        finally:
+            folder.remove()
+
+        run_ids = list(dict.fromkeys(x["run"] for x in all_events))
+        self.fail_if(len(run_ids) != 2, f"Expected two run IDs: {run_ids}")
+        for run_id in run_ids:
+            sequence = [x["seq"] for x in all_events if x["run"] == run_id]
+            self.fail_if(sequence != list(range(len(sequence))),
+                         "The sequence numbers are not consecutive")
+        events = [x for x in all_events if x["run"] == run_ids[0]]
+        names = [x["event"] for x in events if x["event"] != "log"]
+        self.log.debug(f"Events: {names}")
+        expected = ["run_started"] + 2 * (["suite_started"] + 2 * ["case_started",
+                                                                   "case_finished"] +
+                                          ["suite_finished"]) + ["run_finished", "stream_closed"]
+        self.fail_if(names != expected, "Wrong events")
+        results = [(x["test_case"], x["result"]) for x in events if x["event"] == "case_finished"]
+        self.fail_if(results[-1] != ("TestEventStreamB.test_two", False),
+                     "Wrong test case result")
+        self.fail_if(not any(map(lambda x: x["event"] == "log" and
+                                 x["test_suite"] == "TestEventStreamA" and
+                                 x["message"].endswith("Message from TestEventStreamA"), events)),
+                     "Log message not published")
+        self.fail_if(events[-2]["result"] or events[-1]["dropped"] != 0, "Wrong final events")
+
+    def test_slow_consumer(self):
+        if not hasattr(socket, "AF_UNIX"):
+            self.log.info("Unix sockets are not supported, test skipped")
+            return
+        folder = TestSuiteFolder()
+        path = os.path.join(folder.path, "events.sock")
+        server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)  # pylint: disable=no-member
+        server.bind(path)
+        server.listen(1)
+        try:
+            stream = EventStream(f"unix:{path}", queue_size=100)
+            # The stream connects when the first event is written
+            stream.publish("run_started", test_suites_path=folder.path, test_suites=[])
+            connection = server.accept()[0]
+            # The consumer does not read, the test thread must not be blocked
+            start = time.perf_counter()
+            for i in range(10000):
+                stream.publish("log", test_suite="TestSlowConsumer", message=f"{i:08d}" * 100)
+            duration = time.perf_counter() - start
+            n_dropped = stream.get_dropped()
+            # Consumer disconnects, this must end the stream without waiting
+            connection.close()
+            stream.close(2)
+        finally:
+            server.close()
+            folder.remove()
+
+        self.log.debug(f"Publishing took {duration:.3f} seconds, {n_dropped} events dropped")
+        self.fail_if(n_dropped == 0, "Expected dropped events")
+        self.fail_if(duration > 2, "Publishing was blocked by the consumer")
+
+
+if __name__ == "__main__":
+
+    TestEventStream().run()
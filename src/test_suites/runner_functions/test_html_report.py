@@ -0,0 +1,63 @@
+"""
+Test the HTML report for large logs.
+"""
+
+import base64
+import gzip
+import json
+import os
+import re
+
+import lily_unit_test
+
+from .runner_helpers import TestSuiteFolder
+
+
+_TEST_SUITE_TEMPLATE = '''
+import lily_unit_test
+
+class TestLazyHtmlReportLog(lily_unit_test.TestSuite):
+
+    def test_log(self):
+        for i in range(5000):
+            self.log.debug("Line {}: <b>&amp;</b>", i)
+'''
+
+
+class TestLazyHtmlReport(lily_unit_test.TestSuite):
+
+    @staticmethod
+    def _create_report(folder, lazy):
+        report_folder = os.path.join(folder.path, "lazy" if lazy else "full")
+        folder.run({"report_folder": report_folder, "create_html_report": True,
+                    "lazy_html_report": lazy})
+        filename = [x for x in os.listdir(report_folder) if x.endswith(".html")][0]
+        with open(os.path.join(report_folder, filename), "r", encoding="utf-8") as fp:
+            return fp.read()
+
+    def test_lazy_report(self):
+        folder = TestSuiteFolder()
+        try:
+            folder.add_module("lazy_html_report_log.py", _TEST_SUITE_TEMPLATE)
+            full_report = self._create_report(folder, False)
+            lazy_report = self._create_report(folder, True)
+        finally:
+            folder.remove()
+
+        self.log.debug(f"Size full report: {len(full_report)}, lazy report: {len(lazy_report)}")
+        self.fail_if(len(lazy_report) * 5 > len(full_report), "The lazy report is not compact")
+        self.fail_if('<div class="log ' in lazy_report, "Log messages should not be in the HTML")
+        match = re.search(r'<script type="application/octet-stream" '
+                          r'id="data_2_TestLazyHtmlReportLog">([A-Za-z0-9+/=]+)</script>',
+                          lazy_report)
+        self.fail_if(match is None, "Log messages not embedded")
+        log_messages = json.loads(gzip.decompress(base64.b64decode(match.group(1))))
+        self.fail_if(not log_messages[-1].endswith("Test suite TestLazyHtmlReportLog: PASSED"),
+                     "Wrong last log message")
+        self.fail_if(not any(map(lambda x: x.endswith("| DEBUG  | Line 4999: <b>&amp;</b>"),
+                                 log_messages)), "Log message not found")
+
+
+if __name__ == "__main__":
+
+    TestLazyHtmlReport().run()
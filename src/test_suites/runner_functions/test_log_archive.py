@@ -0,0 +1,117 @@
+"""
+Test the log archive.
+"""
+
+import os
+import shutil
+import tempfile
+
+import lily_unit_test
+
+from lily_unit_test.log_archive import LogArchive, LogArchiveWriter, main
+from lily_unit_test.log_writer import LogWriter
+from lily_unit_test.logger import Logger
+
+
+class TestLogArchive(lily_unit_test.TestSuite):
+
+    _temp_folder = None
+    _filename = None
+    _log_messages = None
+
+    @staticmethod
+    def _create_log_messages(n_cases):
+        logger = Logger(False, False)
+        logger.info("Run test suite: TestDummy")
+        for i in range(n_cases):
+            logger.info(f"Run test case: TestDummy.test_{i}")
+            logger.debug(f"Value: {i}")
+            if i % 2 == 1:
+                logger.error(f"Test case TestDummy.test_{i}: FAILED")
+            else:
+                logger.info(f"Test case TestDummy.test_{i}: PASSED")
+        logger.info(f"Test suite TestDummy: {(n_cases + 1) // 2} of {n_cases} test cases passed")
+        logger.empty_line()
+        logger.error("Test suite TestDummy: FAILED")
+        logger.shutdown()
+        return logger.get_log_messages()
+
+    def setup(self):
+        self._temp_folder = tempfile.mkdtemp()
+        self._filename = os.path.join(self._temp_folder, "test.lla")
+        self._log_messages = self._create_log_messages(5)
+        writer = LogArchiveWriter(self._filename)
+        writer.add_test_suite("02_TestDummy", self._log_messages)
+        writer.add_test_suite("01_TestRunner", ["Runner message"])
+        writer.close()
+
+    def test_test_suites(self):
+        with LogArchive(self._filename) as archive:
+            self.fail_if(archive.get_test_suites() != ["02_TestDummy", "01_TestRunner"],
+                         f"Wrong test suites: {archive.get_test_suites()}")
+            self.fail_if(archive.get_test_suite_result("02_TestDummy") != "FAILED",
+                         "Wrong test suite result")
+            expected = [f"TestDummy.test_{i}" for i in range(5)]
+            self.fail_if(archive.get_test_cases("02_TestDummy") != expected,
+                         f"Wrong test cases: {archive.get_test_cases('02_TestDummy')}")
+
+    def test_log_messages(self):
+        with LogArchive(self._filename) as archive:
+            self.fail_if(archive.get_log_messages("02_TestDummy") != self._log_messages,
+                         "Log messages of the test suite are not correct")
+            test_case = archive.get_log_messages("02_TestDummy", "TestDummy.test_3")
+            self.fail_if(test_case != self._log_messages[10:13],
+                         f"Log messages of the test case are not correct: {test_case}")
+
+    def test_errors(self):
+        with LogArchive(self._filename) as archive:
+            errors = archive.get_errors()
+            self.fail_if(len(errors) != 3, f"Wrong number of errors: {errors}")
+            self.fail_if(errors[0][1] != 6 or errors[0][2] != self._log_messages[6],
+                         f"Wrong error: {errors[0]}")
+
+    def test_search(self):
+        with LogArchive(self._filename) as archive:
+            matches = list(archive.search(r"Value: [34]"))
+            self.fail_if(len(matches) != 2, f"Wrong number of matches: {matches}")
+            self.fail_if(matches[1] != ("02_TestDummy", 14, self._log_messages[14]),
+                         f"Wrong match: {matches[1]}")
+
+    def test_command_line(self):
+        main(["list", self._filename])
+        main(["grep", self._filename, "Value: 4", "02_TestDummy"])
+        output = self.log.get_log_messages()[-8:]
+        self.log.debug(f"Output: {output}")
+        self.fail_if("01_TestRunner: FAILED" not in output[6], "Test suite not listed")
+        self.fail_if("02_TestDummy:15:" not in output[7], "Search result not shown")
+
+    def test_skipped_result(self):
+        filename = os.path.join(self._temp_folder, "skipped.lla")
+        writer = LogArchiveWriter(filename)
+        writer.add_test_suite("02_TestSkipped", [
+            "2024-01-01 10:00:00.000 | INFO   | Run test suite: TestSkipped",
+            "2024-01-01 10:00:00.000 | INFO   | Test suite TestSkipped: "
+            "SKIPPED because of the time budget"])
+        writer.close()
+        with LogArchive(filename) as archive:
+            self.fail_if(archive.get_test_suite_result("02_TestSkipped") != "SKIPPED",
+                         "A skipped test suite is not a failure")
+
+    def test_log_writer(self):
+        filename = os.path.join(self._temp_folder, "archive", "writer.lla")
+        writer = LogWriter(self._temp_folder, archive_filename=filename, text_files=False)
+        writer.write("02_TestDummy", self._log_messages)
+        writer.close()
+        self.fail_if(os.path.isfile(os.path.join(self._temp_folder, "02_TestDummy.txt")),
+                     "Text log file should not be written")
+        with LogArchive(filename) as archive:
+            self.fail_if(archive.get_log_messages("02_TestDummy") != self._log_messages,
+                         "Log messages of the test suite are not correct")
+
+    def teardown(self):
+        shutil.rmtree(self._temp_folder)
+
+
+if __name__ == "__main__":
+
+    TestLogArchive().run()
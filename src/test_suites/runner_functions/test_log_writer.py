@@ -0,0 +1,63 @@
+"""
+Test the background log writer.
+"""
+
+import bz2
+import gzip
+import lzma
+import os
+import tempfile
+
+import lily_unit_test
+
+from lily_unit_test.log_writer import LogWriter
+
+
+class TestLogWriter(lily_unit_test.TestSuite):
+
+    _LOG_MESSAGES = [f"Log message {i}" for i in range(1000)]
+    _OPENERS = {
+        None: open,
+        "gzip": gzip.open,
+        "bz2": bz2.open,
+        "lzma": lzma.open
+    }
+
+    def _check_log_file(self, output_path, compression):
+        filename = os.path.join(output_path, f"test_{compression}.txt"
+                                             f"{LogWriter.COMPRESSION_TYPES[compression]}")
+        self.fail_if(not os.path.isfile(filename), f"Log file not found: {filename}")
+        with self._OPENERS[compression](filename, "rt", encoding="utf-8") as fp:
+            lines = fp.read().splitlines()
+        self.fail_if(lines != self._LOG_MESSAGES, f"Log file content is not correct: {filename}")
+
+    def test_write_log_files(self):
+        with tempfile.TemporaryDirectory() as temp_folder:
+            # The writer must create the output path
+            output_path = os.path.join(temp_folder, "logs")
+            for compression in LogWriter.COMPRESSION_TYPES:
+                # Small buffer size, so the messages are written in multiple chunks
+                writer = LogWriter(output_path, compression, 100)
+                writer.write(f"test_{compression}", self._LOG_MESSAGES)
+                writer.close()
+                self._check_log_file(output_path, compression)
+
+    def test_write_error(self):
+        with tempfile.TemporaryDirectory() as temp_folder:
+            # Use a file as output path, this must give an error when closing the writer
+            output_path = os.path.join(temp_folder, "not_a_folder")
+            with open(output_path, "w", encoding="utf-8") as fp:
+                fp.write("")
+            writer = LogWriter(output_path)
+            writer.write("test", self._LOG_MESSAGES)
+            try:
+                writer.close()
+            except OSError as e:
+                self.log.debug(f"Expected error: {e}")
+                return True
+        return False
+
+
+if __name__ == "__main__":
+
+    TestLogWriter().run()
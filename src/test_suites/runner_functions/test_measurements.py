@@ -0,0 +1,109 @@
+"""
+Test recording measurements and writing them next to the log files.
+"""
+
+import csv
+import math
+import os
+
+import lily_unit_test
+
+from lily_unit_test.measurements import Measurements
+from lily_unit_test.test_settings import TestSettings
+
+from .runner_helpers import TestSuiteFolder
+
+
+_TEST_SUITE_TEMPLATE = '''
+import lily_unit_test
+
+class TestRecordVoltages(lily_unit_test.TestSuite):
+
+    def test_output_voltage(self):
+        for i in range(1000):
+            self.record("Output voltage", 5.0 + i / 10000, "V", 4.9, 5.1)
+
+    def test_current(self):
+        self.record("Supply current", 0.25, "A", high=0.2)
+'''
+
+
+class TestMeasurements(lily_unit_test.TestSuite):
+
+    _folder = None
+
+    def setup(self):
+        self._folder = TestSuiteFolder()
+        self._folder.add_module("measurement_test_suites.py", _TEST_SUITE_TEMPLATE)
+
+    def teardown(self):
+        self._folder.remove()
+
+    def test_measurements(self):
+        measurements = Measurements()
+        self.fail_if(not measurements.add("Voltage", 5, "V", 4.9, 5.1), "Value is within limits")
+        self.fail_if(measurements.add("Voltage", 5.2, "V", 4.9, 5.1), "Value is out of limits")
+        self.fail_if(measurements.add("Voltage", math.nan, "V"), "Not a number always fails")
+        self.fail_if(not measurements.add("Frequency", 1e6, "Hz"), "Value without limits")
+        self.fail_if(measurements.get_strings() != ["Voltage", "V", "", "Frequency", "Hz"],
+                     "Strings should be stored once")
+        summary = measurements.get_summary()
+        self.fail_if([x["name"] for x in summary] != ["Voltage", "Frequency"],
+                     "Wrong order of the summary")
+        self.fail_if(summary[0]["count"] != 3 or summary[0]["failed"] != 2,
+                     "Wrong counts in the summary")
+        self.fail_if(summary[0]["low"] != 4.9 or not math.isnan(summary[1]["high"]),
+                     "Wrong limits in the summary")
+
+        filename = os.path.join(self._folder.path, "measurements.lmc")
+        measurements.write_binary(filename)
+        read_back = Measurements.read_binary(filename)
+        for name in Measurements.COLUMNS:
+            self.fail_if(read_back.get_column(name).tobytes() !=
+                         measurements.get_column(name).tobytes(), f"Column {name} differs")
+        self.fail_if(read_back.get_strings() != measurements.get_strings(), "Strings differ")
+
+    def test_run_twice(self):
+        class TestRecordTwice(lily_unit_test.TestSuite):
+
+            def test_record(self):
+                self.record("Output voltage", 5.0, "V", 4.9, 5.1)
+
+        test_suite = TestRecordTwice()
+        test_suite.log.log_to_stdout(False)
+        for _ in range(2):
+            self.fail_if(not test_suite.run(), "The test suite should pass")
+            self.fail_if(len(test_suite.measurements) != 1,
+                         "The measurements of the previous run are not reset")
+
+    def test_record_in_test_run(self):
+        result = self._folder.run({"no_log_files": False, "create_html_report": True})
+        self.fail_if(result, "The test run should fail, the current is out of limits")
+        filenames = self._folder.get_report_files(
+            os.path.join("*", f"*_TestRecordVoltages_{TestSettings.MEASUREMENTS_CSV_FILENAME}"))
+        self.fail_if(len(filenames) != 1, "No CSV file written")
+        with open(filenames[0], "r", encoding="utf-8", newline="") as fp:
+            rows = list(csv.DictReader(fp))
+        self.fail_if(len(rows) != 1001, f"Expected 1001 rows, got {len(rows)}")
+        self.fail_if(rows[-1]["name"] != "Supply current" or rows[-1]["low"] != "" or
+                     rows[-1]["passed"] != "0", f"Wrong last row: {rows[-1]}")
+        self.fail_if(rows[0]["test_case"] != "TestRecordVoltages.test_output_voltage",
+                     "The test case is not recorded")
+
+        binary_filename = filenames[0].replace(TestSettings.MEASUREMENTS_CSV_FILENAME,
+                                               TestSettings.MEASUREMENTS_BINARY_FILENAME)
+        self.fail_if(len(Measurements.read_binary(binary_filename)) != 1001,
+                     "Wrong number of measurements in the binary file")
+
+        with open(self._folder.get_report_files("*_TestRunner.html")[0], "r",
+                  encoding="utf-8") as fp:
+            html_report = fp.read()
+        self.fail_if('<table class="measurements">' not in html_report,
+                     "No measurements in the HTML report")
+        self.fail_if("<td>Supply current</td><td>A</td><td>1</td><td>1</td>" not in html_report,
+                     "The failed measurement is not in the HTML report")
+
+
+if __name__ == "__main__":
+
+    TestMeasurements().run()
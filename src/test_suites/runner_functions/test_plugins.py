@@ -0,0 +1,211 @@
+"""
+Test the plugins of the test runner.
+"""
+
+import os
+import sys
+import time
+
+import lily_unit_test
+
+from lily_unit_test.plugins import Plugin, PluginManager
+
+from .runner_helpers import TestSuiteFolder
+
+
+_TEST_SUITE_TEMPLATE = '''
+import time
+import lily_unit_test
+
+class {name}(lily_unit_test.TestSuite):
+
+    @lily_unit_test.parametrize(range({n_cases}))
+    def test_case(self, value):
+        self.log.info("Value: {{}}", value)
+        return {result}
+'''
+
+
+class _RecordingPlugin(Plugin):
+
+    def __init__(self):
+        self.events = []
+        self.log_messages = []
+        self.report_ids = []
+
+    def run_started(self, test_suites_path, test_suites):
+        self.events.append(("run_started", tuple(test_suites)))
+
+    def suite_started(self, test_suite):
+        self.events.append(("suite_started", test_suite))
+
+    def case_started(self, test_suite, test_case):
+        self.events.append(("case_started", test_case))
+
+    def log_message(self, test_suite, message_type, message):
+        self.log_messages.append((test_suite, message_type, message))
+
+    def case_finished(self, test_suite, test_case, result, duration):
+        self.events.append(("case_finished", test_case, result))
+
+    def suite_finished(self, test_suite, result, duration, skipped, log_messages):
+        self.events.append(("suite_finished", test_suite, result))
+
+    def run_finished(self, result, report_data):
+        self.events.append(("run_finished", result))
+        self.report_ids = list(report_data)
+
+    def close(self):
+        self.events.append(("close", ))
+
+
+class _SlowPlugin(Plugin):
+
+    RUN_IN_BACKGROUND = True
+
+    def __init__(self):
+        self.n_cases = 0
+
+    def case_finished(self, test_suite, test_case, result, duration):
+        time.sleep(0.02)
+        self.n_cases += 1
+
+
+class _TimingPlugin(Plugin):
+
+    def __init__(self):
+        self.end_time = None
+
+    def run_finished(self, result, report_data):
+        self.end_time = time.perf_counter()
+
+
+class _FailingPlugin(Plugin):
+
+    def case_finished(self, test_suite, test_case, result, duration):
+        raise ValueError("Plugin error")
+
+
+_ENTRY_POINT_PLUGINS = '''
+import lily_unit_test
+
+class GoodPlugin(lily_unit_test.Plugin):
+    # Without hooks, the errors of the other plugins must still be logged
+    n_created = 0
+
+    def __init__(self):
+        GoodPlugin.n_created += 1
+
+class FailingPlugin(lily_unit_test.Plugin):
+
+    def __init__(self):
+        raise ConnectionError("No dashboard server")
+'''
+
+_ENTRY_POINTS = '''
+[lily_unit_test.plugins]
+broken = entry_point_does_not_exist:Plugin
+failing = entry_point_plugins:FailingPlugin
+good = entry_point_plugins:GoodPlugin
+'''
+
+
+class TestPlugins(lily_unit_test.TestSuite):
+
+    _folder = None
+
+    def setup(self):
+        self._folder = TestSuiteFolder()
+        for name, n_cases, result in (("TestPluginsA", 2, True), ("TestPluginsB", 20, "value")):
+            self._folder.add_module(f"plugins_{name.lower()}.py", _TEST_SUITE_TEMPLATE.format(
+                name=name, n_cases=n_cases, result=result))
+
+    def teardown(self):
+        self._folder.remove()
+
+    def _run(self, plugins):
+        return self._folder.run({"include_test_suites": ["TestPluginsA", "TestPluginsB"],
+                                 "plugins": plugins})
+
+    def test_no_hooks(self):
+        plugin_manager = PluginManager([Plugin()])
+        self.fail_if(plugin_manager.has_hooks(), "A plugin without hooks should have no hooks")
+        self.fail_if(plugin_manager.case_finished is not None, "Hook should be None")
+        plugin_manager.close()
+
+    def test_events(self):
+        plugin = _RecordingPlugin()
+        result = self._run([plugin])
+        self.fail_if(result, "The test run should fail")
+        events = list(filter(lambda x: x[0] != "case_started" and
+                             (x[0] != "case_finished" or x[1].startswith("TestPluginsA.")),
+                             plugin.events))
+        self.log.debug(f"Events: {events}")
+        expected = [("run_started", ("TestPluginsA", "TestPluginsB")),
+                    ("suite_started", "TestPluginsA"),
+                    ("case_finished", "TestPluginsA.test_case[0]", True),
+                    ("case_finished", "TestPluginsA.test_case[1]", True),
+                    ("suite_finished", "TestPluginsA", True),
+                    ("suite_started", "TestPluginsB"),
+                    ("suite_finished", "TestPluginsB", False),
+                    ("run_finished", False),
+                    ("close", )]
+        self.fail_if(events != expected, "Wrong events")
+        self.fail_if(("TestPluginsA", "INFO", "Value: 1") not in
+                     [(x[0], x[1], x[2].split(" | ")[-1]) for x in plugin.log_messages],
+                     "Log message not received")
+        self.fail_if(not any(map(lambda x: x[0] == "TestRunner", plugin.log_messages)),
+                     "Log messages of the test runner not received")
+        self.fail_if(len(plugin.report_ids) != 3, "Wrong report data")
+
+    def test_background(self):
+        plugin = _SlowPlugin()
+        timing_plugin = _TimingPlugin()
+        start = time.perf_counter()
+        self._run([plugin, timing_plugin])
+        duration = time.perf_counter() - start
+        test_duration = timing_plugin.end_time - start
+        self.log.debug(f"Tests: {test_duration:.3f} seconds, total: {duration:.3f} seconds")
+        # The slow plugin takes 22 x 0.02 seconds, but does not delay the tests
+        self.fail_if(test_duration > 0.3, "The tests are delayed by the background plugin")
+        # The test run waits for the plugin to finish when the run is done
+        self.fail_if(plugin.n_cases != 22, "Not all events processed")
+
+    def test_plugin_error(self):
+        n_messages = len(self.log.get_log_messages())
+        self._run([_FailingPlugin()])
+        log_messages = self.log.get_log_messages()[n_messages:]
+        self.fail_if(not any(map(lambda x: "Plugin _FailingPlugin failed in case_finished: "
+                                           "Plugin error" in x, log_messages)),
+                     "The plugin error is not logged")
+
+    def test_entry_point_errors(self):
+        # An installed package with plugins that cannot be loaded
+        packages_folder = os.path.join(self._folder.path, "packages")
+        self._folder.add_module(os.path.join("packages", "entry_point_plugins.py"),
+                                _ENTRY_POINT_PLUGINS)
+        self._folder.add_module(os.path.join("packages", "plugins-1.0.dist-info", "METADATA"),
+                                "Metadata-Version: 2.1\nName: plugins\nVersion: 1.0\n")
+        self._folder.add_module(os.path.join("packages", "plugins-1.0.dist-info",
+                                             "entry_points.txt"), _ENTRY_POINTS)
+        sys.path.append(packages_folder)
+        n_messages = len(self.log.get_log_messages())
+        try:
+            result = self._folder.run({"include_test_suites": ["TestPluginsA"],
+                                       "plugin_entry_points": True})
+            good_plugin = sys.modules["entry_point_plugins"].GoodPlugin
+        finally:
+            sys.path.remove(packages_folder)
+            sys.modules.pop("entry_point_plugins", None)
+        log_messages = "\n".join(self.log.get_log_messages()[n_messages:])
+        self.fail_if(not result, "The test run should not be stopped by the plugins")
+        self.fail_if(good_plugin.n_created != 1, "The plugin that can be loaded is not used")
+        # Logged as errors by the test runner, not printed to stderr
+        for error in ("ERROR  | Plugin entry point broken failed to load: No module named",
+                      "ERROR  | Plugin entry point failing failed to load: No dashboard server"):
+            self.fail_if(error not in log_messages, f"Not logged: {error}")
+
+
+if __name__ == "__main__":
+
+    TestPlugins().run()
@@ -0,0 +1,113 @@
+"""
+Test running each test suite in its own process.
+"""
+
+import os
+
+import lily_unit_test
+
+from .runner_helpers import ReportPlugin, TestSuiteFolder
+
+
+_TEST_SUITES = '''
+import json
+import os
+import sys
+import time
+import lily_unit_test
+
+class TestIsolation1Crash(lily_unit_test.TestSuite):
+
+    def test_crash(self):
+        print("Before the crash")
+        os._exit(3)
+
+
+class TestIsolation2Poison(lily_unit_test.TestSuite):
+
+    def test_poison(self):
+        json.dumps = None
+        sys.stdout = open(os.devnull, "w")
+        self.start_thread(time.sleep, (60,))
+
+
+class TestIsolation3Check(lily_unit_test.TestSuite):
+
+    def test_not_poisoned(self):
+        self.fail_if(json.dumps is None, "The json module is changed by another test suite")
+        print("The json module is fine")
+'''
+
+_LOAD_TEST_SUITE = '''
+import lily_unit_test
+
+class TestIsolationLoad(lily_unit_test.TestSuite):
+
+    @lily_unit_test.load_scenario(concurrency=2, iterations=10, mode="processes")
+    def test_load(self):
+        pass
+'''
+
+
+class _Recorder(ReportPlugin):
+
+    def __init__(self):
+        super().__init__()
+        self.test_cases = []
+
+    def case_finished(self, test_suite, test_case, result, duration):
+        self.test_cases.append((test_case, result))
+
+
+class TestProcessIsolation(lily_unit_test.TestSuite):
+
+    _folder = None
+
+    def setup(self):
+        self._folder = TestSuiteFolder()
+        self._folder.add_module("isolation_test_suites.py", _TEST_SUITES)
+
+    def teardown(self):
+        self._folder.remove()
+
+    def test_process_isolation(self):
+        recorder = _Recorder()
+        result = self._folder.run({"process_isolation": True, "plugins": [recorder]})
+        self.fail_if(result, "The test run should fail, because of the crash")
+        self.log.debug(f"Test cases: {recorder.test_cases}")
+        self.fail_if(recorder.test_cases != [("TestIsolation2Poison.test_poison", True),
+                                             ("TestIsolation3Check.test_not_poisoned", True)],
+                     "The test case events are not forwarded")
+
+        crash_log = recorder.report_data["2_TestIsolation1Crash"]
+        self.fail_if(not any("| STDOUT | Before the crash" in x for x in crash_log),
+                     "The log before the crash is missing")
+        self.fail_if("process ended unexpectedly by exit code 3" not in crash_log[-2],
+                     "The crash is not reported")
+        check_log = recorder.report_data["4_TestIsolation3Check"]
+        self.fail_if(not any("| STDOUT | The json module is fine" in x for x in check_log),
+                     "The output of the test suite is not captured")
+
+    def test_load_scenario_processes(self):
+        self._folder.add_module(os.path.join("load", "isolation_load_test_suite.py"),
+                                _LOAD_TEST_SUITE)
+        recorder = _Recorder()
+        result = self._folder.run({"process_isolation": True, "plugins": [recorder]}, "load")
+        log_messages = recorder.report_data["2_TestIsolationLoad"]
+        self.log.debug("\n".join(log_messages))
+        self.fail_if(not result, "The load scenario should run in the isolated process")
+        self.fail_if(not any("10 calls from 2 workers (processes)" in x for x in log_messages),
+                     "The load scenario did not use worker processes")
+
+    def test_resources_not_picklable(self):
+        try:
+            self._folder.run({"process_isolation": True, "resources": {"dmm": lambda: [0]}})
+        except AssertionError as e:
+            self.log.debug(f"Expected error: {e}")
+            return "Resource dmm cannot be sent to the processes" in str(e)
+        return False
+
+
+if __name__ == "__main__":
+
+    TestProcessIsolation().run()
@@ -0,0 +1,91 @@
+"""
+Test repeating the test suites to find flaky test cases.
+"""
+
+import glob
+import json
+import os
+
+import lily_unit_test
+
+from lily_unit_test.test_settings import TestSettings
+
+from .runner_helpers import TestSuiteFolder
+
+
+_TEST_SUITE_TEMPLATE = '''
+import os
+import lily_unit_test
+
+class TestRepeatFlaky(lily_unit_test.TestSuite):
+
+    def test_stable(self):
+        pass
+
+    def test_flaky(self):
+        # Fails every third run
+        filename = os.path.join(os.path.dirname(__file__), "counter.txt")
+        count = 0
+        if os.path.isfile(filename):
+            with open(filename, "r", encoding="utf-8") as fp:
+                count = int(fp.read())
+        with open(filename, "w", encoding="utf-8") as fp:
+            fp.write(str(count + 1))
+        return count % 3 != 2
+
+
+class TestRepeatStable(lily_unit_test.TestSuite):
+
+    def test_stable(self):
+        pass
+'''
+
+
+class TestRepeat(lily_unit_test.TestSuite):
+
+    _folder = None
+
+    def setup(self):
+        self._folder = TestSuiteFolder()
+        self._folder.add_module("repeat_test_suites.py", _TEST_SUITE_TEMPLATE)
+
+    def teardown(self):
+        self._folder.remove()
+
+    def _run(self, name, options):
+        report_folder = os.path.join(self._folder.path, name)
+        options["report_folder"] = report_folder
+        result = self._folder.run(options)
+        filenames = glob.glob(os.path.join(report_folder,
+                                           f"*_{TestSettings.REPEAT_STATISTICS_FILENAME}"))
+        self.fail_if(len(filenames) != 1, "No repeat statistics file written")
+        with open(filenames[0], "r", encoding="utf-8") as fp:
+            statistics = json.load(fp)
+        self.log.debug(f"Statistics: {statistics}")
+        return result, statistics
+
+    def test_flaky_test_case(self):
+        result, statistics = self._run("flaky", {"repeat": 6})
+        self.fail_if(result, "The test run should fail, because of the flaky test case")
+        self.fail_if(statistics["flaky_test_cases"] != ["TestRepeatFlaky.test_flaky"],
+                     "The flaky test case is not detected")
+        values = statistics["test_cases"]["TestRepeatFlaky.test_flaky"]
+        self.fail_if(values["runs"] != 6 or values["failed"] != 2, "Wrong failure count")
+        self.fail_if(statistics["test_suites"]["2_TestRepeatFlaky"] != {"runs": 6, "passed": 4},
+                     "Wrong test suite counts")
+        self.fail_if(statistics["test_suites"]["3_TestRepeatStable"] != {"runs": 6, "passed": 6},
+                     "Wrong test suite counts")
+
+    def test_worker_processes(self):
+        result, statistics = self._run("processes", {
+            "repeat": 5, "repeat_processes": 2, "include_test_suites": ["TestRepeatStable"]
+        })
+        self.fail_if(not result, "The test run should pass")
+        values = statistics["test_cases"]["TestRepeatStable.test_stable"]
+        self.fail_if(values["runs"] != 5 or values["failed"] != 0, "Wrong run count")
+        self.fail_if(statistics["flaky_test_cases"] != [], "No test case should be flaky")
+
+
+if __name__ == "__main__":
+
+    TestRepeat().run()
@@ -0,0 +1,86 @@
+"""
+Test running the failed test suites of the previous test run.
+"""
+
+import json
+import os
+
+import lily_unit_test
+
+from lily_unit_test.test_settings import TestSettings
+
+from .runner_helpers import TestSuiteFolder
+
+
+_TEST_SUITE_TEMPLATE = '''
+import os
+import lily_unit_test
+
+class {name}(lily_unit_test.TestSuite):
+
+    def test_pass(self):
+        print("Run {name}.test_pass")
+
+    def test_fixed(self):
+        print("Run {name}.test_fixed")
+        return {result} or os.path.isfile(os.path.join(os.path.dirname(__file__), "fixed"))
+'''
+
+
+class TestRerun(lily_unit_test.TestSuite):
+
+    _folder = None
+
+    def setup(self):
+        self._folder = TestSuiteFolder()
+        for name, result in (("TestRerunA", True), ("TestRerunB", True), ("TestRerunC", False)):
+            self._folder.add_module(f"rerun_{name.lower()}.py",
+                                    _TEST_SUITE_TEMPLATE.format(name=name, result=result))
+
+    def teardown(self):
+        self._folder.remove()
+
+    def _run(self, options):
+        logs = []
+        # The output of the test suites is echoed to the log of this test suite
+        n_messages = len(self.log.get_log_messages())
+        result = self._folder.run(options)
+        for log_message in self.log.get_log_messages()[n_messages:]:
+            if "| STDOUT | Run " in log_message:
+                logs.append(log_message.split("| STDOUT | Run ")[1])
+        filename = os.path.join(self._folder.report_folder, TestSettings.LAST_FAILED_FILENAME)
+        last_failed = None
+        if os.path.isfile(filename):
+            with open(filename, "r", encoding="utf-8") as fp:
+                last_failed = json.load(fp)["test_suites"]
+        self.log.debug(f"Executed: {logs}")
+        self.log.debug(f"Last failed: {last_failed}")
+        return result, logs, last_failed
+
+    def test_failed_first(self):
+        # Without log files and without rerun options, the failures are not stored
+        _, _, last_failed = self._run({})
+        self.fail_if(last_failed is not None, "The failures should not be stored")
+        result, logs, last_failed = self._run({"no_log_files": False})
+        self.fail_if(result, "The first test run should fail")
+        self.fail_if(last_failed != {"TestRerunC": ["TestRerunC.test_fixed"]},
+                     "Wrong failures stored")
+        _, logs, _ = self._run({"failed_first": True})
+        self.fail_if(len(logs) != 6 or not logs[0].startswith("TestRerunC."),
+                     "The failed test suite did not run first")
+
+    def test_failed_only(self):
+        with open(os.path.join(self._folder.path, "fixed"), "w", encoding="utf-8") as fp:
+            fp.write("")
+        result, logs, last_failed = self._run({"failed_only": True})
+        self.fail_if(not result, "The test run should pass after the fix")
+        self.fail_if(logs != ["TestRerunC.test_fixed"], "Only the failed test case should run")
+        self.fail_if(last_failed != {}, "The fixed test suite is still stored as failed")
+        # Nothing failed, so all test suites run
+        _, logs, _ = self._run({"failed_only": True})
+        self.fail_if(len(logs) != 6, "All test suites should run")
+
+
+if __name__ == "__main__":
+
+    TestRerun().run()
@@ -0,0 +1,89 @@
+"""
+Test sampling the resource usage of the test suites.
+"""
+
+import json
+import os
+
+import lily_unit_test
+
+from lily_unit_test.resource_sampler import ResourceSampler
+from lily_unit_test.test_settings import TestSettings
+
+from .runner_helpers import TestSuiteFolder
+
+
+_TEST_SUITE_TEMPLATE = '''
+import time
+import lily_unit_test
+
+class TestSamplerBusy(lily_unit_test.TestSuite):
+
+    def test_busy(self):
+        end_time = time.perf_counter() + 0.3
+        while time.perf_counter() < end_time:
+            pass
+
+
+class TestSamplerWaiting(lily_unit_test.TestSuite):
+
+    def test_waiting(self):
+        time.sleep(0.3)
+'''
+
+
+class TestResourceSampler(lily_unit_test.TestSuite):
+
+    _folder = None
+
+    def setup(self):
+        self._folder = TestSuiteFolder()
+        self._folder.add_module("sampler_test_suites.py", _TEST_SUITE_TEMPLATE)
+
+    def teardown(self):
+        self._folder.remove()
+
+    def test_resource_sampling(self):
+        result = self._folder.run({"create_html_report": True, "resource_sampling": 0.02})
+        self.fail_if(not result, "The test run should pass")
+        filenames = self._folder.get_report_files(f"*_{TestSettings.RESOURCE_SAMPLES_FILENAME}")
+        self.fail_if(len(filenames) != 1, "No resource samples file written")
+        with open(filenames[0], "r", encoding="utf-8") as fp:
+            samples = json.load(fp)
+
+        busy = samples["test_suites"]["TestSamplerBusy"]
+        waiting = samples["test_suites"]["TestSamplerWaiting"]
+        self.log.debug(f"CPU usage busy: {busy['cpu_usage_mean']:.2f}, "
+                       f"waiting: {waiting['cpu_usage_mean']:.2f}")
+        self.fail_if(busy["cpu_usage_mean"] < 0.5, "The busy test suite should use the CPU")
+        self.fail_if(waiting["cpu_usage_mean"] > 0.5,
+                     "The waiting test suite should not use the CPU")
+        self.fail_if(busy["rss"] == 0 and os.path.isdir("/proc"), "No memory usage sampled")
+
+        timeline = samples["timeline"]
+        self.fail_if(len(timeline["time"]) != len(timeline["running"]), "Columns differ in length")
+        self.fail_if([["TestSamplerBusy", "TestSamplerBusy.test_busy"]] not in timeline["running"],
+                     "Samples are not attributed to the test case")
+
+        with open(self._folder.get_report_files("*_TestRunner.html")[0], "r",
+                  encoding="utf-8") as fp:
+            html_report = fp.read()
+        self.fail_if(html_report.count('class="sparkline"') != 2,
+                     "The resource usage is not in the HTML report")
+
+    def test_last_sample(self):
+        # A test suite that is running at the last sample of the interval and ends before the
+        # next sample, like at the end of the run
+        sampler = ResourceSampler(10)
+        sampler.suite_started("TestShort")
+        sampler.start()
+        self.sleep(0.05)
+        sampler.stop()
+        summary = sampler.get_summary("TestShort")
+        self.fail_if(summary is None, "No samples of the short test suite")
+        self.fail_if(summary["duration"] < 0.05, f"Wrong duration: {summary['duration']}")
+
+
+if __name__ == "__main__":
+
+    TestResourceSampler().run()
@@ -0,0 +1,82 @@
+"""
+Test the shared resources of the test runner.
+"""
+
+import lily_unit_test
+
+from lily_unit_test.resources import ResourceProvider
+
+from .runner_helpers import TestSuiteFolder
+
+
+_TEST_SUITE_TEMPLATE = '''
+import lily_unit_test
+
+class {name}(lily_unit_test.TestSuite):
+    RESOURCES = {resources}
+
+    def test_resource(self):
+        self.get_resource("recorder").append("{name}")
+        if "shared" in self.RESOURCES:
+            shared = self.get_resource("shared")
+            assert shared == "shared resource", "Wrong resource"
+'''
+
+
+class TestResources(lily_unit_test.TestSuite):
+
+    class _SharedProvider(ResourceProvider):
+
+        def __init__(self, events):
+            self._events = events
+
+        def create(self):
+            self._events.append("create")
+            return "shared resource"
+
+        def destroy(self, resource):
+            self._events.append(f"destroy {resource}")
+
+    def test_resource_life_time(self):
+        events = []
+        folder = TestSuiteFolder()
+        try:
+            test_suites = [("TestResourceA", ["recorder", "shared"]),
+                           ("TestResourceB", ["recorder"]),
+                           ("TestResourceC", ["recorder", "shared"]),
+                           ("TestResourceD", ["recorder"])]
+            for name, resources in test_suites:
+                folder.add_module(f"resources_{name.lower()}.py",
+                                  _TEST_SUITE_TEMPLATE.format(name=name, resources=resources))
+            result = folder.run({"resources": {
+                "recorder": lambda: events,
+                "shared": self._SharedProvider(events)
+            }})
+        finally:
+            folder.remove()
+
+        self.log.debug(f"Events: {events}")
+        self.fail_if(not result, "The test run should pass")
+        # The shared resource is created once and destroyed after the last test suite that uses it
+        expected = ["TestResourceA", "create", "TestResourceB", "TestResourceC",
+                    "destroy shared resource", "TestResourceD"]
+        self.fail_if(events != expected, "The resource is not created and destroyed correctly")
+        self.fail_if(not any(map(lambda x: x.endswith("Resource shared used by: "
+                                                      "TestResourceA, TestResourceC"),
+                                 self.log.get_log_messages())),
+                     "The usage of the resource is not logged")
+
+    def test_without_test_runner(self):
+        test_suite = lily_unit_test.TestSuite()
+        test_suite.log.shutdown()
+        try:
+            test_suite.get_resource("shared")
+        except AssertionError as e:
+            self.log.debug(f"Expected error: {e}")
+            return True
+        return False
+
+
+if __name__ == "__main__":
+
+    TestResources().run()
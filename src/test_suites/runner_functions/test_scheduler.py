@@ -0,0 +1,129 @@
+"""
+Test the scheduling of test suites with dependencies.
+"""
+
+import os
+import time
+
+import lily_unit_test
+
+from lily_unit_test.scheduler import TestScheduler
+
+from .runner_helpers import TestSuiteFolder
+
+
+_TEST_SUITE_TEMPLATE = '''
+import time
+import lily_unit_test
+
+class {name}(lily_unit_test.TestSuite):
+    DEPENDS_ON = {depends_on}
+
+    def test_run(self):
+        print("Output of {name}")
+        time.sleep({sleep})
+        return {result}
+'''
+
+
+def _create_test_suite_class(name, depends_on=()):
+    return type(name, (lily_unit_test.TestSuite,), {"DEPENDS_ON": list(depends_on)})
+
+
+class TestSchedulerOrder(lily_unit_test.TestSuite):
+
+    def test_order(self):
+        flash = _create_test_suite_class("TestFlash")
+        functional = _create_test_suite_class("TestFunctional", ["TestFlash"])
+        calibration = _create_test_suite_class("TestCalibration", ["TestFunctional"])
+        other = _create_test_suite_class("TestOther", ["TestNotInTestRun"])
+        scheduler = TestScheduler([calibration, functional, other, flash])
+        order = list(map(lambda x: x.__name__, scheduler.get_order()))
+        self.log.debug(f"Order: {order}")
+        self.fail_if(order != ["TestOther", "TestFlash", "TestFunctional", "TestCalibration"],
+                     "Wrong order of test suites")
+        self.fail_if(scheduler.get_dependencies(calibration) != {functional},
+                     "Wrong dependencies")
+
+    def test_run_first_and_last(self):
+        test_suites = [_create_test_suite_class(f"TestSuite{i}") for i in range(4)]
+        scheduler = TestScheduler(test_suites, "TestSuite2", "TestSuite1")
+        order = list(map(lambda x: x.__name__, scheduler.get_order()))
+        self.fail_if(order != ["TestSuite2", "TestSuite0", "TestSuite3", "TestSuite1"],
+                     f"Wrong order of test suites: {order}")
+        # Running first and last is not a dependency, the last test suite always runs
+        self.fail_if(scheduler.get_dependencies(test_suites[1]) != set(),
+                     "Test suite to run last should not have dependencies")
+        self.fail_if(len(scheduler.get_predecessors(test_suites[1])) != 3,
+                     "Test suite to run last should run after all other test suites")
+
+    def test_cycle(self):
+        test_suites = [_create_test_suite_class("TestA", ["TestC"]),
+                       _create_test_suite_class("TestB", ["TestA"]),
+                       _create_test_suite_class("TestC", ["TestB"])]
+        try:
+            TestScheduler(test_suites)
+        except AssertionError as e:
+            self.log.debug(f"Expected error: {e}")
+            self.fail_if("TestA -> TestC -> TestB -> TestA" not in str(e), "Cycle not reported")
+            return True
+        return False
+
+    def test_critical_path(self):
+        a = _create_test_suite_class("TestA")
+        b = _create_test_suite_class("TestB", ["TestA"])
+        c = _create_test_suite_class("TestC")
+        d = _create_test_suite_class("TestD", ["TestB", "TestC"])
+        scheduler = TestScheduler([a, b, c, d])
+        path, duration = scheduler.get_critical_path({a: 1, b: 2, c: 4, d: 1})
+        self.fail_if(path != ["TestC", "TestD"] or duration != 5,
+                     f"Wrong critical path: {path} ({duration})")
+
+
+def _read_logs(report_folder):
+    log_folder = [x.path for x in os.scandir(report_folder) if x.is_dir()][0]
+    logs = {}
+    for filename in os.listdir(log_folder):
+        with open(os.path.join(log_folder, filename), "r", encoding="utf-8") as fp:
+            logs[filename[:-4].split("_", maxsplit=1)[1]] = fp.read()
+    return logs
+
+
+class TestSchedulerRun(lily_unit_test.TestSuite):
+
+    def test_parallel_run_with_failing_dependency(self):
+        folder = TestSuiteFolder()
+        try:
+            test_suites = [("TestSchedulerFlash", [], 0, False),
+                           ("TestSchedulerFunctional", ["TestSchedulerFlash"], 0, True),
+                           ("TestSchedulerCalibration", ["TestSchedulerFunctional"], 0, True),
+                           ("TestSchedulerSlow1", [], 0.5, True),
+                           ("TestSchedulerSlow2", [], 0.5, True)]
+            for name, depends_on, sleep, result in test_suites:
+                folder.add_module(f"scheduler_{name.lower()}.py", _TEST_SUITE_TEMPLATE.format(
+                    name=name, depends_on=depends_on, sleep=sleep, result=result))
+            start = time.perf_counter()
+            result = folder.run({"no_log_files": False, "parallel_test_suites": 3})
+            duration = time.perf_counter() - start
+            logs = _read_logs(folder.report_folder)
+        finally:
+            folder.remove()
+
+        self.log.debug(f"Duration: {duration:.2f} seconds")
+        self.fail_if(result, "The test run should fail")
+        self.fail_if(duration > 0.9, "The slow test suites did not run in parallel")
+        for name in ("TestSchedulerFunctional", "TestSchedulerCalibration"):
+            self.fail_if(f"Output of {name}" in logs[name], f"Test suite {name} was not skipped")
+            self.fail_if("SKIPPED because of failed dependencies" not in logs[name],
+                         f"Skipping test suite {name} is not logged")
+        for name in ("TestSchedulerSlow1", "TestSchedulerSlow2"):
+            other = name[:-1] + ("2" if name.endswith("1") else "1")
+            self.fail_if(f"Output of {name}" not in logs[name], f"Output of {name} not logged")
+            self.fail_if(f"Output of {other}" in logs[name], f"Output of {other} in log of {name}")
+        self.fail_if("Critical path: " not in logs["TestRunner"], "Critical path not logged")
+
+
+if __name__ == "__main__":
+
+    TestSchedulerOrder().run()
+    TestSchedulerRun().run()
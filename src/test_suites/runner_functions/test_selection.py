@@ -0,0 +1,114 @@
+"""
+Test selecting test suites and test methods by patterns and tags.
+"""
+
+import os
+import sys
+
+import lily_unit_test
+
+from .runner_helpers import TestSuiteFolder
+
+
+_TEST_SUITE_A = '''
+import lily_unit_test
+
+class TestSelectA(lily_unit_test.TestSuite):
+
+    TAGS = ["hardware"]
+
+    @lily_unit_test.tags("smoke")
+    def test_one(self):
+        pass
+
+    def test_two(self):
+        pass
+'''
+
+_TEST_SUITE_B = '''
+import os
+import lily_unit_test
+
+# Shows if the module was imported
+open(os.path.join(os.path.dirname(__file__), "imported_b"), "w").close()
+
+class TestSelectB(lily_unit_test.TestSuite):
+
+    @lily_unit_test.tags("smoke", "slow")
+    def test_three(self):
+        pass
+'''
+
+
+class _CaseRecorder(lily_unit_test.Plugin):
+
+    def __init__(self):
+        self.test_cases = []
+
+    def case_finished(self, test_suite, test_case, result, duration):
+        self.test_cases.append(test_case)
+
+
+class TestSelection(lily_unit_test.TestSuite):
+
+    _folder = None
+
+    def setup(self):
+        self._folder = TestSuiteFolder()
+        for name, source in (("select_a", _TEST_SUITE_A), ("select_b", _TEST_SUITE_B)):
+            self._folder.add_module(f"{name}.py", source)
+
+    def teardown(self):
+        self._folder.remove()
+
+    def _run(self, include, exclude=()):
+        recorder = _CaseRecorder()
+        self._folder.run({
+            "include_test_suites": list(include),
+            "exclude_test_suites": list(exclude),
+            "plugins": [recorder]
+        })
+        self.log.debug(f"Include {include}, exclude {exclude}: {recorder.test_cases}")
+        return recorder.test_cases
+
+    def test_select_test_method(self):
+        test_cases = self._run(["TestSelectA.test_one"])
+        self.fail_if(test_cases != ["TestSelectA.test_one"], "Wrong test cases executed")
+        self.fail_if(os.path.isfile(os.path.join(self._folder.path, "imported_b")),
+                     "A module without selected test suites was imported")
+
+    def test_imported_test_suite(self):
+        # The test suite is defined in a module outside the test suites folder
+        folder = TestSuiteFolder()
+        shared_folder = os.path.dirname(folder.add_module(
+            os.path.join("shared", "select_shared.py"),
+            _TEST_SUITE_A.replace("TestSelectA", "TestSelectShared")))
+        folder.add_module(os.path.join("suites", "select_c.py"),
+                          "from select_shared import TestSelectShared\n")
+        recorder = _CaseRecorder()
+        sys.path.append(shared_folder)
+        try:
+            folder.run({"include_test_suites": ["TestSelectShared.test_one"],
+                        "plugins": [recorder]}, "suites")
+        finally:
+            sys.path.remove(shared_folder)
+            sys.modules.pop("select_shared", None)
+            folder.remove()
+        self.fail_if(recorder.test_cases != ["TestSelectShared.test_one"],
+                     f"The imported test suite is not selected: {recorder.test_cases}")
+
+    def test_patterns(self):
+        for include, exclude, expected in (
+                (["tag:smoke"], [], ["TestSelectA.test_one", "TestSelectB.test_three"]),
+                (["TestSelect*.test_t*"], [], ["TestSelectA.test_two", "TestSelectB.test_three"]),
+                (["re:^TestSelect[AB]$"], ["tag:hardware"], ["TestSelectB.test_three"]),
+                (["re:Select.\\.test_t"], ["tag:slow"], ["TestSelectA.test_two"]),
+                ([], ["TestSelectB", "TestSelectA.test_one"], ["TestSelectA.test_two"])):
+            test_cases = self._run(include, exclude)
+            self.fail_if(test_cases != expected, f"Wrong test cases executed for {include}, "
+                                                 f"{exclude}: {test_cases}")
+
+
+if __name__ == "__main__":
+
+    TestSelection().run()
@@ -0,0 +1,106 @@
+"""
+Test the soak test mode, that runs the test suites over and over in one process.
+"""
+
+import json
+import sys
+
+import lily_unit_test
+
+from lily_unit_test.soak_statistics import SoakStatistics
+from lily_unit_test.test_settings import TestSettings
+
+from .runner_helpers import ReportPlugin, TestSuiteFolder
+
+
+_TEST_SUITE_TEMPLATE = '''
+import lily_unit_test
+
+_runs = [0]
+
+class TestSoakStable(lily_unit_test.TestSuite):
+
+    def test_stable(self):
+        self.log.info("Stable")
+
+class TestSoakFlaky(lily_unit_test.TestSuite):
+
+    def test_flaky(self):
+        _runs[0] += 1
+        self.log.info("Run {}", _runs[0])
+        # Fails once in every ten runs
+        return _runs[0] % 10 != 3
+'''
+
+
+class TestSoak(lily_unit_test.TestSuite):
+
+    _folder = None
+
+    def setup(self):
+        self._folder = TestSuiteFolder()
+        self._folder.add_module("soak_test_suites.py", _TEST_SUITE_TEMPLATE)
+
+    def teardown(self):
+        self._folder.remove()
+
+    def _run(self, options):
+        plugin = ReportPlugin()
+        options["plugins"] = [plugin]
+        result = self._folder.run(options)
+        runner_log = plugin.get_runner_log()
+        filenames = self._folder.get_report_files(f"*_{TestSettings.SOAK_STATISTICS_FILENAME}")
+        with open(filenames[-1], "r", encoding="utf-8") as fp:
+            statistics = json.load(fp)
+        self.log.debug(f"Summary: {statistics['summary']}")
+        return result, plugin.report_data, runner_log, statistics
+
+    def test_statistics(self):
+        statistics = SoakStatistics(window=10)
+        for i in range(30):
+            statistics.add_iteration(9 if i == 25 else 10, 10, 1.0 if i < 10 else 1.1)
+        summary = statistics.get_summary()
+        self.fail_if(summary["iterations"] != 30 or summary["passed_iterations"] != 29,
+                     "Wrong number of iterations")
+        # The pass rate and duration are of the last 10 iterations only
+        self.fail_if(round(summary["pass_rate"], 6) != 99.0, "Wrong pass rate")
+        self.fail_if(round(summary["duration_drift"], 6) != 10.0, "Wrong duration drift")
+        self.fail_if(len(statistics.get_history()) > 0, "The history should be empty")
+        self.fail_if(not statistics.add_history().startswith("Iteration 30: 29 passed"),
+                     "Wrong summary text")
+
+    def test_soak_iterations(self):
+        result, report_data, runner_log, statistics = self._run({"soak_iterations": 20})
+        self.fail_if(result, "The flaky test suite should fail the test run")
+        for line in ("Test suite TestSoakStable: 20 of 20 iterations passed",
+                     "Test suite TestSoakFlaky: 18 of 20 iterations passed"):
+            self.fail_if(not any(x.endswith(line) for x in runner_log), f"Not logged: {line}")
+        self.fail_if(statistics["summary"]["iterations"] != 20, "Wrong number of iterations")
+        # The log of the first failed iteration is kept
+        flaky_log = report_data[[x for x in report_data if x.endswith("_TestSoakFlaky")][0]]
+        self.fail_if(not any(x.endswith("Run 3") for x in flaky_log),
+                     "The log of the first failure is not kept")
+
+    def test_bounded_memory(self):
+        n_messages = []
+        for n_iterations in (10, 100):
+            _, report_data, runner_log, _ = self._run({"soak_iterations": n_iterations})
+            n_messages.append(sum(map(len, report_data.values())))
+            self.fail_if(len(runner_log) > 20, "The runner log should not grow with iterations")
+        self.fail_if(n_messages[0] != n_messages[1],
+                     f"The report grows with the iterations: {n_messages}")
+        self.fail_if(sys.path.count(self._folder.path) != 1,
+                     "The path of the test suites should be added once")
+
+    def test_soak_duration(self):
+        result, _, runner_log, statistics = self._run({"soak_duration": 0.5,
+                                                       "include_test_suites": ["TestSoakStable"]})
+        self.fail_if(not result, "The stable test suite should pass")
+        self.fail_if(statistics["summary"]["iterations"] < 2, "The test suites should run again")
+        self.fail_if(not any(" | Iteration " in x for x in runner_log),
+                     "The statistics are not in the runner log")
+
+
+if __name__ == "__main__":
+
+    TestSoak().run()
@@ -0,0 +1,132 @@
+"""
+Test running the test suites that fit in a time budget.
+"""
+
+import json
+import os
+
+import lily_unit_test
+
+from lily_unit_test.scheduler import TestScheduler
+from lily_unit_test.test_settings import TestSettings
+
+from .runner_helpers import ReportPlugin, TestSuiteFolder
+
+
+_TEST_SUITE_TEMPLATE = '''
+import time
+import lily_unit_test
+
+class {name}(lily_unit_test.TestSuite):
+    PRIORITY = {priority}
+    EXPECTED_DURATION = {expected_duration}
+    DEPENDS_ON = {depends_on}
+
+    @lily_unit_test.parametrize(range({n_cases}))
+    def test_case(self, value):
+        time.sleep({sleep})
+'''
+
+
+def _create_test_suite_class(name, priority=0, depends_on=()):
+    return type(name, (lily_unit_test.TestSuite,),
+                {"PRIORITY": priority, "DEPENDS_ON": list(depends_on)})
+
+
+class _SkippedPlugin(ReportPlugin):
+
+    def __init__(self):
+        super().__init__()
+        self.skipped = []
+
+    def suite_finished(self, test_suite, result, duration, skipped, log_messages):
+        if skipped:
+            self.skipped.append((test_suite, result))
+
+
+class TestTimeBudget(lily_unit_test.TestSuite):
+
+    _folder = None
+
+    def setup(self):
+        self._folder = TestSuiteFolder()
+        for name, priority, expected_duration, depends_on, n_cases, sleep in (
+                ("TestBudgetFlash", 10, 0.1, [], 1, 0),
+                ("TestBudgetFunctional", 0, 0.1, ["TestBudgetFlash"], 1, 0),
+                ("TestBudgetSoak", 0, 100, [], 1, 0),
+                ("TestBudgetSlow", 0, 1.0, [], 20, 0.1),
+                ("TestBudgetLate", -1, 0.1, [], 1, 0)):
+            self._folder.add_module(f"budget_{name.lower()}.py", _TEST_SUITE_TEMPLATE.format(
+                name=name, priority=priority, expected_duration=expected_duration,
+                depends_on=depends_on, n_cases=n_cases, sleep=sleep))
+
+    def teardown(self):
+        self._folder.remove()
+
+    def _get_durations_filename(self):
+        return os.path.join(self._folder.report_folder, TestSettings.DURATIONS_FILENAME)
+
+    def _run(self, options):
+        plugin = _SkippedPlugin()
+        options["plugins"] = [plugin]
+        result = self._folder.run(options)
+        with open(self._get_durations_filename(), "r", encoding="utf-8") as fp:
+            durations = json.load(fp)["test_suites"]
+        self.log.debug(f"Skipped: {plugin.skipped}")
+        self.log.debug(f"Durations: {durations}")
+        return result, plugin, durations
+
+    def test_select_within_budget(self):
+        flash = _create_test_suite_class("TestFlash", 10)
+        functional = _create_test_suite_class("TestFunctional", 5, ["TestFlash"])
+        soak = _create_test_suite_class("TestSoak")
+        smoke = _create_test_suite_class("TestSmoke")
+        cleanup = _create_test_suite_class("TestCleanup")
+        scheduler = TestScheduler([functional, flash, soak, smoke, cleanup], run_last="TestCleanup")
+        durations = {flash: 20, functional: 60, soak: 600, smoke: 5, cleanup: 10}
+        selection = scheduler.select_within_budget(durations, 120)
+        self.fail_if(selection != {flash, functional, smoke, cleanup},
+                     f"Wrong selection: {sorted(x.__name__ for x in selection)}")
+        # The test suite it depends on does not fit, so the test suite does not fit either
+        durations[flash] = 100
+        selection = scheduler.select_within_budget(durations, 120)
+        self.fail_if(selection != {flash, smoke, cleanup},
+                     f"Wrong selection: {sorted(x.__name__ for x in selection)}")
+
+    def test_run_with_time_budget(self):
+        result, plugin, durations = self._run({"time_budget": 1.5})
+        self.fail_if(not result, "Skipped test suites and test cases are not failures")
+        self.fail_if(plugin.skipped != [("TestBudgetSoak", None), ("TestBudgetLate", None)],
+                     "Wrong test suites skipped")
+        runner_log = "\n".join(plugin.get_runner_log())
+        self.fail_if("Time budget of 1.5 seconds: 4 of 5 test suites selected" not in runner_log,
+                     "The selection is not in the runner log")
+        self.fail_if("2 test suites skipped because of the time budget: TestBudgetSoak, "
+                     "TestBudgetLate" not in runner_log, "The skipped test suites are not listed")
+        self.fail_if("3 of 3 test suites passed" not in runner_log, "Wrong summary")
+        slow_log = "\n".join(plugin.report_data[[x for x in plugin.report_data
+                                                 if x.endswith("_TestBudgetSlow")][0]])
+        self.fail_if("SKIPPED because of the time budget" not in slow_log,
+                     "The slow test suite should be stopped at the deadline")
+        self.fail_if("TestBudgetSlow" in durations or "TestBudgetSoak" in durations,
+                     "Only complete durations should be stored")
+        self.fail_if(set(durations) != {"TestBudgetFlash", "TestBudgetFunctional"},
+                     "The durations of the test suites that ran are not stored")
+
+    def test_learned_durations(self):
+        os.makedirs(self._folder.report_folder, exist_ok=True)
+        with open(self._get_durations_filename(), "w", encoding="utf-8") as fp:
+            json.dump({"time_stamp": "", "test_suites": {"TestBudgetFlash": 50}}, fp)
+        result, plugin, durations = self._run({"time_budget": 10,
+                                               "exclude_test_suites": ["TestBudgetSlow"]})
+        self.fail_if(not result, "The test run should pass")
+        self.fail_if(plugin.skipped != [("TestBudgetFlash", None), ("TestBudgetFunctional", None),
+                                        ("TestBudgetSoak", None)],
+                     "The learned duration of the flash test suite does not fit")
+        self.fail_if(durations.get("TestBudgetFlash") != 50,
+                     "Skipped test suites should keep their duration")
+
+
+if __name__ == "__main__":
+
+    TestTimeBudget().run()
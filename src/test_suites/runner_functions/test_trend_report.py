@@ -0,0 +1,161 @@
+"""
+Test the trend report.
+"""
+
+import gzip
+import os
+import shutil
+import tempfile
+
+import lily_unit_test
+
+from lily_unit_test.log_archive import LogArchiveWriter
+from lily_unit_test.trend_report import TrendReport, main
+from lily_unit_test.test_settings import TestSettings
+
+
+def _create_log(day, duration, result):
+    return [f"2024-01-{day:02d} 10:00:00.000 | INFO   | Run test suite",
+            "",
+            f"2024-01-{day:02d} 10:00:{duration:06.3f} | INFO   | Result: {result}"]
+
+
+def _get_result_text(result):
+    if result is None:
+        return "SKIPPED because of the time budget"
+    return "PASSED" if result else "FAILED"
+
+
+_TEST_SUITE = '''
+import lily_unit_test
+
+class TestTrendPass(lily_unit_test.TestSuite):
+
+    def test_pass(self):
+        pass
+'''
+
+
+class TestTrendReport(lily_unit_test.TestSuite):
+
+    _temp_folder = None
+    _report_folder = None
+
+    def setup(self):
+        self._temp_folder = tempfile.mkdtemp()
+
+    def teardown(self):
+        shutil.rmtree(self._temp_folder)
+
+    def _create_report_folder(self, name):
+        self._report_folder = os.path.join(self._temp_folder, name)
+        os.makedirs(self._report_folder)
+
+    def _add_run(self, day, durations, results, archive=False):
+        time_stamp = f"202401{day:02d}_100000"
+        logs = {"1_TestRunner": _create_log(day, 59, _get_result_text(False not in results))}
+        for i, name in enumerate(("TestA", "TestB")):
+            logs[f"{i + 2}_{name}"] = _create_log(day, durations[i], _get_result_text(results[i]))
+        if archive:
+            writer = LogArchiveWriter(os.path.join(self._report_folder,
+                                                   f"{time_stamp}_TestRunner.lla"))
+            for name, log_messages in logs.items():
+                writer.add_test_suite(name, log_messages)
+            writer.close()
+            return
+        log_folder = os.path.join(self._report_folder, time_stamp)
+        os.makedirs(log_folder)
+        for name, log_messages in logs.items():
+            if name == "1_TestRunner" and day == 99:
+                # Test run not finished
+                continue
+            if name == "3_TestB":
+                with gzip.open(os.path.join(log_folder, f"{name}.txt.gz"), "wt",
+                               encoding="utf-8") as fp:
+                    fp.write("\n".join(log_messages))
+            else:
+                with open(os.path.join(log_folder, f"{name}.txt"), "w", encoding="utf-8") as fp:
+                    fp.write("\n".join(log_messages))
+
+    def test_index(self):
+        self._create_report_folder("index")
+        self._add_run(1, (1, 10), (True, True))
+        self._add_run(2, (1.1, 10), (True, False))
+        self._add_run(3, (1.5, 12), (False, True), archive=True)
+        trend_report = TrendReport(self._report_folder)
+        self.fail_if(trend_report.update_index() != 3, "Wrong number of test runs added")
+        self.fail_if(trend_report.update_index() != 0, "Test runs added twice")
+
+        # A new instance reads the index, only the new test run is read
+        self._add_run(4, (2.5, 13), (True, True))
+        trend_report = TrendReport(self._report_folder)
+        self.fail_if(trend_report.update_index() != 1, "New test run not added")
+        self.fail_if(trend_report.get_runs() != ["20240101_100000", "20240102_100000",
+                                                 "20240103_100000", "20240104_100000"],
+                     "Wrong test runs")
+        self.fail_if(trend_report.get_test_suites() != ["TestA", "TestB"], "Wrong test suites")
+        self.fail_if(trend_report.get_pass_rate("TestA") != 0.75, "Wrong pass rate")
+        history = trend_report.get_history("TestB")
+        self.fail_if(history[2] != ("20240103_100000", True, 12), f"Wrong history: {history}")
+
+    def test_regressions(self):
+        self._create_report_folder("regressions")
+        self._add_run(1, (1, 10), (True, True))
+        self._add_run(2, (1.1, 13), (True, True))
+        self._add_run(3, (3, 11), (True, True))
+        self._add_run(99, (1, 1), (True, True))
+        trend_report = TrendReport(self._report_folder)
+        trend_report.update_index()
+        self.fail_if(len(trend_report.get_runs()) != 3, "Unfinished test run should be skipped")
+        regressions = trend_report.get_regressions()
+        self.fail_if(regressions != [("TestA", 3, 1)], f"Wrong regressions: {regressions}")
+        regressions = trend_report.get_regressions("20240102_100000", threshold=0.5)
+        self.fail_if(regressions != [("TestA", 3, 1.1)], f"Wrong regressions: {regressions}")
+        slowdowns = trend_report.get_slowdowns("20240101_100000", "20240102_100000")
+        self.fail_if(slowdowns[0] != ("TestB", 10, 13), f"Wrong slowdowns: {slowdowns}")
+
+        output = trend_report.generate_html_report()
+        self.fail_if('<tr class="regression"><td>TestA</td>' not in output,
+                     "Regression not highlighted")
+
+        main([self._report_folder, "--compare", "20240101_100000", "20240102_100000"])
+        self.fail_if(not os.path.isfile(os.path.join(self._report_folder,
+                                                     TestSettings.TREND_REPORT_FILENAME)),
+                     "Report not written")
+
+    def test_skipped(self):
+        self._create_report_folder("skipped")
+        self._add_run(1, (1, 10), (True, True))
+        self._add_run(2, (0, 10), (None, True))
+        self._add_run(3, (0, 0), (None, None), archive=True)
+        self._add_run(4, (1, 10), (False, True))
+        trend_report = TrendReport(self._report_folder)
+        trend_report.update_index()
+        history = trend_report.get_history("TestA")
+        self.fail_if([x[1] for x in history] != [True, None, None, False],
+                     f"Skipped test suites are not failures: {history}")
+        self.fail_if(trend_report.get_pass_rate("TestA") != 0.5,
+                     "Skipped test suites should not count in the pass rate")
+        self.fail_if(len(trend_report.get_slowdowns("20240102_100000", "20240104_100000")) > 0,
+                     "Skipped test suites have no duration to compare")
+        output = trend_report.generate_html_report()
+        self.fail_if('<td class="skipped">skipped</td>' not in output,
+                     "Skipped test suites are not shown")
+
+    def test_no_test_runs(self):
+        trend_report = TrendReport(os.path.join(self._temp_folder, "does_not_exist"))
+        self.fail_if(trend_report.update_index() != 0, "There are no test runs")
+        self.fail_if(trend_report.write_html_report() is not None, "No report should be written")
+        # Without log files the test run has no trend, but the result is still returned
+        with open(os.path.join(self._temp_folder, "trend_test_suites.py"), "w",
+                  encoding="utf-8") as fp:
+            fp.write(_TEST_SUITE)
+        result = lily_unit_test.TestRunner.run(self._temp_folder, {
+            "report_folder": os.path.join(self._temp_folder, "reports"),
+            "no_log_files": True, "create_trend_report": True})
+        self.fail_if(not result, "The test run should pass")
+
+
+if __name__ == "__main__":
+
+    TestTrendReport().run()
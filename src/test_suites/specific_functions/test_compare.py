@@ -0,0 +1,83 @@
+"""
+Test comparing large data with a summary of the differences.
+"""
+
+import array
+import os
+
+from lily_unit_test.compare import compare
+from lily_unit_test.test_suite import TestSuite
+
+
+class TestCompare(TestSuite):
+
+    def _check_summary(self, actual, expected, expected_lines):
+        summary = compare(actual, expected, max_differences=3, context=2)
+        self.log.debug(summary)
+        self.fail_if(summary is None, "The values should differ")
+        for line in expected_lines:
+            self.fail_if(line not in summary.split("\n"), f"Line not in summary: {line}")
+
+    def test_equal(self):
+        data = os.urandom(1024 * 1024)
+        self.fail_if(compare(data, bytearray(data)) is not None, "Equal bytes should not differ")
+        self.fail_if(compare(list(range(1000)), list(range(1000))) is not None,
+                     "Equal lists should not differ")
+
+        def _message():
+            raise AssertionError("The error message should only be created on a failure")
+
+        self.fail_if_not_equal(data, bytes(data), _message)
+        self.fail_if(False, _message)
+
+    def test_bytes(self):
+        expected = bytes(range(256)) * 4096
+        actual = bytearray(expected)
+        actual[0x1234] = 0xFF
+        self._check_summary(actual, expected, [
+            "Offset 0x1234: actual 32 33 ff 35 36, expected 32 33 34 35 36 (from offset 0x1232)"
+        ])
+        actual[0x2000:0x3000] = bytes(0x1000)
+        self._check_summary(actual, expected, ["Only the first 3 differences are shown"])
+
+    def test_sequences(self):
+        expected = list(range(100000))
+        actual = list(expected)
+        actual[50000] = "x"
+        self._check_summary(actual, expected, ["Index 50000: actual 'x', expected 50000"])
+        self._check_summary(expected[:10], expected[:12], [
+            "Length: actual 10, expected 12", "Actual misses items from index 10: [10, 11]"
+        ])
+
+    def test_text(self):
+        expected = "".join(f"line {i}\n" for i in range(10000))
+        actual = expected.replace("line 5000\n", "line 5000 changed\n")
+        self._check_summary(actual, expected, [
+            "First difference at line 5001", "-line 5000 changed", "+line 5000"
+        ])
+        # Lines that only differ in their line ending
+        self._check_summary("first\r\nsecond\n", "first\nsecond", [
+            "-'first\\r\\n'", "+'first\\n'", "-'second\\n'", "+'second'"
+        ])
+        self._check_summary("temperature 21.5", "temperature 22.5", [
+            "Index 13: actual ' 21.5', expected ' 22.5' (from index 11)"
+        ])
+
+    def test_mappings(self):
+        self._check_summary({"a": 1, "b": [1, 2], "c": 3}, {"a": 1, "b": [1, 3], "d": 4}, [
+            "Missing keys (1): 'd'", "Extra keys (1): 'c'",
+            "Key 'b': actual [1, 2], expected [1, 3]"
+        ])
+
+    def test_types(self):
+        self._check_summary([1], (1,), ["Type: actual list, expected tuple"])
+        self._check_summary("abc", ["a", "b", "c"], ["Type: actual str, expected list"])
+        self._check_summary(memoryview(array.array("i", [1])), bytes(array.array("i", [1])), [
+            "Type: actual memoryview with format 'i', expected bytes"
+        ])
+        self._check_summary(1, "1", ["Actual 1, expected '1'"])
+
+
+if __name__ == "__main__":
+
+    TestCompare().run()
@@ -0,0 +1,112 @@
+"""
+Test capturing the output on the file descriptors of stdout and stderr.
+"""
+
+import ctypes
+import os
+import subprocess
+import sys
+import time
+
+from lily_unit_test.fd_capture import FdCapture
+from lily_unit_test.logger import Logger
+from lily_unit_test.test_suite import TestSuite
+
+
+class TestFdCapture(TestSuite):
+
+    def _get_messages(self, logger, message_type):
+        marker = f" | {message_type:6} | "
+        return [x.split(marker, maxsplit=1)[1] for x in logger.get_log_messages() if marker in x]
+
+    def test_file_descriptors(self):
+        logger = Logger(False, False)
+        capture = FdCapture(logger)
+        capture.start()
+        os.write(1, b"Native stdout\n")
+        os.write(2, b"Native stderr\nwithout line end")
+        subprocess.run([sys.executable, "-c", "print('From subprocess')"], check=True)
+        if os.name == "posix":
+            # Output of the C library is buffered, it is flushed when stopping
+            ctypes.CDLL(None).printf(b"From C library\n")
+        capture.stop()
+        stdout = self._get_messages(logger, Logger.TYPE_STDOUT)
+        stderr = self._get_messages(logger, Logger.TYPE_STDERR)
+        self.log.debug(f"Stdout: {stdout}")
+        self.log.debug(f"Stderr: {stderr}")
+        self.fail_if(stdout[:2] != ["Native stdout", "From subprocess"],
+                     "Output on stdout not captured")
+        if os.name == "posix":
+            self.fail_if(stdout[2:] != ["From C library"], "Output of the C library not captured")
+        self.fail_if(stderr != ["Native stderr", "without line end"],
+                     "Output on stderr not captured")
+        self.fail_if(not logger.has_stderr_messages(), "The logger should have stderr messages")
+
+    def test_high_volume(self):
+        logger = Logger(False, False)
+        capture = FdCapture(logger)
+        capture.start()
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", "for i in range(100000): print(f'Line {i}')"],
+                       check=True)
+        capture.stop()
+        self.log.debug(f"Captured in {time.perf_counter() - start:.2f} seconds")
+        lines = self._get_messages(logger, Logger.TYPE_STDOUT)
+        self.fail_if(len(lines) != 100000 or lines[-1] != "Line 99999",
+                     f"Expected 100000 lines, got {len(lines)}")
+
+    def test_one_capture_at_a_time(self):
+        capture = FdCapture(Logger(False, False))
+        capture.start()
+        try:
+            FdCapture(Logger(False, False)).start()
+        except AssertionError as e:
+            self.log.debug(f"Expected error: {e}")
+            return True
+        finally:
+            capture.stop()
+        return False
+
+    def test_failing_start(self):
+        original_pipe = os.pipe
+        n_calls = []
+
+        def _pipe():
+            # Stdout is captured, the pipe for stderr fails
+            n_calls.append(1)
+            if len(n_calls) > 1:
+                raise OSError("Too many open files")
+            return original_pipe()
+
+        stdout_before = os.fstat(1)
+        os.pipe = _pipe
+        try:
+            FdCapture(Logger(False, False)).start()
+        except OSError as e:
+            self.log.debug(f"Expected error: {e}")
+        else:
+            self.fail("Starting the capture should fail")
+        finally:
+            os.pipe = original_pipe
+        self.fail_if(not os.path.samestat(os.fstat(1), stdout_before),
+                     "Stdout is not restored")
+        # The capture is not active, so another capture can start
+        capture = FdCapture(Logger(False, False))
+        capture.start()
+        capture.stop()
+
+    def test_capture_in_test_suite(self):
+        test_suite_class = type("TestNativeOutput", (TestSuite, ), {
+            "CAPTURE_FD_OUTPUT": True,
+            "test_native_output": lambda self: os.write(1, b"Native output\n") > 0
+        })
+        test_suite = test_suite_class()
+        test_suite.log.log_to_stdout(False)
+        self.fail_if(not test_suite.run(), "The test suite should pass")
+        self.fail_if(self._get_messages(test_suite.log, Logger.TYPE_STDOUT) != ["Native output"],
+                     "The output is not in the log of the test suite")
+
+
+if __name__ == "__main__":
+
+    TestFdCapture().run()
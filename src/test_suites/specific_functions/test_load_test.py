@@ -0,0 +1,128 @@
+"""
+Test running test methods as load scenarios and the latency histogram.
+"""
+
+import asyncio
+import itertools
+import math
+import os
+import random
+import time
+
+import lily_unit_test
+
+from lily_unit_test.load_test import LatencyHistogram, LoadGenerator
+from lily_unit_test.test_suite import TestSuite
+
+
+class TestLoadTest(TestSuite):
+
+    def _run_test_suite(self, test_suite_class):
+        test_suite = test_suite_class()
+        test_suite.log.log_to_stdout(False)
+        result = test_suite.run()
+        log_messages = test_suite.log.get_log_messages()
+        self.log.debug("\n".join(x for x in log_messages if "Load scenario" in x))
+        return result, log_messages, test_suite
+
+    def test_histogram(self):
+        values = [int(random.lognormvariate(13, 1.5)) for _ in range(10000)]
+        histograms = [LatencyHistogram(), LatencyHistogram()]
+        for i, value in enumerate(values):
+            histograms[i % 2].add(value)
+        histograms[0].merge(histograms[1])
+        values.sort()
+        for percentile in (50, 90, 99, 99.9, 100):
+            expected = values[math.ceil(percentile / 100 * len(values)) - 1] / 1e9
+            actual = histograms[0].get_percentile(percentile)
+            self.fail_if(not expected <= actual <= expected * 1.001,
+                         f"Wrong percentile {percentile}: {actual}, expected {expected}")
+        summary = histograms[0].get_summary()
+        self.fail_if(summary["count"] != 10000 or summary["min"] != values[0] / 1e9 or
+                     summary["max"] != values[-1] / 1e9, "Wrong summary")
+
+    def test_load_generator(self):
+        counter = itertools.count()
+        result = LoadGenerator(lambda: next(counter) % 10 != 0, 4, iterations=500).run()
+        self.fail_if(result["calls"] != 500 or result["errors"] != 50,
+                     f"Wrong number of calls or errors: {result['calls']}, {result['errors']}")
+        self.fail_if(result["first_error"] != "Returned False", "Wrong first error")
+
+        async def _call():
+            await asyncio.sleep(0.01)
+
+        result = LoadGenerator(_call, 20, duration=0.2).run()
+        # The tasks wait at the same time
+        self.fail_if(result["calls"] < 200, f"Tasks are not concurrent: {result['calls']} calls")
+
+    def test_load_scenarios(self):
+        class TestLoad(lily_unit_test.TestSuite):
+
+            @lily_unit_test.load_scenario(concurrency=4, iterations=200, max_error_rate=20,
+                                          max_p99=1)
+            def test_threads(self):
+                if random.random() < 0.05:
+                    raise ConnectionError("Connection refused")
+
+            @lily_unit_test.load_scenario(concurrency=10, duration=0.2, min_throughput=100)
+            async def test_asyncio(self):
+                await asyncio.sleep(0.001)
+
+        result, log_messages, test_suite = self._run_test_suite(TestLoad)
+        self.fail_if(not result, "The load scenarios should pass")
+        log_text = "\n".join(log_messages)
+        for text in ("Load scenario TestLoad.test_threads: 200 calls from 4 workers (threads)",
+                     "Load scenario TestLoad.test_asyncio: ", "from 10 workers (asyncio)",
+                     "First error: ConnectionError: Connection refused", "Latency: min "):
+            self.fail_if(text not in log_text, f"Not logged: {text}")
+        names = [x["name"] for x in test_suite.measurements.get_summary()]
+        self.fail_if("test_threads p99 latency" not in names or "test_asyncio throughput"
+                     not in names, f"The results are not recorded: {names}")
+
+    def test_thresholds(self):
+        class TestLoadThresholds(lily_unit_test.TestSuite):
+
+            @lily_unit_test.load_scenario(iterations=5, max_p99=0.001)
+            def test_slow(self):
+                time.sleep(0.01)
+
+            @lily_unit_test.load_scenario(duration=0.1, min_throughput=1000)
+            def test_low_throughput(self):
+                time.sleep(0.01)
+
+            # Without a maximum error rate, any failed call fails the test case
+            @lily_unit_test.load_scenario(iterations=10)
+            def test_refused(self):
+                raise ConnectionError("Connection refused")
+
+        result, log_messages, test_suite = self._run_test_suite(TestLoadThresholds)
+        self.fail_if(result, "The thresholds should fail the test suite")
+        self.fail_if(sorted(test_suite.get_failed_test_cases()) !=
+                     ["TestLoadThresholds.test_low_throughput", "TestLoadThresholds.test_refused",
+                      "TestLoadThresholds.test_slow"],
+                     "Wrong failed test cases")
+        self.fail_if(not any("| ERROR  | First error: ConnectionError: Connection refused" in x
+                             for x in log_messages), "The first error is not logged as error")
+
+    def test_processes(self):
+        if os.name != "posix":
+            self.log.info("Skipped, the processes mode needs fork")
+            return
+        parent_pid = os.getpid()
+
+        class TestLoadProcesses(lily_unit_test.TestSuite):
+
+            @lily_unit_test.load_scenario(concurrency=3, iterations=30, mode="processes",
+                                          max_error_rate=0)
+            def test_processes(self):
+                return os.getpid() != parent_pid
+
+        result, log_messages, _ = self._run_test_suite(TestLoadProcesses)
+        self.fail_if(not result, "The calls should run in other processes")
+        self.fail_if(not any("30 calls from 3 workers (processes)" in x for x in log_messages),
+                     "Wrong number of calls")
+
+
+if __name__ == "__main__":
+
+    TestLoadTest().run()
@@ -0,0 +1,60 @@
+"""
+Test the log level and lazy formatting of log messages.
+"""
+
+from lily_unit_test.logger import Logger
+from lily_unit_test.test_suite import TestSuite
+
+
+class TestLogLevel(TestSuite):
+    LOG_LEVEL = Logger.TYPE_INFO
+
+    class _FormatCounter:
+
+        def __init__(self):
+            self.count = 0
+
+        def __format__(self, format_spec):
+            self.count += 1
+            return "formatted"
+
+    def _count_messages(self, message_type):
+        return len(list(filter(lambda x: f"| {message_type:6} |" in x,
+                               self.log.get_log_messages())))
+
+    def test_log_level_of_test_suite(self):
+        self.fail_if(self.log.get_log_level() != Logger.TYPE_INFO, "Log level is not set")
+        n_debug = self._count_messages(Logger.TYPE_DEBUG)
+        self.log.debug("This message should not be logged")
+        self.fail_if(self._count_messages(Logger.TYPE_DEBUG) != n_debug,
+                     "Debug message should not be logged")
+
+    def test_lazy_formatting(self):
+        counter = self._FormatCounter()
+        self.log.debug("Value: {}", counter)
+        self.fail_if(counter.count != 0, "Debug message should not be formatted")
+        self.log.info("Value: {value}", value=counter)
+        self.fail_if(counter.count != 1, "Info message should be formatted")
+        self.fail_if(not self.log.get_log_messages()[-1].endswith("| Value: formatted"),
+                     "Info message is not formatted correctly")
+        # Without arguments, the message is not formatted
+        self.log.info("Braces {} are kept")
+        self.fail_if(not self.log.get_log_messages()[-1].endswith("| Braces {} are kept"),
+                     "Message without arguments should not be formatted")
+
+    def test_log_level_error(self):
+        logger = Logger(False, False, Logger.TYPE_ERROR)
+        logger.debug("Debug message")
+        logger.info("Info message")
+        logger.error("Error message {}", 1)
+        logger.handle_message(Logger.TYPE_STDOUT, "Stdout message\n")
+        logger.shutdown()
+        messages = logger.get_log_messages()
+        self.log.debug(f"Messages: {messages}")
+        self.fail_if(len(messages) != 2, f"Expected 2 messages, got {len(messages)}")
+        self.fail_if(not messages[0].endswith("| Error message 1"), "Error message not logged")
+
+
+if __name__ == "__main__":
+
+    TestLogLevel().run()
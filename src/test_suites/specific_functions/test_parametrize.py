@@ -0,0 +1,114 @@
+"""
+Test the parametrized test methods.
+"""
+
+import os
+import lily_unit_test
+
+
+def _generate_values():
+    for i in range(5):
+        yield i, i * i
+
+
+class TestParametrize(lily_unit_test.TestSuite):
+
+    CALLS = []
+
+    def setup(self):
+        del self.CALLS[:]
+
+    @lily_unit_test.parametrize([1, 2, 3])
+    def test_single_value(self, value):
+        self.CALLS.append(("single", value))
+
+    @lily_unit_test.parametrize(_generate_values, name=lambda x: f"square_{x[0]}")
+    def test_generator(self, value, square):
+        self.CALLS.append(("generator", value))
+        self.fail_if(value * value != square, f"Wrong square for {value}")
+
+    @lily_unit_test.parametrize(lily_unit_test.CsvParameters(
+        os.path.join(os.path.dirname(__file__), "test_parametrize.csv"),
+        {"address": lambda x: int(x, 16), "value": int}))
+    def test_csv(self, address, value):
+        self.CALLS.append(("csv", address))
+        self.fail_if(address != value, f"Address {address} does not match value {value}")
+
+    @lily_unit_test.parametrize([{"a": 1, "b": 2}])
+    def test_keyword_arguments(self, b, a):
+        self.fail_if(a != 1 or b != 2, "Wrong keyword arguments")
+
+    def test_calls(self):
+        self.log.debug(f"Calls: {self.CALLS}")
+        expected = ([("single", i) for i in (1, 2, 3)] + [("generator", i) for i in range(5)] +
+                    [("csv", i) for i in (0x10, 0x20, 0xFF)])
+        self.fail_if(self.CALLS != expected, "The parametrized methods are not called correctly")
+
+    def test_failing_test_cases(self):
+
+        class _TestOddValuesFail(lily_unit_test.TestSuite):
+
+            @lily_unit_test.parametrize(range(4))
+            def test_odd_values_fail(self, value):
+                return value % 2 == 0
+
+        # Each set of parameters is a separate test case, the failing cases are reported separately
+        test_suite = _TestOddValuesFail()
+        test_suite.log.log_to_stdout(False)
+        self.fail_if(test_suite.run(), "The test suite should fail")
+        messages = test_suite.log.get_log_messages()
+        n_failed = len(list(filter(lambda x: x.endswith(": FAILED"), messages)))
+        self.fail_if(n_failed != 3, f"Expected 2 failed test cases and a failed test suite, "
+                                    f"got {n_failed}")
+        self.fail_if(not messages[-2].endswith("2 of 4 test cases passed (50.0%)"),
+                     f"Wrong summary: {messages[-2]}")
+
+    def test_failing_parameter_source(self):
+
+        def _failing_values():
+            yield 1
+            raise ConnectionError("Lost connection to the database")
+
+        class _TestFailingSource(lily_unit_test.TestSuite):
+
+            CALLS = []
+
+            @lily_unit_test.parametrize(_failing_values)
+            def test_a(self, value):
+                self.CALLS.append(("a", value))
+
+            @lily_unit_test.parametrize(lily_unit_test.CsvParameters("does_not_exist.csv"))
+            def test_csv(self, value):
+                self.CALLS.append(("csv", value))
+
+            def test_b(self):
+                self.CALLS.append("b")
+
+            def teardown(self):
+                self.CALLS.append("teardown")
+
+        # The other test methods and the teardown still run
+        test_suite = _TestFailingSource()
+        test_suite.log.log_to_stdout(False)
+        self.fail_if(test_suite.run(), "The test suite should fail")
+        self.log.debug("\n".join(test_suite.log.get_log_messages()))
+        self.fail_if(test_suite.CALLS != [("a", 1), "b", "teardown"],
+                     f"Wrong calls: {test_suite.CALLS}")
+        self.fail_if(test_suite.get_failed_test_cases() !=
+                     ["_TestFailingSource.test_a", "_TestFailingSource.test_csv"],
+                     f"Wrong failed test cases: {test_suite.get_failed_test_cases()}")
+        self.fail_if(not any("Cannot get the parameters of test_a: Lost connection" in x
+                             for x in test_suite.log.get_log_messages()),
+                     "The error of the parameter source is not logged")
+
+    def test_test_case_names(self):
+        messages = list(filter(lambda x: "Run test case:" in x, self.log.get_log_messages()))
+        self.fail_if(not messages[0].endswith("TestParametrize.test_single_value[0]"),
+                     f"Wrong test case name: {messages[0]}")
+        self.fail_if(not messages[3].endswith("TestParametrize.test_generator[square_0]"),
+                     f"Wrong test case name: {messages[3]}")
+
+
+if __name__ == "__main__":
+
+    TestParametrize().run()
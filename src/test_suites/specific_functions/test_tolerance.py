@@ -0,0 +1,112 @@
+"""
+Test checking many measurement values at once against limits.
+"""
+
+import math
+
+from array import array
+
+from lily_unit_test import tolerance
+from lily_unit_test.test_suite import TestSuite
+from lily_unit_test.tolerance import check_close, check_monotonic, check_range
+
+
+class TestTolerance(TestSuite):
+
+    def _check_summary(self, summary, expected_lines):
+        self.log.debug(summary)
+        self.fail_if(summary is None, "The check should fail")
+        for line in expected_lines:
+            self.fail_if(line not in summary.split("\n"), f"Line not in summary: {line}")
+
+    def test_range(self):
+        waveform = array("d", (math.sin(i / 100) for i in range(10000)))
+        self.fail_if(check_range(waveform, -1.0, 1.0) is not None, "The waveform is in range")
+        waveform[1234] = 1.5
+        waveform[5000:5100] = array("d", [-1.2] * 100)
+        waveform[7000] = float("nan")
+        self._check_summary(check_range(waveform, -1, 1), [
+            "102 of 10000 values out of range [-1, 1]",
+            "Worst at index 7000: nan, not a number",
+            "Indices: 1234, 5000-5099, 7000"
+        ])
+        waveform[7000] = 0
+        self._check_summary(check_range(waveform, maximum=1), [
+            "1 of 10000 values above 1", "Worst at index 1234: 1.5, 0.5 outside the limits"
+        ])
+        self._check_summary(check_range(list(range(100)), 10, max_groups=1), [
+            "10 of 100 values below 10", "Indices: 0-9"
+        ])
+
+    def test_range_empty_and_nan(self):
+        # Both code paths are checked: with NumPy if installed, and without NumPy
+        installed_numpy = tolerance.numpy
+        try:
+            for numpy in [installed_numpy] + ([None] if installed_numpy is not None else []):
+                tolerance.numpy = numpy
+                self.log.debug(f"NumPy: {numpy is not None}")
+                self.fail_if(check_range([], -1, 1) is not None, "No values are in range")
+                self.fail_if(check_range(array("d"), maximum=1) is not None,
+                             "No values are in range")
+                self._check_summary(check_range([math.nan]), [
+                    "1 of 1 values out of the limits", "Worst at index 0: nan, not a number"
+                ])
+                self._check_summary(check_range([0.5, math.nan, 2.0], 0, 1), [
+                    "2 of 3 values out of range [0, 1]", "Worst at index 1: nan, not a number",
+                    "Indices: 1-2"
+                ])
+        finally:
+            tolerance.numpy = installed_numpy
+
+    def test_range_per_value(self):
+        values = [1, 2, 3, 4, 5]
+        self._check_summary(check_range(values, [0, 0, 0, 0, 0], [2, 2, 2, 5, 5]), [
+            "1 of 5 values out of the limits", "Indices: 2"
+        ])
+        self._check_summary(check_range(bytes([1, 2, 200, 4]), 0, 100), [
+            "1 of 4 values out of range [0, 100]", "Worst at index 2: 200, 100 outside the limits"
+        ])
+
+    def test_close(self):
+        self.fail_if(check_close([1.0, 2.01], [1.0, 2.0], 0.02) is not None,
+                     "The values are close")
+        self._check_summary(check_close([1.0, 2.05, 2.9, 4.0], [1.0, 2.0, 3.0, 4.0],
+                                        rel_tolerance=0.02), [
+            "2 of 4 values not close to the expected values",
+            "Worst at index 2: 2.9, expected 3, allowed deviation 0.06",
+            "Indices: 1-2"
+        ])
+        self._check_summary(check_close([10, 10.5, 11], 10, abs_tolerance=0.5), [
+            "1 of 3 values not close to the expected values", "Indices: 2"
+        ])
+
+    def test_monotonic(self):
+        frequencies = [1000 + 10 * i for i in range(1000)]
+        self.fail_if(check_monotonic(frequencies, strict=True) is not None,
+                     "The frequencies are increasing")
+        frequencies[100] = frequencies[99]
+        frequencies[500] = 0
+        self.fail_if(check_monotonic(frequencies[:200]) is not None,
+                     "Equal values are allowed when not strict")
+        self._check_summary(check_monotonic(frequencies, strict=True), [
+            "2 of 1000 values not strictly increasing", "Worst at index 500: 5990 to 0",
+            "Indices: 100, 500"
+        ])
+        self._check_summary(check_monotonic([3, 2, 1, 2], False), [
+            "1 of 4 values not decreasing", "Indices: 3"
+        ])
+
+    def test_passing_values(self):
+        values = [float(i) for i in range(10000)]
+
+        def _message():
+            raise AssertionError("The error message should only be created on a failure")
+
+        self.fail_if_out_of_range(values, 0, 10000, _message)
+        self.fail_if_not_close(values, values, error_message=_message)
+        self.fail_if_not_monotonic(values, error_message=_message)
+
+
+if __name__ == "__main__":
+
+    TestTolerance().run()
@@ -0,0 +1,75 @@
+"""
+Test the virtual time of the test suite.
+"""
+
+import time
+
+from lily_unit_test.clock import Clock, VirtualClock
+from lily_unit_test.test_suite import TestSuite
+
+
+class TestVirtualClock(TestSuite):
+
+    VIRTUAL_TIME = True
+
+    _events = []
+
+    def _timer(self, name, timeout):
+        self.sleep(timeout)
+        self._events.append((name, self.clock.monotonic()))
+
+    def _poll(self, values):
+        for _ in range(20):
+            self.sleep(100)
+        values[0] = True
+
+    def test_fast_forward(self):
+        self.fail_if(not isinstance(self.clock, VirtualClock), "The clock should be virtual")
+        self.fail_if(Clock.get_thread_clock() is not self.clock, "The thread uses another clock")
+        real_start = time.perf_counter()
+        start = self.clock.monotonic()
+        start_time = self.clock.time()
+        self.sleep(3600)
+        self.fail_if(round(self.clock.monotonic() - start, 6) != 3600,
+                     "The clock did not move one hour")
+        self.fail_if(round(self.clock.time() - start_time, 6) != 3600,
+                     "The time did not move one hour")
+        self.fail_if(time.perf_counter() - real_start > 1, "Sleeping took real time")
+
+    def test_timer_order(self):
+        self._events = []
+        start = self.clock.monotonic()
+        threads = [self.start_thread(self._timer, (name, timeout))
+                   for name, timeout in (("session", 300), ("retry", 30), ("keep alive", 10),
+                                         ("retry again", 60))]
+        self.sleep(600)
+        self.fail_if(any(x.is_alive() for x in threads), "The threads should be finished")
+        events = [(name, round(event_time - start, 6)) for name, event_time in self._events]
+        self.log.debug(f"Events: {events}")
+        self.fail_if(events != [("keep alive", 10), ("retry", 30), ("retry again", 60),
+                                ("session", 300)], "The timers are in the wrong order")
+
+    def test_wait_for(self):
+        values = [False]
+        real_start = time.perf_counter()
+        start = self.clock.monotonic()
+        self.start_thread(self._poll, (values, ))
+        self.fail_if(not self.wait_for(values, True, 3000, 10), "The value did not change")
+        # The value changes after 2000 seconds, it is checked every 10 seconds
+        self.fail_if(not 2000 <= round(self.clock.monotonic() - start, 6) <= 2010,
+                     "The value changed at the wrong time")
+        self.fail_if(self.wait_for(lambda: False, True, 600, 1), "Wait for should time out")
+        self.fail_if(time.perf_counter() - real_start > 1, "Waiting took real time")
+
+    def test_real_time_when_not_sleeping(self):
+        # A thread that waits for something else than the clock, keeps the real time
+        real_start = time.perf_counter()
+        thread = self.start_thread(time.sleep, (0.2, ))
+        self.sleep(0.1)
+        self.fail_if(time.perf_counter() - real_start < 0.1, "The clock should not fast-forward")
+        thread.join()
+
+
+if __name__ == "__main__":
+
+    TestVirtualClock().run()
@@ -0,0 +1,20 @@
+"""
+Test class for testing the fail_if_not_equal method.
+"""
+
+from lily_unit_test.classification import Classification
+from lily_unit_test.test_suite import TestSuite
+
+
+class TestFailIfNotEqual(TestSuite):
+    CLASSIFICATION = Classification.FAIL
+
+    def test_fail_if_not_equal(self):
+        self.fail_if_not_equal({"a": 1, "b": 2}, {"a": 1, "b": 3},
+                               lambda: "This should not generate an exception, but should fail",
+                               False)
+
+
+if __name__ == "__main__":
+
+    TestFailIfNotEqual().run()
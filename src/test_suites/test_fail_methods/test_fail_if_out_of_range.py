@@ -0,0 +1,20 @@
+"""
+Test class for testing the fail_if_out_of_range method.
+"""
+
+from lily_unit_test.classification import Classification
+from lily_unit_test.test_suite import TestSuite
+
+
+class TestFailIfOutOfRange(TestSuite):
+    CLASSIFICATION = Classification.FAIL
+
+    def test_fail_if_out_of_range(self):
+        self.fail_if_out_of_range([float(i) for i in range(10000)], 0, 5000,
+                                  "This should not generate an exception, but should fail",
+                                  False)
+
+
+if __name__ == "__main__":
+
+    TestFailIfOutOfRange().run()